@@ -0,0 +1,322 @@
+# api_executor.py
+# Executor de llamadas API con carriles por endpoint y control de hilos colgados
+
+import time
+import threading
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+
+# Endpoint de cada método de la librería (el resto va al carril "default")
+ENDPOINT_BY_FUNCTION = {
+    "get_candles": "candles",
+    "get_realtime_candles": "candles",
+    "start_candles_stream": "candles",
+    "stop_candles_stream": "candles",
+    "buy": "buy",
+    "buy_digital_spot": "buy",
+    "get_balance": "balance",
+    "get_all_open_time": "open_time",
+    "update_ACTIVES_OPCODE": "open_time",
+    "get_all_ACTIVES_OPCODE": "open_time",
+    "get_all_profit": "open_time",
+    "get_all_init_v2": "open_time",
+    "get_async_order": "orders",
+    "get_position_history_v2": "orders",
+    "get_position_history": "orders",
+    "check_win_v3": "orders",
+    "get_betinfo": "orders",
+}
+
+
+# Endpoints que nunca se fusionan: cada orden es una operación distinta
+NO_COALESCE_ENDPOINTS = {"buy"}
+
+
+def endpoint_for(func):
+    """Carril que corresponde a un método de la librería"""
+    return ENDPOINT_BY_FUNCTION.get(getattr(func, "__name__", ""), "default")
+
+
+class TokenBucket:
+    """
+    Limitador de tasa por cubo de fichas
+
+    Admite ráfagas de hasta `burst` llamadas y luego `rate` llamadas por
+    segundo. acquire() espera lo necesario, como máximo `timeout` segundos.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, timeout=None):
+        """
+        Tomar una ficha
+
+        Returns:
+            float: Segundos esperados, o None si no hubo ficha dentro del timeout
+        """
+        start = time.monotonic()
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait_time = (1 - self.tokens) / self.rate
+            if timeout is not None and now + wait_time - start > timeout:
+                return None
+            time.sleep(wait_time)
+            waited = time.monotonic() - start
+
+
+class _Lane:
+    """
+    Pool acotado para un endpoint
+
+    Un hilo que supera el timeout sigue dentro de la librería: se cuenta como
+    colgado hasta que vuelva. Si todos los hilos del pool están colgados, el
+    pool se retira (sus hilos terminarán o morirán con el proceso) y se crea
+    uno nuevo, así el endpoint nunca queda bloqueado por llamadas anteriores.
+    """
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = max(1, workers)
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.stuck = 0
+        self.timeouts = 0
+        self.replacements = 0
+        self.pool = self._new_pool()
+
+    def _new_pool(self):
+        return ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix=f"api-{self.name}-{self.generation}"
+        )
+
+    def submit(self, func, *args, **kwargs):
+        with self.lock:
+            if self.stuck >= self.workers:
+                self._replace_pool()
+            return self.pool.submit(func, *args, **kwargs), self.generation
+
+    def mark_stuck(self, future, generation):
+        """Contar el hilo como colgado hasta que la llamada termine"""
+        with self.lock:
+            self.timeouts += 1
+            if generation != self.generation:
+                return
+            self.stuck += 1
+        future.add_done_callback(lambda _: self._release(generation))
+
+    def _release(self, generation):
+        with self.lock:
+            if generation == self.generation and self.stuck > 0:
+                self.stuck -= 1
+
+    def _replace_pool(self):
+        # Llamar con self.lock tomado
+        logging.getLogger(__name__).warning(
+            f"♻️ Carril {self.name}: {self.stuck} hilos colgados, reemplazando pool"
+        )
+        self.pool.shutdown(wait=False)
+        self.generation += 1
+        self.stuck = 0
+        self.replacements += 1
+        self.pool = self._new_pool()
+
+    def recycle(self):
+        """Descartar el pool actual (ej: tras reconectar)"""
+        with self.lock:
+            if self.stuck:
+                self._replace_pool()
+
+    def shutdown(self, wait=True):
+        with self.lock:
+            pool = self.pool
+        # Con hilos colgados, esperar bloquearía el cierre indefinidamente
+        pool.shutdown(wait=wait and self.stuck == 0)
+
+
+class ApiExecutor:
+    """
+    Executor de llamadas a la API de IQ Option
+
+    Cada endpoint (candles, buy, balance, open_time, orders) tiene su propio
+    carril acotado, de modo que una orden nunca espera detrás de una descarga
+    de velas colgada. Cuenta los timeouts consecutivos: al llegar a
+    `max_freeze_count` la conexión se considera congelada y frozen() devuelve
+    True hasta que se llame a reset().
+
+    Por debajo de los carriles:
+    - Cada endpoint puede tener un límite de tasa (rate, burst) para que las
+      ráfagas no acaben limitadas por el bróker.
+    - Las llamadas idénticas en curso se fusionan en un solo Future (nunca
+      las de "buy").
+    - Opcionalmente, un resultado se reutiliza durante `reuse_windows[endpoint]`
+      segundos.
+    """
+
+    def __init__(self, lanes, max_freeze_count=5, rate_limits=None, reuse_windows=None):
+        self.lanes = {name: _Lane(name, workers) for name, workers in lanes.items()}
+        if "default" not in self.lanes:
+            self.lanes["default"] = _Lane("default", 2)
+        self.max_freeze_count = max_freeze_count
+        self.consecutive_timeouts = 0
+        self._lock = threading.Lock()
+
+        self.buckets = {
+            name: TokenBucket(rate, burst)
+            for name, (rate, burst) in (rate_limits or {}).items()
+        }
+        self.reuse_windows = dict(reuse_windows or {})
+        self._inflight = {}  # clave -> Future compartido
+        self._recent = {}    # clave -> (momento, resultado)
+        self.counters = {"calls": 0, "coalesced": 0, "reused": 0, "throttled": 0, "throttle_wait": 0.0}
+
+    def call(self, func, *args, timeout, endpoint=None, **kwargs):
+        """
+        Ejecutar `func` en su carril y esperar como máximo `timeout` segundos
+
+        Raises:
+            concurrent.futures.TimeoutError: Si la llamada no termina a tiempo
+            Exception: La excepción lanzada por `func`
+        """
+        endpoint = endpoint if endpoint in self.lanes else endpoint_for(func)
+        if endpoint not in self.lanes:
+            endpoint = "default"
+        key = self._coalesce_key(endpoint, func, args, kwargs)
+
+        shared = None
+        leader = True
+        with self._lock:
+            self.counters["calls"] += 1
+            if key is not None:
+                reused = self._recent.get(key)
+                if reused is not None and time.monotonic() - reused[0] <= self.reuse_windows.get(endpoint, 0):
+                    self.counters["reused"] += 1
+                    return reused[1]
+                shared = self._inflight.get(key)
+                if shared is not None:
+                    self.counters["coalesced"] += 1
+                    leader = False
+                else:
+                    shared = Future()
+                    self._inflight[key] = shared
+
+        if not leader:
+            # Otra llamada idéntica ya está en curso: esperar su resultado
+            return shared.result(timeout=timeout)
+
+        try:
+            result = self._run(endpoint, func, args, kwargs, timeout)
+        except BaseException as e:
+            if key is not None:
+                self._finish(key, endpoint, shared, exception=e)
+            raise
+        if key is not None:
+            self._finish(key, endpoint, shared, result=result)
+        return result
+
+    def _run(self, endpoint, func, args, kwargs, timeout):
+        start = time.monotonic()
+        bucket = self.buckets.get(endpoint)
+        if bucket is not None:
+            waited = bucket.acquire(timeout)
+            if waited is None:
+                with self._lock:
+                    self.counters["throttled"] += 1
+                raise FutureTimeoutError()
+            if waited > 0:
+                with self._lock:
+                    self.counters["throttled"] += 1
+                    self.counters["throttle_wait"] += waited
+
+        lane = self.lanes[endpoint]
+        future, generation = lane.submit(func, *args, **kwargs)
+        try:
+            result = future.result(timeout=max(0.0, timeout - (time.monotonic() - start)))
+        except FutureTimeoutError:
+            lane.mark_stuck(future, generation)
+            with self._lock:
+                self.consecutive_timeouts += 1
+            raise
+        with self._lock:
+            self.consecutive_timeouts = 0
+        return result
+
+    def _finish(self, key, endpoint, shared, result=None, exception=None):
+        """Publicar el resultado a las llamadas fusionadas y guardarlo para reutilizar"""
+        with self._lock:
+            self._inflight.pop(key, None)
+            if exception is None and result is not None and self.reuse_windows.get(endpoint):
+                self._recent[key] = (time.monotonic(), result)
+        if exception is not None:
+            shared.set_exception(exception)
+        else:
+            shared.set_result(result)
+
+    @staticmethod
+    def _coalesce_key(endpoint, func, args, kwargs):
+        """Clave de fusión (None si la llamada no se puede fusionar)"""
+        if endpoint in NO_COALESCE_ENDPOINTS:
+            return None
+        key = (
+            endpoint,
+            getattr(func, "__name__", repr(func)),
+            id(getattr(func, "__self__", None)),
+            args,
+            tuple(sorted(kwargs.items())),
+        )
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def frozen(self):
+        """La conexión no responde: demasiados timeouts seguidos"""
+        return self.consecutive_timeouts >= self.max_freeze_count
+
+    def reset(self):
+        """Reiniciar el contador y reemplazar los pools con hilos colgados"""
+        with self._lock:
+            self.consecutive_timeouts = 0
+            self._recent.clear()
+        for lane in self.lanes.values():
+            lane.recycle()
+
+    def stats(self):
+        """Estado de cada carril: hilos colgados, timeouts y pools reemplazados"""
+        return {
+            name: {
+                "workers": lane.workers,
+                "stuck": lane.stuck,
+                "timeouts": lane.timeouts,
+                "replacements": lane.replacements,
+            }
+            for name, lane in self.lanes.items()
+        }
+
+    def saved_calls(self):
+        """Contadores de llamadas ahorradas (fusionadas y reutilizadas) y esperas por límite"""
+        with self._lock:
+            counters = dict(self.counters)
+        counters["saved"] = counters["coalesced"] + counters["reused"]
+        return counters
+
+    def shutdown(self, wait=True):
+        for lane in self.lanes.values():
+            lane.shutdown(wait=wait)
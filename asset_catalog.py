@@ -0,0 +1,257 @@
+# asset_catalog.py
+# Caché de opcodes y estado de activos con refresco en segundo plano
+
+import os
+import json
+import time
+import threading
+import logging
+
+
+class AssetCatalog:
+    """
+    Catálogo de activos de IQ Option (opcodes y estado abierto/cerrado)
+
+    Guarda la última respuesta de cada consulta y un hilo en segundo plano
+    la renueva `refresh_margin` segundos antes de que venza su TTL. Los
+    lectores reciben siempre la instantánea actual sin esperar; solo la
+    primera lectura (sin datos todavía) consulta a la API directamente.
+
+    Las instantáneas se reemplazan enteras en cada refresco, nunca se
+    modifican, así que se pueden leer sin lock.
+    """
+
+    def __init__(self, fetch_opcodes, fetch_open_time, opcode_ttl=3600, status_ttl=300,
+                 refresh_margin=30, retry_interval=30, logger=None):
+        """
+        Args:
+            fetch_opcodes: Callable que devuelve {activo: opcode} (o None si falla)
+            fetch_open_time: Callable que devuelve el estado de get_all_open_time
+        """
+        self.status_listeners = []  # Callables que reciben cada nuevo estado de activos
+        self._fetch_opcodes = fetch_opcodes
+        self._fetch_open_time = fetch_open_time
+        self.opcode_ttl = opcode_ttl
+        self.status_ttl = status_ttl
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._opcodes = None
+        self._opcodes_timestamp = 0
+        self._status = None
+        self._status_timestamp = 0
+
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.refresh_count = 0
+
+    # --- Lectura ---
+
+    def opcodes(self):
+        """Instantánea de opcodes por activo ({} si no se pudo obtener)"""
+        if self._opcodes is None:
+            self.refresh(opcodes=True, status=False)
+        return self._opcodes or {}
+
+    def open_status(self):
+        """Instantánea de get_all_open_time ({} si no se pudo obtener)"""
+        if self._status is None:
+            self.refresh(opcodes=False, status=True)
+        return self._status or {}
+
+    def seed_opcodes(self, opcodes, timestamp):
+        """Cargar opcodes guardados en disco (se renuevan cuando venza su TTL)"""
+        self._opcodes = dict(opcodes)
+        self._opcodes_timestamp = timestamp
+
+    def is_open(self, option_type, asset_name):
+        status = self.open_status()
+        return bool(status.get(option_type, {}).get(asset_name, {}).get("open", False))
+
+    def status_age(self):
+        """Segundos desde el último refresco del estado de activos"""
+        return time.time() - self._status_timestamp if self._status_timestamp else None
+
+    # --- Refresco ---
+
+    def refresh(self, opcodes=True, status=True):
+        """
+        Consultar la API y reemplazar las instantáneas indicadas
+
+        Returns:
+            bool: True si todas las consultas pedidas respondieron
+        """
+        ok = True
+        with self._refresh_lock:
+            if opcodes:
+                start = time.time()
+                result = self._fetch_opcodes()
+                if result:
+                    self._opcodes = dict(result)
+                    self._opcodes_timestamp = time.time()
+                    self.logger.debug(f"🗂️ Opcodes actualizados ({len(result)} activos, {time.time() - start:.1f}s)")
+                else:
+                    ok = False
+            if status:
+                start = time.time()
+                result = self._fetch_open_time()
+                if result:
+                    self._status = result
+                    self._status_timestamp = time.time()
+                    self.logger.debug(f"🗂️ Estado de activos actualizado ({time.time() - start:.1f}s)")
+                else:
+                    ok = False
+        self.refresh_count += 1
+
+        if status and ok:
+            self._notify_status()
+        return ok
+
+    def publish_status(self, status):
+        """Reemplazar el estado sin consultar la API (ej: cambio de horario conocido)"""
+        self._status = status
+        self._notify_status()
+
+    def _notify_status(self):
+        for listener in self.status_listeners:
+            try:
+                listener(self._status)
+            except Exception as e:
+                self.logger.error(f"❌ Error notificando estado de activos: {str(e)}")
+
+    def request_refresh(self):
+        """Pedir al hilo de fondo un refresco del estado cuanto antes"""
+        self._status_timestamp = 0
+        self._wake.set()
+
+    def _next_refresh_time(self):
+        opcodes_due = self._opcodes_timestamp + self.opcode_ttl - self.refresh_margin
+        status_due = self._status_timestamp + self.status_ttl - self.refresh_margin
+        return min(opcodes_due, status_due)
+
+    def _run(self):
+        while not self._stop.is_set():
+            timeout = max(0.0, self._next_refresh_time() - time.time())
+            self._wake.wait(timeout)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+
+            now = time.time()
+            refresh_opcodes = now >= self._opcodes_timestamp + self.opcode_ttl - self.refresh_margin
+            refresh_status = now >= self._status_timestamp + self.status_ttl - self.refresh_margin
+            if not (refresh_opcodes or refresh_status):
+                continue
+            try:
+                ok = self.refresh(opcodes=refresh_opcodes, status=refresh_status)
+            except Exception as e:
+                self.logger.error(f"❌ Error refrescando catálogo de activos: {str(e)}")
+                ok = False
+            if not ok:
+                # Se sigue sirviendo la instantánea anterior; reintentar más tarde
+                self._stop.wait(self.retry_interval)
+
+    def start(self):
+        """Arrancar el hilo de refresco en segundo plano"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="asset-catalog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+
+def rank_variants(pair, all_assets, allowed_suffixes, priority_suffix=None):
+    """
+    Variantes abiertas de un par ordenadas por preferencia
+
+    Sin sufijo prioritario: OTC primero (más estable) y binary sobre turbo.
+    Con sufijo prioritario: el orden de búsqueda configurado.
+
+    Returns:
+        list: Dicts con pair, option_type, iq_name e is_otc (la primera es la mejor)
+    """
+    pair_upper = pair.upper()
+    available_options = []
+
+    # Buscar en opciones turbo y binarias
+    for option_type in ["turbo", "binary"]:
+        if option_type not in all_assets:
+            continue
+
+        # Lista de todas las variantes posibles del par
+        variants_to_check = []
+
+        # Si NO hay prioridad, probar primero las OTC (más estables)
+        if priority_suffix is None:
+            # Orden recomendado: OTC primero (más estable), luego estándar, luego -op
+            variants_to_check.append(f"{pair_upper}-OTC")
+            variants_to_check.append(pair_upper)
+            variants_to_check.append(f"{pair_upper}-op")
+        else:
+            # Si hay prioridad, usar el orden configurado
+            variants_to_check.append(pair_upper)
+            if priority_suffix:
+                variants_to_check.append(f"{pair_upper}{priority_suffix}")
+            for suffix in allowed_suffixes:
+                variant = f"{pair_upper}{suffix}"
+                if variant not in variants_to_check:
+                    variants_to_check.append(variant)
+
+        # Buscar cada variante
+        for variant in variants_to_check:
+            if all_assets[option_type].get(variant, {}).get("open", False):
+                available_options.append({
+                    'pair': pair,
+                    'option_type': option_type,
+                    'iq_name': variant,
+                    'is_otc': variant.endswith('-OTC')
+                })
+
+    if priority_suffix is None:
+        # Ordenar: OTC primero, luego binary sobre turbo
+        available_options.sort(key=lambda x: (
+            not x['is_otc'],  # OTC primero (False=0, True=1)
+            x['option_type'] != 'binary'  # binary preferido sobre turbo
+        ))
+
+    return available_options
+
+
+def save_catalog_file(path, opcodes, iqoption_pairs, pair_option_types):
+    """Guardar el catálogo resuelto (opcodes y variante elegida por par)"""
+    catalog = {
+        "timestamp": time.time(),
+        "opcodes": dict(opcodes),
+        "iqoption_pairs": dict(iqoption_pairs),
+        "pair_option_types": dict(pair_option_types),
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(catalog, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+def load_catalog_file(path, max_age):
+    """
+    Leer el catálogo guardado si existe y no es más antiguo que `max_age`
+
+    Returns:
+        dict: Catálogo con timestamp, opcodes, iqoption_pairs y
+        pair_option_types, o None si no hay uno vigente
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        catalog = json.load(f)
+    if time.time() - catalog.get("timestamp", 0) > max_age:
+        return None
+    if not catalog.get("opcodes") or not catalog.get("iqoption_pairs"):
+        return None
+    return catalog
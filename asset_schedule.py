@@ -0,0 +1,97 @@
+# asset_schedule.py
+# Calendario de horarios de negociación por variante de activo
+
+import bisect
+
+
+class TradingCalendar:
+    """
+    Horarios de apertura de cada activo binary/turbo
+
+    Se construye con la respuesta de get_all_init_v2, que trae para cada
+    activo los intervalos [inicio, fin] (epoch) en que se puede operar,
+    además de los indicadores enabled/is_suspended. Con eso se sabe si un
+    activo está abierto en cualquier momento y cuándo cambia de estado,
+    sin volver a preguntar al bróker.
+    """
+
+    OPTION_TYPES = ("binary", "turbo")
+
+    def __init__(self):
+        self._starts = {}     # (tipo, activo) -> inicios ordenados
+        self._ends = {}       # (tipo, activo) -> fines (mismo orden)
+        self._available = {}  # (tipo, activo) -> enabled y no suspendido
+        self.loaded_at = None
+
+    def __len__(self):
+        return len(self._available)
+
+    def load(self, init_data, now):
+        """
+        Cargar los horarios desde get_all_init_v2
+
+        Returns:
+            bool: True si había datos de horarios
+        """
+        starts, ends, available = {}, {}, {}
+        for option_type in self.OPTION_TYPES:
+            actives = (init_data or {}).get(option_type, {}).get("actives", {})
+            for active in actives.values():
+                # El nombre viene como "front.EURUSD-OTC"
+                name = str(active.get("name", "")).split(".")[-1]
+                if not name:
+                    continue
+                key = (option_type, name)
+                intervals = sorted(
+                    (float(start), float(end))
+                    for start, end in active.get("schedule", [])
+                    if float(end) > float(start)
+                )
+                starts[key] = [start for start, _ in intervals]
+                ends[key] = [end for _, end in intervals]
+                available[key] = bool(active.get("enabled")) and not active.get("is_suspended", False)
+
+        if not available:
+            return False
+        self._starts, self._ends, self._available = starts, ends, available
+        self.loaded_at = now
+        return True
+
+    def is_open(self, option_type, name, when):
+        key = (option_type, name)
+        if not self._available.get(key, False):
+            return False
+        starts = self._starts[key]
+        if not starts:
+            # Sin horario publicado: abierto mientras esté habilitado
+            return True
+        i = bisect.bisect_right(starts, when) - 1
+        return i >= 0 and when < self._ends[key][i]
+
+    def next_change(self, option_type, name, when):
+        """Próximo inicio o fin de horario posterior a `when` (None si no hay)"""
+        key = (option_type, name)
+        starts = self._starts.get(key)
+        if not starts or not self._available.get(key, False):
+            return None
+        i = bisect.bisect_right(starts, when) - 1
+        if i >= 0 and when < self._ends[key][i]:
+            return self._ends[key][i]
+        return starts[i + 1] if i + 1 < len(starts) else None
+
+    def open_status(self, when):
+        """Estado con el formato de get_all_open_time ({tipo: {activo: {"open": bool}}})"""
+        status = {option_type: {} for option_type in self.OPTION_TYPES}
+        for option_type, name in self._available:
+            status[option_type][name] = {"open": self.is_open(option_type, name, when)}
+        return status
+
+    def next_boundary(self, names, when):
+        """Próximo cambio de horario entre los activos indicados (None si no hay)"""
+        changes = [
+            self.next_change(option_type, name, when)
+            for option_type in self.OPTION_TYPES
+            for name in names
+        ]
+        changes = [change for change in changes if change is not None]
+        return min(changes) if changes else None
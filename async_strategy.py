@@ -0,0 +1,306 @@
+# async_strategy.py
+# Motor asyncio de la estrategia RSI (mismas reglas que el motor con hilos)
+
+import asyncio
+import time
+import threading
+import traceback
+from datetime import datetime
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+from config import *
+from strategy import MultiCurrencyRSIBinaryOptionsStrategy
+
+try:
+    from fastapi import FastAPI
+    import uvicorn
+except ImportError:  # El panel de monitoreo es opcional
+    FastAPI = None
+    uvicorn = None
+
+
+class AsyncRSIStrategy(MultiCurrencyRSIBinaryOptionsStrategy):
+    """
+    Estrategia RSI sobre un único event loop
+
+    Las reglas de trading son las de MultiCurrencyRSIBinaryOptionsStrategy.
+    Velas, liquidaciones, guardado de estado, conexión y el endpoint de
+    monitoreo corren como tareas concurrentes; las llamadas bloqueantes de
+    la librería se envían a un executor dedicado.
+    """
+
+    def __init__(self, email, password, account_type="PRACTICE"):
+        super().__init__(email, password, account_type)
+        self.blocking_executor = ThreadPoolExecutor(
+            max_workers=API_MAX_WORKERS,
+            thread_name_prefix="iq-blocking"
+        )
+        self.loop = None
+        self.async_wake = None
+        self.stopping = None
+        self.cycle_count = 0
+
+    def run(self):
+        """Ejecutar la estrategia en el event loop"""
+        try:
+            asyncio.run(self.run_async())
+        except KeyboardInterrupt:
+            self.logger.info("⏹️ Estrategia detenida por el usuario")
+
+    async def run_async(self):
+        """Lanzar todas las tareas y esperar hasta que alguna termine o se detenga"""
+        self.loop = asyncio.get_running_loop()
+        self.async_wake = asyncio.Event()
+        self.stopping = asyncio.Event()
+
+        self.logger.info("🚀 Iniciando estrategia RSI Multi-Divisa (motor asyncio)")
+        self.logger.info(f"📊 Configuración: {len(self.valid_pairs)} pares disponibles")
+        self.logger.info(f"⏰ Tiempo entre señales: {self.min_time_between_signals} minutos")
+
+        tasks = [
+            asyncio.create_task(self._signal_loop(), name="signals"),
+            asyncio.create_task(self._settlement_loop(), name="settlement"),
+            asyncio.create_task(self._state_loop(), name="state"),
+            asyncio.create_task(self._connection_loop(), name="connection"),
+        ]
+        # El monitoreo no forma parte de las tareas críticas: si falla, se sigue operando
+        monitor = self._build_monitor_server()
+        monitor_task = None
+        if monitor is not None:
+            monitor_task = asyncio.create_task(monitor.serve(), name="monitor")
+
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception() is not None:
+                    self.logger.critical(f"🚨 Error crítico en tarea {task.get_name()}: {task.exception()}")
+        except asyncio.CancelledError:
+            self.logger.info("⏹️ Estrategia detenida")
+        finally:
+            self.stopping.set()
+            if monitor is not None:
+                monitor.should_exit = True
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if monitor_task is not None:
+                await asyncio.gather(monitor_task, return_exceptions=True)
+
+            self.logger.info("🏁 Finalizando estrategia...")
+            await self._blocking(self.state_writer.flush)
+            await self._blocking(self.print_summary)
+            await self._blocking(self.trade_ledger.close)
+            self.asset_catalog.stop()
+            self.blocking_executor.shutdown(wait=False)
+            self.pair_executor.shutdown(wait=False)
+            self.executor.shutdown(wait=False)
+            self.logger.info("👋 Estrategia finalizada")
+
+    async def _blocking(self, func, *args, **kwargs):
+        """Ejecutar una llamada bloqueante en el executor dedicado"""
+        return await self.loop.run_in_executor(self.blocking_executor, partial(func, *args, **kwargs))
+
+    def _on_settlement_pushed(self, pair, order, future):
+        """Además de encolar el resultado, despertar el event loop"""
+        super()._on_settlement_pushed(pair, order, future)
+        if self.loop is not None and not future.cancelled():
+            self.loop.call_soon_threadsafe(self.async_wake.set)
+
+    async def _sleep_until_wake(self, timeout):
+        """Dormir hasta el timeout o hasta que llegue un resultado por push (liquidación)"""
+        try:
+            await asyncio.wait_for(self.async_wake.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        self.async_wake.clear()
+
+    async def _signal_loop(self):
+        """Evaluar los pares que toca y colocar órdenes"""
+        while not self.stopping.is_set():
+            cycle_start = time.time()
+            self.cycle_count += 1
+
+            if self.cycle_count % 10 == 0:
+                self.logger.info(f"🔄 Ciclo #{self.cycle_count} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+            if not await self._blocking(self.check_stop_loss):
+                self.logger.info("🛑 Stop loss activo. Esperando...")
+                await asyncio.sleep(300)
+                continue
+
+            now = time.time()
+            candidate_pairs = await self._blocking(self._collect_due_pairs, now)
+
+            if candidate_pairs:
+                await self._evaluate_pairs(candidate_pairs, now)
+
+            # Re-verificar pares periódicamente (con calendario, lo hacen los cambios de horario)
+            if self.trading_calendar is None and self.cycle_count % 100 == 0:
+                self.logger.info("🔄 Re-verificando pares disponibles...")
+                await self._blocking(self.check_valid_pairs)
+
+            if self.bar_close_scheduler:
+                sleep_time = max(1.0, self._seconds_until_next_event(time.time()))
+            else:
+                sleep_time = max(5.0, 15.0 - (time.time() - cycle_start))
+            await asyncio.sleep(sleep_time)
+
+    async def _evaluate_pairs(self, pairs, now):
+        """Velas en paralelo, RSI en bloque y órdenes en paralelo, con plazo común"""
+        deadline = now + PAIR_DEADLINE
+
+        fetches = {}
+        for pair in pairs:
+            if self._fetch_in_flight(pair):
+                continue
+            stale = threading.Event()
+            future = self.blocking_executor.submit(self._fetch_pair_candles, pair, deadline, stale)
+            fetches[pair] = (asyncio.wrap_future(future), future, stale)
+        done, not_done = set(), set()
+        if fetches:
+            done, not_done = await asyncio.wait(
+                [task for task, _, _ in fetches.values()],
+                timeout=max(0.0, deadline - time.time())
+            )
+
+        deltas = {}
+        for pair, (task, future, stale) in fetches.items():
+            if task in not_done:
+                # Antes de reprogramar el par: lo que llegue tarde se descarta
+                self._abandon_candle_fetch(pair, future, stale)
+                task.cancel()
+                self.logger.warning(f"⏱️ {pair}: velas no recibidas dentro del plazo")
+            elif task.exception() is not None:
+                self.logger.error(f"❌ Error obteniendo RSI para {pair}: {str(task.exception())}")
+            elif task.result():
+                deltas[pair] = task.result()
+
+        rsi_values = self.score_candle_deltas(deltas)
+        scored_at = time.perf_counter()  # Momento en que se conoce el cruce de umbral
+
+        orders = {}
+        for pair, rsi in rsi_values.items():
+            future = self.blocking_executor.submit(self.process_currency_pair, pair, rsi, scored_at)
+            orders[pair] = (asyncio.wrap_future(future), future)
+        late_pairs = set()
+        if orders:
+            done, _ = await asyncio.wait(
+                [task for task, _ in orders.values()],
+                timeout=max(1.0, deadline - time.time())
+            )
+            for pair, (task, future) in orders.items():
+                if task in done and task.exception() is not None:
+                    self.logger.error(f"❌ Error procesando {pair}: {str(task.exception())}")
+                elif task not in done:
+                    late_pairs.add(pair)
+                    self.logger.warning(f"⏱️ {pair}: procesamiento fuera de plazo, continúa en segundo plano")
+                    # El par sigue bloqueado hasta que termine (la compra puede estar en vuelo)
+                    future.add_done_callback(partial(self._on_late_evaluation_done, pair))
+
+        await self._blocking(self._reschedule_pairs, [pair for pair in pairs if pair not in late_pairs], now)
+
+    # Secciones con state_lock: se ejecutan siempre en el executor, nunca en el
+    # event loop (otro hilo puede tener el lock durante una consulta al bróker)
+
+    def _collect_due_pairs(self, now):
+        with self.state_lock:
+            if self.last_date != datetime.now().date():
+                self.on_new_day()
+        self._check_schedule_boundary(now)
+        with self.state_lock:
+            return self._due_pairs(now)
+
+    def _reschedule_pairs(self, pairs, now):
+        with self.state_lock:
+            for pair in pairs:
+                self._schedule_next_evaluation(pair, now)
+
+    def _on_late_evaluation_done(self, pair, future):
+        # Si ya había terminado, el callback corre en el event loop: el lock se toma en el executor
+        try:
+            self.blocking_executor.submit(self._finish_late_evaluation, pair, future)
+        except RuntimeError:
+            pass  # Executor cerrado: la estrategia se está deteniendo
+
+    def _settlement_pass(self):
+        with self.state_lock:
+            self.process_pushed_settlements()
+        # Toma el lock solo para sacar las órdenes vencidas y aplicar resultados
+        self.check_active_orders()
+
+    async def _settlement_loop(self):
+        """Aplicar resultados push y liquidar las órdenes vencidas"""
+        while not self.stopping.is_set():
+            await self._blocking(self._settlement_pass)
+
+            next_due = self.settlement_queue.next_due_time()
+            timeout = MAX_IDLE_SLEEP if next_due is None else max(0.5, next_due - time.time())
+            await self._sleep_until_wake(min(timeout, MAX_IDLE_SLEEP))
+
+    async def _state_loop(self):
+        """Pedir una instantánea del estado periódicamente (la escribe el StateWriter)"""
+        while not self.stopping.is_set():
+            await asyncio.sleep(ASYNC_STATE_SAVE_INTERVAL)
+            self.state_writer.notify()
+
+    async def _connection_loop(self):
+        """Vigilar la conexión y reconectar si se pierde"""
+        while not self.stopping.is_set():
+            await asyncio.sleep(5)
+            if await self._blocking(self._connection_lost):
+                await self._blocking(self._reconnect)
+
+    def get_status(self):
+        """Resumen del estado para el endpoint de monitoreo (llamar desde el executor)"""
+        with self.state_lock:
+            active_orders = [
+                {
+                    "id": order["id"],
+                    "pair": pair,
+                    "type": order["type"],
+                    "size": order["size"],
+                    "expiry_time": order["expiry_time"].isoformat(),
+                }
+                for pair, orders in self.active_options.items()
+                for order in orders
+            ]
+            return {
+                "timestamp": datetime.now().isoformat(),
+                "uptime_seconds": round(time.time() - self.start_time),
+                "cycle": self.cycle_count,
+                "balance": self.balance_ledger.balance,
+                "initial_capital": self.initial_capital,
+                "total_profit": self.total_profit,
+                "daily_profit": self.daily_profit,
+                "wins": sum(self.wins.values()),
+                "losses": sum(self.losses.values()),
+                "ties": sum(self.ties.values()),
+                "valid_pairs": {pair: self.iqoption_pairs.get(pair) for pair in self.valid_pairs},
+                "active_orders": active_orders,
+                "stop_loss": {
+                    "absolute": self.absolute_stop_loss_activated,
+                    "monthly": self.monthly_stop_loss,
+                },
+            }
+
+    def _build_monitor_server(self):
+        """Crear el servidor del endpoint de monitoreo (None si no está disponible)"""
+        if not MONITOR_ENABLED:
+            return None
+        if FastAPI is None or uvicorn is None:
+            self.logger.warning("⚠️ fastapi/uvicorn no instalados: monitoreo desactivado")
+            return None
+
+        app = FastAPI(title="Estrategia RSI IQ Option")
+
+        @app.get("/status")
+        async def status():
+            return await self._blocking(self.get_status)
+
+        config = uvicorn.Config(app, host=MONITOR_HOST, port=MONITOR_PORT, log_level="warning")
+        server = uvicorn.Server(config)
+        # Ctrl+C debe detener la estrategia, no solo el servidor de monitoreo
+        server.install_signal_handlers = lambda: None
+        self.logger.info(f"📡 Monitoreo en http://{MONITOR_HOST}:{MONITOR_PORT}/status")
+        return server
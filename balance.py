@@ -0,0 +1,60 @@
+# balance.py
+# Balance local (sombra) para evitar consultas repetidas de get_balance
+
+import time
+
+
+class ShadowBalance:
+    """
+    Balance local que sigue al de IQ Option a partir de las operaciones
+
+    Resta la inversión al colocar una orden y suma lo devuelto al liquidarla,
+    igual que hace el bróker. Se reconcilia con el balance real cada
+    `reconcile_interval` segundos o cuando se marca como dudoso.
+    """
+
+    def __init__(self, balance, reconcile_interval=300, drift_threshold=0.5):
+        self.balance = float(balance)
+        self.reconcile_interval = reconcile_interval
+        self.drift_threshold = drift_threshold
+        self.last_reconcile = time.time()
+        self.dirty = False
+        self.reconcile_count = 0
+        self.last_drift = 0.0
+        self.version = 0  # Cambia con cada orden colocada o liquidada
+
+    def stake(self, amount):
+        """Registrar la inversión de una orden colocada"""
+        self.balance -= amount
+        self.version += 1
+
+    def settle(self, payout):
+        """Registrar lo devuelto por una orden liquidada (0 si se perdió)"""
+        self.balance += payout
+        self.version += 1
+
+    def mark_dirty(self):
+        """Forzar una reconciliación en la próxima consulta"""
+        self.dirty = True
+
+    def needs_reconcile(self, now=None):
+        now = now if now is not None else time.time()
+        return self.dirty or now - self.last_reconcile >= self.reconcile_interval
+
+    def reconcile(self, broker_balance):
+        """
+        Ajustar el balance local al del bróker
+
+        Returns:
+            float: Diferencia corregida (bróker - local)
+        """
+        drift = float(broker_balance) - self.balance
+        self.balance = float(broker_balance)
+        self.last_reconcile = time.time()
+        self.dirty = False
+        self.reconcile_count += 1
+        self.last_drift = drift
+        return drift
+
+    def has_drift(self, drift):
+        return abs(drift) > self.drift_threshold
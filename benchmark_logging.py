@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# benchmark_logging.py - Coste del logging por ciclo: handlers síncronos vs cola
+
+import os
+import sys
+import time
+import logging
+import tempfile
+import argparse
+
+from utils import setup_logger, shutdown_logging
+
+FORMAT = '%(asctime)s | %(levelname)s | %(message)s'
+DATEFMT = '%Y-%m-%d %H:%M:%S'
+
+
+def simulate_cycle(logger, cycle, lines):
+    """Un ciclo de trading típico: varias líneas INFO (órdenes, pares, resumen)"""
+    for i in range(lines):
+        logger.info(f"📊 Ciclo {cycle} | EURUSD-OTC | RSI: {30 + i % 40:.2f} | Orden {cycle * lines + i} procesada")
+
+
+def run_cycles(logger, cycles, lines):
+    """Devuelve el tiempo medio por ciclo (segundos) visto por el hilo de trading"""
+    start = time.perf_counter()
+    for cycle in range(cycles):
+        simulate_cycle(logger, cycle, lines)
+    return (time.perf_counter() - start) / cycles
+
+
+def bench_sync(log_file, cycles, lines):
+    """Configuración anterior: FileHandler y StreamHandler en el propio logger"""
+    logger = logging.getLogger("bench.sync")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    formatter = logging.Formatter(FORMAT, datefmt=DATEFMT)
+    # El setup anterior añadía los handlers en cada llamada: main + strategy
+    for _ in range(2):
+        file_handler = logging.FileHandler(log_file)
+        file_handler.setFormatter(formatter)
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formatter)
+        logger.addHandler(file_handler)
+        logger.addHandler(console_handler)
+
+    per_cycle = run_cycles(logger, cycles, lines)
+
+    for handler in list(logger.handlers):
+        handler.close()
+        logger.removeHandler(handler)
+    return per_cycle
+
+
+def bench_queue(log_file, cycles, lines):
+    """Configuración actual: QueueHandler en el raíz y QueueListener escribiendo"""
+    setup_logger("main", log_file)
+    logger = setup_logger("bench.queue", log_file)
+
+    per_cycle = run_cycles(logger, cycles, lines)
+
+    # Tiempo hasta que el listener termina de escribir lo encolado
+    start = time.perf_counter()
+    shutdown_logging()
+    drain = time.perf_counter() - start
+    return per_cycle, drain
+
+
+def count_lines(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return sum(1 for _ in f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del logging por ciclo")
+    parser.add_argument("--cycles", type=int, default=500, help="Ciclos simulados")
+    parser.add_argument("--lines", type=int, default=40, help="Líneas INFO por ciclo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sync_file = os.path.join(tmp_dir, "sync.log")
+        queue_file = os.path.join(tmp_dir, "queue.log")
+
+        # La consola va a /dev/null para medir solo el coste del logging
+        stderr = sys.stderr
+        with open(os.devnull, "w") as devnull:
+            sys.stderr = devnull
+            try:
+                sync_cycle = bench_sync(sync_file, args.cycles, args.lines)
+                queue_cycle, drain = bench_queue(queue_file, args.cycles, args.lines)
+            finally:
+                sys.stderr = stderr
+
+        sync_lines = count_lines(sync_file)
+        queue_lines = count_lines(queue_file)
+
+    total = args.cycles * args.lines
+    print(f"\n📈 BENCHMARK DE LOGGING ({args.cycles} ciclos x {args.lines} líneas)")
+    print("=" * 60)
+    print(f"Síncrono (FileHandler + StreamHandler): {sync_cycle * 1e6:10.1f} µs/ciclo  ({sync_lines} líneas escritas de {total})")
+    print(f"Cola (QueueHandler + QueueListener):    {queue_cycle * 1e6:10.1f} µs/ciclo  ({queue_lines} líneas escritas de {total})")
+    print(f"Mejora en el hilo de trading: {sync_cycle / queue_cycle:.1f}x")
+    print(f"Vaciado final de la cola: {drain * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# benchmark_order_latency.py - Latencia señal→ack: camino original vs balance local
+
+import time
+import itertools
+import logging
+import argparse
+import threading
+from collections import defaultdict, deque
+
+from config import *
+from api_executor import ApiExecutor
+from balance import ShadowBalance
+from scheduling import EligibilityIndex, SettlementQueue
+from settlement import SettlementIndex
+from strategy import MultiCurrencyRSIBinaryOptionsStrategy
+
+PAIR = "EURUSD"
+ASSET = "EURUSD-OTC"
+
+
+class NullLedger:
+    """El historial de operaciones no interviene en la latencia"""
+
+    def record_order(self, order, asset=None):
+        pass
+
+
+class SimulatedBroker:
+    """Bróker simulado: cada llamada tarda `rtt` segundos (ida y vuelta al websocket)"""
+
+    def __init__(self, rtt):
+        self.rtt = rtt
+        self.ids = itertools.count(1)
+
+    def get_balance(self):
+        time.sleep(self.rtt)
+        return 1000.0
+
+    def buy(self, amount, asset_name, direction, expiry_minutes):
+        time.sleep(self.rtt)
+        return True, next(self.ids)
+
+
+def build_strategy(broker):
+    """Estrategia mínima para medir el camino de compra (sin conexión ni estado)"""
+    strategy = MultiCurrencyRSIBinaryOptionsStrategy.__new__(MultiCurrencyRSIBinaryOptionsStrategy)
+    strategy.logger = logging.getLogger("benchmark")
+    strategy.logger.setLevel(logging.CRITICAL)
+    strategy.iqoption = broker
+    strategy.executor = ApiExecutor(API_LANES, MAX_FREEZE_COUNT)
+    strategy.last_activity_time = time.time()
+    strategy.state_lock = threading.RLock()
+    strategy.initial_capital = 1000.0
+    strategy.balance_ledger = ShadowBalance(1000.0, BALANCE_RECONCILE_INTERVAL, BALANCE_DRIFT_THRESHOLD)
+    strategy.active_options = defaultdict(list)
+    strategy.position_size_percent = POSITION_SIZE_PERCENT
+    strategy.min_position_size = MIN_POSITION_SIZE
+    strategy.max_position_size = MAX_POSITION_SIZE
+    strategy.oversold_level = OVERSOLD_LEVEL
+    strategy.overbought_level = OVERBOUGHT_LEVEL
+    strategy.expiry_minutes = EXPIRY_MINUTES
+    strategy.iqoption_pairs = {PAIR: ASSET}
+    strategy.pair_option_types = {PAIR: "turbo"}
+    strategy.order_latencies = deque(maxlen=500)
+    strategy.trade_ledger = NullLedger()
+    strategy.journal = None
+    strategy.settlement_queue = SettlementQueue(SETTLEMENT_GRACE)
+    strategy.settlement_index = SettlementIndex(strategy.logger)
+    strategy.eligibility = EligibilityIndex()
+    strategy._journal = lambda event, **data: None
+    return strategy
+
+
+def baseline_path(strategy):
+    """Camino original: get_balance para el tamaño, get_balance para el capital y buy"""
+    bet_size = round(strategy.api_call_with_timeout(strategy.iqoption.get_balance) * strategy.position_size_percent, 2)
+    bet_size = min(strategy.max_position_size, max(strategy.min_position_size, bet_size))
+    current_balance = strategy.api_call_with_timeout(strategy.iqoption.get_balance)
+    if current_balance is None or current_balance < bet_size:
+        return None
+    return strategy.place_option(PAIR, "PUT", bet_size)
+
+
+def reconcile_path(strategy):
+    """Camino anterior con la reconciliación vencida: get_balance dentro de la orden y buy"""
+    current_balance = strategy.current_balance()
+    bet_size = strategy.calculate_position_size(current_balance)
+    return strategy.place_option(PAIR, "PUT", bet_size)
+
+
+def current_path(strategy):
+    """Camino actual: tamaño desde el balance local (sin I/O) y buy"""
+    strategy.create_binary_option(PAIR, "PUT", OVERSOLD_LEVEL - 1)
+    # Liberar la orden simulada para la siguiente medición
+    for order in strategy.active_options.pop(PAIR, []):
+        strategy.balance_ledger.settle(order["size"])
+
+
+def measure(strategy, path, orders, before_each=None):
+    """Latencias (ms) desde el cruce del umbral hasta el ack del bróker"""
+    latencies = []
+    for _ in range(orders):
+        if before_each is not None:
+            before_each()
+        detected_at = time.perf_counter()
+        path(strategy)
+        latencies.append((time.perf_counter() - detected_at) * 1000)
+    return sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de latencia señal→ack")
+    parser.add_argument("--orders", type=int, default=50, help="Órdenes simuladas por camino")
+    parser.add_argument("--rtt", type=float, default=80, help="Ida y vuelta simulada al bróker (ms)")
+    args = parser.parse_args()
+
+    strategy = build_strategy(SimulatedBroker(args.rtt / 1000))
+    results = {
+        "Original (get_balance x2 + buy)": measure(strategy, baseline_path, args.orders),
+        "Anterior, reconciliación vencida": measure(
+            strategy, reconcile_path, args.orders,
+            # Cada BALANCE_RECONCILE_INTERVAL la primera orden del ciclo consultaba get_balance
+            before_each=strategy.balance_ledger.mark_dirty
+        ),
+        "Actual (balance local + buy)": measure(
+            strategy, current_path, args.orders,
+            # La reconciliación vencida la hace check_stop_loss, fuera de la orden
+            before_each=strategy.balance_ledger.mark_dirty
+        ),
+    }
+    strategy.executor.shutdown()
+
+    print(f"\n⚡ LATENCIA SEÑAL→ACK ({args.orders} órdenes por camino, RTT simulado {args.rtt:.0f} ms)")
+    print("=" * 60)
+    for label, latencies in results.items():
+        median = latencies[len(latencies) // 2]
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"{label:32} mediana {median:7.1f} ms | p95 {p95:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
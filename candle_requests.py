@@ -0,0 +1,107 @@
+# candle_requests.py
+# Descargas de velas con respuesta propia por petición (sin lock global)
+
+import json
+import itertools
+import threading
+import logging
+from concurrent.futures import Future
+
+
+class CandleRequests:
+    """
+    Peticiones get-candles que pueden solaparse
+
+    get_candles de la librería guarda la respuesta en un único atributo
+    (api.candles.candles_data), así que dos descargas simultáneas se pisan y
+    hay que serializarlas. Aquí cada petición lleva su propio request_id y
+    el mensaje "candles" que lo devuelve completa el Future de esa petición:
+    una descarga lenta ya no retrasa a las demás.
+
+    Hay que llamar a install() tras cada conexión (la librería crea un
+    websocket nuevo al reconectar). Si no se puede enganchar, installed es
+    False y hay que usar get_candles con un lock.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._api = None
+        self.installed = False
+
+    def install(self, api):
+        """
+        Enganchar el websocket de la librería para recibir las respuestas
+
+        Returns:
+            bool: True si se pudo enganchar
+        """
+        wss = getattr(getattr(api, "websocket_client", None), "wss", None)
+        original = getattr(wss, "on_message", None)
+        if original is None or not hasattr(api, "send_websocket_request"):
+            self.installed = False
+            return False
+
+        if not getattr(original, "_candle_hook", False):
+            def hooked_on_message(ws, message):
+                self._on_message(message)
+                original(ws, message)
+
+            hooked_on_message._candle_hook = True
+            wss.on_message = hooked_on_message
+
+        self._api = api
+        self.installed = True
+        return True
+
+    def _on_message(self, message):
+        # Solo se analizan los mensajes de velas; el resto pasa sin tocarse
+        if '"candles"' not in str(message):
+            return
+        try:
+            data = json.loads(str(message))
+        except ValueError:
+            return
+        if data.get("name") != "candles":
+            return
+        with self._lock:
+            future = self._pending.pop(str(data.get("request_id")), None)
+        if future is not None and not future.done():
+            future.set_result((data.get("msg") or {}).get("candles"))
+
+    def fetch(self, active_id, interval, count, endtime, timeout):
+        """
+        Pedir velas y esperar su respuesta como máximo `timeout` segundos
+
+        Returns:
+            list: Velas recibidas o None si no llegaron a tiempo
+        """
+        request_id = f"candles-{next(self._ids)}"
+        future = Future()
+        with self._lock:
+            self._pending[request_id] = future
+        try:
+            # Mismo mensaje que envía GetCandles de la librería, con request_id propio
+            self._api.send_websocket_request("sendMessage", {
+                "name": "get-candles",
+                "version": "2.0",
+                "body": {
+                    "active_id": int(active_id),
+                    "split_normalization": True,
+                    "size": interval,
+                    "to": int(endtime),
+                    "count": count,
+                }
+            }, request_id)
+            return future.result(timeout=timeout)
+        except Exception as e:
+            logging.getLogger(__name__).debug(f"Velas {request_id} no recibidas: {str(e)}")
+            return None
+        finally:
+            with self._lock:
+                self._pending.pop(request_id, None)
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
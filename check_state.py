@@ -1,23 +1,20 @@
 #!/usr/bin/env python3
 # check_state.py - Verificar y opcionalmente limpiar el estado guardado
 
-import json
-import os
 from datetime import datetime
 
+from config import STATE_FILE, JOURNAL_FILE
+from journal import read_state, write_state
+
 def check_and_clean_state():
     """Verificar el estado guardado y limpiarlo si es necesario"""
     
-    state_file = "strategy_state.json"
-    
-    if not os.path.exists(state_file):
-        print("❌ No se encontró archivo de estado")
-        return
-    
     try:
-        # Cargar estado
-        with open(state_file, 'r') as f:
-            state = json.load(f)
+        # Cargar estado (instantánea + eventos del diario posteriores)
+        state = read_state(STATE_FILE, JOURNAL_FILE)
+        if state is None:
+            print("❌ No se encontró archivo de estado")
+            return
         
         print("📊 ESTADO ACTUAL:")
         print("=" * 60)
@@ -61,9 +58,8 @@ def check_and_clean_state():
                     state['last_date'] = current_date.isoformat()
                     state['timestamp'] = datetime.now().isoformat()
                     
-                    # Guardar estado limpio
-                    with open(state_file, 'w') as f:
-                        json.dump(state, f, indent=4)
+                    # Guardar estado limpio (compacta el diario: no se reaplica al arrancar)
+                    write_state(STATE_FILE, JOURNAL_FILE, state)
                     
                     print("\n✅ Estado limpiado exitosamente")
                     print("   - Pérdidas consecutivas: reseteadas")
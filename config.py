@@ -19,6 +19,13 @@ OVERBOUGHT_LEVEL = 65  # Nivel para señal CALL (invertido)
 # Configuración de opciones binarias
 EXPIRY_MINUTES = 1  # Tiempo de expiración en minutos
 CANDLE_TIMEFRAME = 300  # 5 minutos en segundos (para RSI)
+CANDLE_BUFFER_SIZE = 100  # Velas guardadas por activo (siembra inicial)
+
+# Alimentación de velas
+# - "POLL": pedir las velas nuevas con get_candles en cada ciclo
+# - "STREAM": suscribirse a las velas en tiempo real y evaluar solo si cambian
+CANDLE_FEED_MODE = "POLL"
+STREAM_MAX_CANDLES = 10  # Velas que conserva la librería por suscripción
 
 # Gestión de riesgo - Stop Loss
 ABSOLUTE_STOP_LOSS_PERCENT = 0.75  # 75% de pérdida del capital inicial
@@ -29,9 +36,24 @@ POSITION_SIZE_PERCENT = 0.05  # 5% del capital disponible
 MIN_POSITION_SIZE = 1      # Mínimo $5,000
 MAX_POSITION_SIZE = 10     # Máximo $10,000
 
+# Balance local (evita llamadas a get_balance en el camino de la señal)
+BALANCE_RECONCILE_INTERVAL = 300  # Segundos entre reconciliaciones con el bróker
+BALANCE_DRIFT_THRESHOLD = 0.5  # Diferencia ($) a partir de la cual se avisa
+
 # Control de operaciones
 MIN_TIME_BETWEEN_SIGNALS = 60  # Minutos entre señales del mismo par (1 hora)
 MAX_CONSECUTIVE_LOSSES = 999   # Pérdidas consecutivas antes de bloquear el par (prácticamente desactivado)
+SETTLEMENT_GRACE = 15  # Segundos tras la expiración antes de verificar el resultado
+SETTLEMENT_BACKOFF = 5  # Espera inicial entre reintentos de liquidación (se duplica)
+SETTLEMENT_MAX_BACKOFF = 30  # Espera máxima entre reintentos de liquidación
+
+# Planificador de señales
+# - "FIXED": ciclo fijo de 15 segundos evaluando todos los pares (también dentro de la vela)
+# - "BAR_CLOSE": dormir hasta el próximo cierre de vela, fin de espera o expiración
+#   (deja de evaluar el RSI provisional dentro de la vela)
+SIGNAL_SCHEDULER = "FIXED"
+BAR_CLOSE_DELAY = 2  # Segundos tras el cierre de vela antes de evaluar
+MAX_IDLE_SLEEP = 60  # Máximo de segundos dormido (conexión, stop loss, nuevo día)
 
 # Configuración de activos
 # Los sufijos más comunes en IQ Option son:
@@ -47,18 +69,67 @@ STRATEGY_MODE = "CALL_PUT"  # Estrategia original con CALL y PUT
 # Configuración de logging
 LOG_LEVEL = "INFO"
 LOG_FILE = "iqoption_strategy.log"
+LOG_MAX_BYTES = 10 * 1024 * 1024  # Rotar el log al alcanzar este tamaño
+LOG_BACKUP_COUNT = 5  # Archivos rotados que se conservan
+LOG_COMPRESS = True  # Comprimir con gzip los archivos rotados
 
 # Configuración de caché y timeouts
 OPCODE_CACHE_TTL = 3600  # 1 hora
 ASSET_STATUS_CACHE_TTL = 300  # 5 minutos
+ASSET_REFRESH_MARGIN = 30  # Refrescar el catálogo de activos N segundos antes de que venza
+USE_SCHEDULE_CALENDAR = True  # Deducir apertura/cierre de activos de sus horarios (get_all_init_v2)
+SCHEDULE_REFRESH_INTERVAL = 3600  # Con calendario: segundos entre descargas de horarios
 API_TIMEOUT = 10  # Timeout para llamadas API en segundos
+API_MAX_WORKERS = 10  # Hilos para llamadas API bloqueantes
+PAIR_WORKERS = 8  # Pares evaluados en paralelo
+PAIR_DEADLINE = 12  # Plazo (segundos) para evaluar todos los pares de un ciclo
 MAX_FREEZE_COUNT = 5  # Número máximo de timeouts antes de reiniciar
+# Hilos por endpoint: una llamada colgada solo bloquea su propio carril
+API_LANES = {
+    "candles": 4,
+    "buy": 2,
+    "balance": 1,
+    "open_time": 1,
+    "orders": 3,
+    "default": 2,
+}
+# Límite de tasa por endpoint: (llamadas por segundo, ráfaga máxima)
+API_RATE_LIMITS = {
+    "candles": (10, 20),
+    "buy": (2, 4),
+    "balance": (2, 4),
+    "open_time": (1, 3),
+    "orders": (5, 10),
+    "default": (5, 10),
+}
+# Segundos durante los que se reutiliza un resultado idéntico (0 = solo fusionar en curso)
+API_REUSE_WINDOW = {
+    "open_time": 10,
+    "balance": 1,
+}
+
+# Motor de ejecución
+# - "THREADED": bucle principal con hilos (MultiCurrencyRSIBinaryOptionsStrategy)
+# - "ASYNC": event loop de asyncio (AsyncRSIStrategy)
+ENGINE = "THREADED"
+ASYNC_STATE_SAVE_INTERVAL = 300  # Segundos entre guardados de estado en el motor asyncio
+MONITOR_ENABLED = True  # Endpoint de monitoreo (solo motor asyncio, requiere fastapi/uvicorn)
+MONITOR_HOST = "127.0.0.1"
+MONITOR_PORT = 8080
 
 # Configuración de guardado de estado
 STATE_FILE = "strategy_state.json"
-SAVE_STATE_INTERVAL = 30  # Guardar estado cada N ciclos
+JOURNAL_FILE = "strategy_journal.jsonl"  # Eventos desde la última instantánea de estado
+JOURNAL_FSYNC = False  # fsync tras cada evento (más seguro ante cortes de luz, más lento)
+TRADE_LEDGER_FILE = "trades.db"  # Historial de operaciones (SQLite)
+TRADE_LEDGER_BATCH_INTERVAL = 1.0  # Segundos máximos que una escritura espera en la cola del ledger
+CATALOG_FILE = "asset_catalog.json"  # Opcodes y variante elegida por par (arranque en caliente)
+CATALOG_MAX_AGE = 6 * 3600  # Antigüedad máxima del catálogo guardado (segundos)
+SAVE_STATE_INTERVAL = 30  # Instantánea de estado (y compactación del diario) cada N ciclos
+STATE_WRITE_INTERVAL = 5  # Segundos mínimos entre escrituras del hilo de guardado
 
 # Configuración de debugging (NUEVO)
 USE_POSITION_HISTORY = True  # Usar historial de posiciones en lugar de check_win_v3
 POSITION_HISTORY_TIMEOUT = 5  # Timeout para consultas de historial
 DEBUG_ORDER_RESULTS = True  # Logging detallado de resultados de órdenes
+RECOVERY_GIVE_UP = 1800  # Segundos tras la expiración para dejar de buscar una orden restaurada (sin contarla como pérdida)
@@ -1,155 +1,222 @@
 #!/usr/bin/env python3
 # fix_stats.py - Corregir estadísticas si hay errores en el conteo
 
-import json
-import os
+from contextlib import closing, nullcontext
 from datetime import datetime
 
-def fix_statistics():
-    """Corregir estadísticas manualmente"""
-    
-    state_file = "strategy_state.json"
+from config import STATE_FILE, JOURNAL_FILE, TRADE_LEDGER_FILE
+from journal import read_state, write_state
+from trade_ledger import open_ledger_readonly, correct_settlement
+
+DEFAULT_TRADE_SIZE = 20000  # Tamaño supuesto si la orden no está en el ledger
+PAYOUT_RATE = 0.8  # Ganancia supuesta de una victoria (80%)
+
+def show_ledger_stats(conn):
+    """Mostrar estadísticas por par según el ledger de operaciones"""
+    rows = conn.execute(
+        "SELECT pair, SUM(result = 'win') AS wins, SUM(result = 'loss') AS losses, "
+        "SUM(result = 'tie') AS ties, COALESCE(SUM(profit), 0) AS profit "
+        "FROM trades WHERE result IS NOT NULL GROUP BY pair ORDER BY pair"
+    ).fetchall()
     
-    if not os.path.exists(state_file):
-        print("❌ No se encontró archivo de estado")
+    print("\n📒 SEGÚN EL LEDGER DE OPERACIONES:")
+    print("=" * 60)
+    if not rows:
+        print("  (sin operaciones liquidadas)")
         return
+    for row in rows:
+        print(f"  {row['pair']}: {row['wins']}W / {row['losses']}L / {row['ties']}T | ${row['profit']:,.2f}")
+    print(f"Beneficio total: ${sum(row['profit'] for row in rows):,.2f}")
+
+def ledger_trade(conn, order_id, pair):
+    """Fila de la operación `order_id` en el ledger (None si no está registrada)"""
+    if conn is None:
+        return None
+    if order_id is None:
+        print(f"⚠️ Sin ID de orden: el ledger no se corrige y se usa un tamaño de ${DEFAULT_TRADE_SIZE:,.2f}")
+        return None
+    row = conn.execute(
+        "SELECT pair, size, result, profit FROM trades WHERE order_id = ?", (str(order_id),)
+    ).fetchone()
+    if row is None or not row["size"]:
+        print(f"⚠️ Orden {order_id} no encontrada en el ledger, usando ${DEFAULT_TRADE_SIZE:,.2f}")
+        return None
+    if row["pair"] != pair:
+        print(f"⚠️ La orden {order_id} es de {row['pair']}, no de {pair}")
+    return row
+
+def settlement_amounts(result, trade_size):
+    """(monto devuelto, beneficio) de una operación según su resultado"""
+    if result == 'win':
+        return trade_size * (1 + PAYOUT_RATE), trade_size * PAYOUT_RATE
+    if result == 'tie':
+        return trade_size, 0.0
+    return 0.0, -trade_size
+
+def fix_statistics():
+    """Corregir estadísticas manualmente"""
     
     try:
-        # Cargar estado
-        with open(state_file, 'r') as f:
-            state = json.load(f)
-        
-        print("📊 ESTADÍSTICAS ACTUALES:")
-        print("=" * 60)
-        
-        # Mostrar estadísticas actuales
-        wins = state.get('wins', {})
-        losses = state.get('losses', {})
-        ties = state.get('ties', {})
+        # Cargar estado (instantánea + eventos del diario posteriores)
+        state = read_state(STATE_FILE, JOURNAL_FILE)
+        if state is None:
+            print("❌ No se encontró archivo de estado")
+            return
         
-        total_wins = sum(wins.values())
-        total_losses = sum(losses.values())
-        total_ties = sum(ties.values())
-        
-        print(f"Total victorias: {total_wins}")
-        print(f"Total derrotas: {total_losses}")
-        print(f"Total empates: {total_ties}")
-        print(f"Total operaciones: {total_wins + total_losses + total_ties}")
-        print(f"Beneficio total: ${state.get('total_profit', 0):,.2f}")
-        
-        print("\nPor par:")
-        all_pairs = set(list(wins.keys()) + list(losses.keys()) + list(ties.keys()))
-        for pair in sorted(all_pairs):
-            w = wins.get(pair, 0)
-            l = losses.get(pair, 0)
-            t = ties.get(pair, 0)
-            if w + l + t > 0:
-                print(f"  {pair}: {w}W / {l}L / {t}T")
-        
-        # Preguntar si quiere hacer correcciones
-        print("\n" + "=" * 60)
-        response = input("\n¿Deseas hacer correcciones? (s/n): ")
-        
-        if response.lower() == 's':
-            print("\nEjemplo de corrección:")
-            print("  - Para cambiar una pérdida a empate: GBPUSD loss->tie")
-            print("  - Para cambiar un empate a victoria: EURUSD tie->win")
-            print("  - Para salir: exit")
-            
-            while True:
-                correction = input("\nIngresa corrección (o 'exit' para salir): ").strip()
-                
-                if correction.lower() == 'exit':
-                    break
-                
-                try:
-                    # Parsear la corrección
-                    parts = correction.split()
-                    if len(parts) != 2:
-                        print("❌ Formato incorrecto. Usa: PAR from->to")
-                        continue
-                    
-                    pair = parts[0].upper()
-                    change = parts[1].lower()
-                    
-                    if '->' not in change:
-                        print("❌ Usa el formato: loss->tie, win->loss, etc.")
-                        continue
-                    
-                    from_type, to_type = change.split('->')
-                    
-                    # Validar tipos
-                    valid_types = ['win', 'loss', 'tie']
-                    if from_type not in valid_types or to_type not in valid_types:
-                        print("❌ Tipos válidos: win, loss, tie")
-                        continue
-                    
-                    # Aplicar corrección
-                    made_change = False
-                    
-                    # Decrementar el contador origen
-                    if from_type == 'win' and pair in wins and wins[pair] > 0:
-                        wins[pair] -= 1
-                        made_change = True
-                    elif from_type == 'loss' and pair in losses and losses[pair] > 0:
-                        losses[pair] -= 1
-                        made_change = True
-                        # Ajustar profit (recuperar la pérdida)
-                        state['total_profit'] = state.get('total_profit', 0) + 20000
-                    elif from_type == 'tie' and pair in ties and ties[pair] > 0:
-                        ties[pair] -= 1
-                        made_change = True
-                    
-                    if not made_change:
-                        print(f"❌ No hay {from_type} para {pair}")
-                        continue
-                    
-                    # Incrementar el contador destino
-                    if to_type == 'win':
-                        if pair not in wins:
-                            wins[pair] = 0
-                        wins[pair] += 1
-                        # Ajustar profit (ganancia del 80%)
-                        state['total_profit'] = state.get('total_profit', 0) + 16000  # 80% de 20k
-                    elif to_type == 'loss':
-                        if pair not in losses:
-                            losses[pair] = 0
-                        losses[pair] += 1
-                        # Ajustar profit (pérdida)
-                        state['total_profit'] = state.get('total_profit', 0) - 20000
-                    elif to_type == 'tie':
-                        if pair not in ties:
-                            ties[pair] = 0
-                        ties[pair] += 1
-                    
-                    print(f"✅ Corregido: {pair} {from_type} → {to_type}")
-                    
-                except Exception as e:
-                    print(f"❌ Error: {str(e)}")
-            
-            # Actualizar el estado
-            state['wins'] = wins
-            state['losses'] = losses
-            state['ties'] = ties
-            state['timestamp'] = datetime.now().isoformat()
-            
-            # Guardar cambios
-            with open(state_file, 'w') as f:
-                json.dump(state, f, indent=4)
+        # Historial real de operaciones (None si todavía no existe)
+        ledger_conn = open_ledger_readonly(TRADE_LEDGER_FILE)
+        with closing(ledger_conn) if ledger_conn is not None else nullcontext() as ledger:
+            print("📊 ESTADÍSTICAS ACTUALES:")
+            print("=" * 60)
             
-            print("\n✅ Estadísticas actualizadas")
+            # Mostrar estadísticas actuales
+            wins = state.get('wins', {})
+            losses = state.get('losses', {})
+            ties = state.get('ties', {})
             
-            # Mostrar nuevo resumen
-            print("\n📊 NUEVAS ESTADÍSTICAS:")
-            print("=" * 60)
             total_wins = sum(wins.values())
             total_losses = sum(losses.values())
             total_ties = sum(ties.values())
+            
             print(f"Total victorias: {total_wins}")
             print(f"Total derrotas: {total_losses}")
             print(f"Total empates: {total_ties}")
+            print(f"Total operaciones: {total_wins + total_losses + total_ties}")
             print(f"Beneficio total: ${state.get('total_profit', 0):,.2f}")
-        
+            
+            print("\nPor par:")
+            all_pairs = set(list(wins.keys()) + list(losses.keys()) + list(ties.keys()))
+            for pair in sorted(all_pairs):
+                w = wins.get(pair, 0)
+                l = losses.get(pair, 0)
+                t = ties.get(pair, 0)
+                if w + l + t > 0:
+                    print(f"  {pair}: {w}W / {l}L / {t}T")
+            
+            # Contrastar con el historial real de operaciones
+            if ledger is not None:
+                show_ledger_stats(ledger)
+            
+            # Preguntar si quiere hacer correcciones
+            print("\n" + "=" * 60)
+            response = input("\n¿Deseas hacer correcciones? (s/n): ")
+            
+            if response.lower() == 's':
+                print("\nEjemplo de corrección:")
+                print("  - Para cambiar una pérdida a empate: GBPUSD loss->tie 123456789")
+                print("  - Para cambiar un empate a victoria: EURUSD tie->win 123456789")
+                print("  (el último dato es el ID de la orden; sin él no se corrige el ledger y se usa un tamaño de $20,000)")
+                print("  - Para salir: exit")
+                
+                ledger_corrections = []
+                while True:
+                    correction = input("\nIngresa corrección (o 'exit' para salir): ").strip()
+                    
+                    if correction.lower() == 'exit':
+                        break
+                    
+                    try:
+                        # Parsear la corrección
+                        parts = correction.split()
+                        if len(parts) not in (2, 3):
+                            print("❌ Formato incorrecto. Usa: PAR from->to [ID_ORDEN]")
+                            continue
+                        order_id = parts[2] if len(parts) == 3 else None
+                        
+                        pair = parts[0].upper()
+                        change = parts[1].lower()
+                        
+                        if '->' not in change:
+                            print("❌ Usa el formato: loss->tie, win->loss, etc.")
+                            continue
+                        
+                        from_type, to_type = change.split('->')
+                        
+                        # Validar tipos
+                        valid_types = ['win', 'loss', 'tie']
+                        if from_type not in valid_types or to_type not in valid_types:
+                            print("❌ Tipos válidos: win, loss, tie")
+                            continue
+                        
+                        # Aplicar corrección (con el tamaño real de la operación si está en el ledger)
+                        made_change = False
+                        row = ledger_trade(ledger, order_id, pair)
+                        trade_size = row["size"] if row is not None else DEFAULT_TRADE_SIZE
+                        if row is not None and row["result"] not in (None, from_type):
+                            print(f"⚠️ En el ledger la orden {order_id} figura como {row['result']}")
+                        
+                        # Decrementar el contador origen
+                        if from_type == 'win' and pair in wins and wins[pair] > 0:
+                            wins[pair] -= 1
+                            made_change = True
+                        elif from_type == 'loss' and pair in losses and losses[pair] > 0:
+                            losses[pair] -= 1
+                            made_change = True
+                        elif from_type == 'tie' and pair in ties and ties[pair] > 0:
+                            ties[pair] -= 1
+                            made_change = True
+                        
+                        if not made_change:
+                            print(f"❌ No hay {from_type} para {pair}")
+                            continue
+                        
+                        # Incrementar el contador destino
+                        if to_type == 'win':
+                            if pair not in wins:
+                                wins[pair] = 0
+                            wins[pair] += 1
+                        elif to_type == 'loss':
+                            if pair not in losses:
+                                losses[pair] = 0
+                            losses[pair] += 1
+                        elif to_type == 'tie':
+                            if pair not in ties:
+                                ties[pair] = 0
+                            ties[pair] += 1
+                        
+                        # Ajustar profit: beneficio nuevo menos el registrado (o el supuesto)
+                        payout, profit = settlement_amounts(to_type, trade_size)
+                        if row is not None and row["profit"] is not None:
+                            previous_profit = row["profit"]
+                        else:
+                            previous_profit = settlement_amounts(from_type, trade_size)[1]
+                        state['total_profit'] = state.get('total_profit', 0) + profit - previous_profit
+                        
+                        # El ledger se corrige por ID de orden al guardar
+                        if row is not None:
+                            ledger_corrections.append((order_id, to_type, payout, profit))
+                        
+                        print(f"✅ Corregido: {pair} {from_type} → {to_type}")
+                        
+                    except Exception as e:
+                        print(f"❌ Error: {str(e)}")
+                
+                # Actualizar el estado
+                state['wins'] = wins
+                state['losses'] = losses
+                state['ties'] = ties
+                state['timestamp'] = datetime.now().isoformat()
+                
+                # Guardar cambios (compacta el diario: no se reaplica al arrancar)
+                write_state(STATE_FILE, JOURNAL_FILE, state)
+                for order_id, result, payout, profit in ledger_corrections:
+                    correct_settlement(TRADE_LEDGER_FILE, order_id, result, payout, profit)
+                if ledger_corrections:
+                    print(f"✅ {len(ledger_corrections)} operaciones corregidas en el ledger")
+                
+                print("\n✅ Estadísticas actualizadas")
+                
+                # Mostrar nuevo resumen
+                print("\n📊 NUEVAS ESTADÍSTICAS:")
+                print("=" * 60)
+                total_wins = sum(wins.values())
+                total_losses = sum(losses.values())
+                total_ties = sum(ties.values())
+                print(f"Total victorias: {total_wins}")
+                print(f"Total derrotas: {total_losses}")
+                print(f"Total empates: {total_ties}")
+                print(f"Beneficio total: ${state.get('total_profit', 0):,.2f}")
+            
     except Exception as e:
         print(f"❌ Error: {str(e)}")
 
@@ -0,0 +1,194 @@
+# journal.py
+# Diario de eventos (append-only) para reconstruir el estado tras un reinicio
+
+import os
+import json
+import time
+import threading
+import logging
+
+
+class TradeJournal:
+    """
+    Diario de eventos de la estrategia en formato JSON por línea
+
+    Cada evento (orden colocada, orden liquidada, cambio de día, stop loss)
+    se añade al final del archivo con un número de secuencia creciente, así
+    que guardar un evento cuesta una escritura corta. Al compactar, se
+    descartan los eventos ya incluidos en la última instantánea del estado.
+
+    Una línea cortada por un corte a mitad de escritura se ignora al leer.
+    """
+
+    def __init__(self, path, fsync=False):
+        self.path = path
+        self.fsync = fsync
+        self.seq = 0
+        self._lock = threading.Lock()
+        self._file = None
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, "a+", encoding="utf-8")
+            # Cerrar una línea cortada para que el próximo evento empiece en una nueva
+            if self._file.tell() > 0:
+                self._file.seek(self._file.tell() - 1)
+                if self._file.read(1) != "\n":
+                    self._file.write("\n")
+        return self._file
+
+    def append(self, event, data):
+        """
+        Añadir un evento al diario
+
+        Returns:
+            int: Número de secuencia asignado
+        """
+        with self._lock:
+            self.seq += 1
+            record = {"seq": self.seq, "event": event, "ts": time.time(), "data": data}
+            f = self._open()
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+            return self.seq
+
+    def read(self, after_seq=0):
+        """
+        Leer los eventos con secuencia mayor que `after_seq`
+
+        Returns:
+            list: Registros {"seq", "event", "ts", "data"} en orden
+        """
+        records = []
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logging.getLogger(__name__).warning("⚠️ Línea incompleta en el diario, ignorada")
+                    continue
+                if record.get("seq", 0) > after_seq:
+                    records.append(record)
+        return records
+
+    def resume(self, after_seq=0):
+        """Continuar la numeración tras la instantánea y el diario existentes"""
+        records = self.read(after_seq)
+        with self._lock:
+            self.seq = max([after_seq] + [record["seq"] for record in records])
+        return records
+
+    def compact(self, upto_seq):
+        """Descartar los eventos ya incluidos en una instantánea (seq <= upto_seq)"""
+        with self._lock:
+            remaining = self.read(upto_seq)
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for record in remaining:
+                    f.write(json.dumps(record, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def fold_events(state, records):
+    """
+    Aplicar los eventos del diario sobre una instantánea del estado (el JSON
+    que escribe save_state)
+
+    Los eventos de liquidación guardan valores resultantes, no incrementos:
+    aplicar dos veces el mismo evento da el mismo estado.
+
+    Returns:
+        dict: El mismo estado, con journal_seq en el último evento aplicado
+    """
+    active_options = state.setdefault("active_options", {})
+    for record in records:
+        event, data = record["event"], record["data"]
+
+        if event == "order_placed":
+            pair, order = data["pair"], data["order"]
+            orders = active_options.setdefault(pair, [])
+            if all(existing["id"] != order["id"] for existing in orders):
+                orders.append(order)
+            state.setdefault("last_signal_time", {})[pair] = order["entry_time"]
+
+        elif event == "order_settled":
+            pair = data["pair"]
+            remaining = [order for order in active_options.get(pair, []) if order["id"] != data["order_id"]]
+            if remaining:
+                active_options[pair] = remaining
+            else:
+                active_options.pop(pair, None)
+            for key in ("wins", "losses", "ties", "consecutive_losses"):
+                state.setdefault(key, {})[pair] = data[key]
+            state["total_profit"] = data["total_profit"]
+            state["daily_profit"] = data["daily_profit"]
+
+        elif event == "day_rollover":
+            # on_new_day reinicia las pérdidas consecutivas y el beneficio diario
+            state["consecutive_losses"] = {pair: 0 for pair in state.get("consecutive_losses", {})}
+            state["daily_profit"] = 0
+            state["monthly_profits"] = dict(data["monthly_profits"])
+            state["last_date"] = data["last_date"]
+
+        elif event == "stop_loss":
+            for key in ("absolute_stop_loss_activated", "monthly_stop_loss", "stop_loss_triggered_month",
+                        "current_month", "monthly_starting_capital", "min_capital"):
+                state[key] = data[key]
+
+        state["journal_seq"] = max(state.get("journal_seq", 0), record["seq"])
+    return state
+
+
+def read_state(state_file, journal_file):
+    """
+    Leer el estado completo fuera de la estrategia: instantánea más los
+    eventos del diario posteriores a ella
+
+    Returns:
+        dict: Estado en formato de instantánea, o None si no hay ninguno
+    """
+    state = None
+    if os.path.exists(state_file):
+        with open(state_file, "r", encoding="utf-8") as f:
+            state = json.load(f)
+
+    records = TradeJournal(journal_file).read(state.get("journal_seq", 0) if state else 0)
+    if state is None and not records:
+        return None
+    return fold_events(state or {}, records)
+
+
+def write_state(state_file, journal_file, state):
+    """
+    Guardar un estado modificado fuera de la estrategia y compactar el diario
+
+    Los eventos hasta el journal_seq del estado ya están incluidos en él: se
+    eliminan del diario para que al arrancar no se reapliquen encima de la
+    corrección. Usar solo con la estrategia detenida.
+    """
+    tmp_path = f"{state_file}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, state_file)
+
+    if os.path.exists(journal_file):
+        journal = TradeJournal(journal_file)
+        journal.compact(state.get("journal_seq", 0))
+        journal.close()
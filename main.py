@@ -6,9 +6,9 @@ import argparse
 import logging
 from datetime import datetime
 
-from config import IQ_EMAIL, IQ_PASSWORD, ACCOUNT_TYPE, LOG_FILE
+from config import IQ_EMAIL, IQ_PASSWORD, ACCOUNT_TYPE, LOG_FILE, LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_COMPRESS, ENGINE
 from strategy import MultiCurrencyRSIBinaryOptionsStrategy
-from utils import setup_logger
+from utils import setup_logger, shutdown_logging
 
 def main():
     """Función principal para ejecutar la estrategia"""
@@ -19,6 +19,8 @@ def main():
     parser.add_argument('--password', type=str, help='Contraseña de IQ Option (sobrescribe config)')
     parser.add_argument('--account', type=str, choices=['PRACTICE', 'REAL'], 
                        default=ACCOUNT_TYPE, help='Tipo de cuenta a usar')
+    parser.add_argument('--engine', type=str.upper, choices=['THREADED', 'ASYNC'],
+                       default=ENGINE, help='Motor de ejecución (hilos o asyncio)')
     parser.add_argument('--test', action='store_true', help='Ejecutar en modo prueba')
     parser.add_argument('--debug-assets', action='store_true', 
                        help='Mostrar todos los activos forex disponibles y salir')
@@ -41,7 +43,7 @@ def main():
         sys.exit(1)
     
     # Configurar logger principal
-    logger = setup_logger('main', LOG_FILE)
+    logger = setup_logger('main', LOG_FILE, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT, compress=LOG_COMPRESS)
     
     # Banner de inicio
     logger.info("=" * 60)
@@ -58,8 +60,13 @@ def main():
     
     try:
         # Crear e inicializar la estrategia
-        logger.info("🚀 Inicializando estrategia...")
-        strategy = MultiCurrencyRSIBinaryOptionsStrategy(
+        logger.info(f"🚀 Inicializando estrategia (motor {args.engine})...")
+        if args.engine == 'ASYNC':
+            from async_strategy import AsyncRSIStrategy
+            strategy_class = AsyncRSIStrategy
+        else:
+            strategy_class = MultiCurrencyRSIBinaryOptionsStrategy
+        strategy = strategy_class(
             email=email,
             password=password,
             account_type=account_type
@@ -117,6 +124,7 @@ def main():
         sys.exit(1)
     finally:
         logger.info("👋 Programa finalizado")
+        shutdown_logging()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
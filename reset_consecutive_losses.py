@@ -1,22 +1,19 @@
 #!/usr/bin/env python3
 # reset_consecutive_losses.py - Resetear pérdidas consecutivas rápidamente
 
-import json
-import os
+from config import STATE_FILE, JOURNAL_FILE
+from journal import read_state, write_state
 
-# Cargar estado
-if os.path.exists("strategy_state.json"):
-    with open("strategy_state.json", 'r') as f:
-        state = json.load(f)
-    
+# Cargar estado (instantánea + diario)
+state = read_state(STATE_FILE, JOURNAL_FILE)
+if state is not None:
     # Resetear pérdidas consecutivas y bloqueos
     state['consecutive_losses'] = {}
     state['daily_lockouts'] = {}
     
-    # Guardar
-    with open("strategy_state.json", 'w') as f:
-        json.dump(state, f, indent=4)
+    # Guardar (y compactar el diario para que no se reaplique al arrancar)
+    write_state(STATE_FILE, JOURNAL_FILE, state)
     
     print("✅ Pérdidas consecutivas y bloqueos reseteados")
 else:
-    print("❌ No se encontró archivo de estado")
\ No newline at end of file
+    print("❌ No se encontró archivo de estado")
@@ -2,9 +2,12 @@
 # reset_strategy.py - Resetear estado para la nueva estrategia con lógica invertida
 
 import os
-import json
+import shutil
 from datetime import datetime
 
+from config import STATE_FILE, JOURNAL_FILE, TRADE_LEDGER_FILE
+from journal import read_state
+
 def reset_strategy():
     """Resetear el estado para comenzar con la nueva estrategia"""
     
@@ -12,29 +15,34 @@ def reset_strategy():
     print("   RESET PARA NUEVA ESTRATEGIA RSI INVERTIDA")
     print("=" * 60)
     
-    state_file = "strategy_state.json"
-    backup_file = f"strategy_state_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    # El diario guarda los eventos posteriores a la instantánea y el ledger
+    # el historial por par del resumen: se resetean juntos
+    state_files = [
+        (STATE_FILE, f"strategy_state_backup_{stamp}.json"),
+        (JOURNAL_FILE, f"strategy_journal_backup_{stamp}.jsonl"),
+    ] + [
+        (f"{TRADE_LEDGER_FILE}{suffix}", f"trades_backup_{stamp}.db{suffix}")
+        for suffix in ("", "-wal", "-shm")
+    ]
     
     print("\n⚡ CAMBIOS IMPORTANTES:")
     print("- Lógica INVERTIDA: PUT en sobreventa (RSI≤35)")
     print("- Lógica INVERTIDA: CALL en sobrecompra (RSI≥65)")
     print("- Esta es una estrategia completamente diferente")
     
-    if os.path.exists(state_file):
-        print(f"\n📁 Archivo de estado encontrado: {state_file}")
+    existing = [(path, backup) for path, backup in state_files if os.path.exists(path)]
+    if existing:
+        print(f"\n📁 Archivo de estado encontrado: {', '.join(path for path, _ in existing)}")
         
         # Hacer backup
         try:
-            with open(state_file, 'r') as f:
-                state_data = f.read()
-            
-            with open(backup_file, 'w') as f:
-                f.write(state_data)
-            
-            print(f"✅ Backup creado: {backup_file}")
+            for path, backup in existing:
+                shutil.copy2(path, backup)
+                print(f"✅ Backup creado: {backup}")
             
-            # Mostrar estadísticas actuales
-            state = json.loads(state_data)
+            # Mostrar estadísticas actuales (instantánea + diario)
+            state = read_state(STATE_FILE, JOURNAL_FILE) or {}
             total_wins = sum(state.get('wins', {}).values())
             total_losses = sum(state.get('losses', {}).values())
             total_profit = state.get('total_profit', 0)
@@ -52,7 +60,8 @@ def reset_strategy():
         
         if response.lower() == 's':
             try:
-                os.remove(state_file)
+                for path, _ in existing:
+                    os.remove(path)
                 print(f"\n✅ Estado reseteado exitosamente")
                 print("📌 La estrategia comenzará desde cero con la lógica invertida")
                 
@@ -0,0 +1,151 @@
+# scheduling.py
+# Estructuras de planificación para la estrategia (índices por tiempo)
+
+import heapq
+
+
+class EligibilityIndex:
+    """
+    Índice de elegibilidad de pares basado en un heap
+
+    Guarda para cada par el momento (epoch) en que puede volver a generar
+    una señal. Los pares bloqueados (con una orden activa) no están en el
+    heap, así que el coste por ciclo depende de cuántos pares están listos
+    y no de cuántos hay configurados.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._due_at = {}  # par -> epoch, o None si está bloqueado
+
+    def __contains__(self, pair):
+        return pair in self._due_at
+
+    def __len__(self):
+        return len(self._due_at)
+
+    def pairs(self):
+        """Pares presentes en el índice (bloqueados o programados)"""
+        return list(self._due_at)
+
+    def schedule(self, pair, when):
+        """Programar el par para que sea elegible a partir de `when`"""
+        self._due_at[pair] = when
+        heapq.heappush(self._heap, (when, pair))
+        self._compact_if_needed()
+
+    def block(self, pair):
+        """Bloquear el par hasta que se vuelva a programar (ej: orden activa)"""
+        self._due_at[pair] = None
+
+    def remove(self, pair):
+        """Quitar el par del índice"""
+        self._due_at.pop(pair, None)
+
+    def is_blocked(self, pair):
+        return pair in self._due_at and self._due_at[pair] is None
+
+    def due_time(self, pair):
+        """Momento en que el par será elegible (None si bloqueado o desconocido)"""
+        return self._due_at.get(pair)
+
+    def pop_due(self, now):
+        """
+        Extraer los pares elegibles en `now`
+
+        Los pares extraídos quedan bloqueados hasta que se vuelvan a programar.
+
+        Returns:
+            list: Pares elegibles en orden de vencimiento
+        """
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            when, pair = heapq.heappop(self._heap)
+            if self._due_at.get(pair) == when:
+                self._due_at[pair] = None
+                due.append(pair)
+        return due
+
+    def next_due_time(self):
+        """Próximo momento en que algún par será elegible (None si ninguno)"""
+        while self._heap:
+            when, pair = self._heap[0]
+            if self._due_at.get(pair) == when:
+                return when
+            heapq.heappop(self._heap)  # Entrada obsoleta
+        return None
+
+    def _compact_if_needed(self):
+        # Reprogramar deja entradas obsoletas; reconstruir si crecen demasiado
+        if len(self._heap) > 2 * len(self._due_at) + 64:
+            self._heap = [(when, pair) for pair, when in self._due_at.items() if when is not None]
+            heapq.heapify(self._heap)
+
+
+class SettlementQueue:
+    """
+    Cola de liquidación de órdenes ordenada por vencimiento
+
+    Cada orden entra con prioridad `expiry_time + grace`. Solo se extraen
+    las órdenes vencidas; las que aún no tienen resultado se reprograman
+    con espera exponencial.
+    """
+
+    def __init__(self, grace, backoff=5, max_backoff=30):
+        self.grace = grace
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._heap = []
+        self._entries = {}  # id de orden -> (vencimiento, par, orden, intentos)
+        self._counter = 0   # Desempate estable en el heap
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, order_id):
+        return order_id in self._entries
+
+    def push(self, pair, order):
+        """Encolar una orden recién colocada (o restaurada del estado)"""
+        due = order["expiry_time"].timestamp() + self.grace
+        self._schedule(due, pair, order, 0)
+
+    def retry(self, pair, order, attempts, now):
+        """Reprogramar una orden sin resultado todavía"""
+        delay = min(self.backoff * (2 ** attempts), self.max_backoff)
+        self._schedule(now + delay, pair, order, attempts + 1)
+
+    def discard(self, order_id):
+        """Quitar una orden ya liquidada por otra vía"""
+        self._entries.pop(order_id, None)
+
+    def pop_due(self, now):
+        """
+        Extraer las órdenes vencidas
+
+        Returns:
+            list: Tuplas (par, orden, intentos) en orden de vencimiento
+        """
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            when, _, order_id = heapq.heappop(self._heap)
+            entry = self._entries.get(order_id)
+            if entry is not None and entry[0] == when:
+                del self._entries[order_id]
+                due.append(entry[1:])
+        return due
+
+    def next_due_time(self):
+        """Próximo vencimiento pendiente (None si la cola está vacía)"""
+        while self._heap:
+            when, _, order_id = self._heap[0]
+            entry = self._entries.get(order_id)
+            if entry is not None and entry[0] == when:
+                return when
+            heapq.heappop(self._heap)  # Entrada obsoleta
+        return None
+
+    def _schedule(self, when, pair, order, attempts):
+        self._counter += 1
+        self._entries[order["id"]] = (when, pair, order, attempts)
+        heapq.heappush(self._heap, (when, self._counter, order["id"]))
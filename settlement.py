@@ -0,0 +1,182 @@
+# settlement.py
+# Índice de resultados de órdenes alimentado por el websocket de IQ Option
+
+import threading
+import logging
+from concurrent.futures import Future
+
+
+class _NotifyingDict(dict):
+    """Diccionario que avisa de cada asignación (para enganchar la librería)"""
+
+    def __init__(self, data, callback):
+        super().__init__(data)
+        self._callback = callback
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        try:
+            self._callback(key, value)
+        except Exception as e:
+            logging.error(f"Error indexando resultado de orden: {str(e)}")
+
+
+class SettlementIndex:
+    """
+    Índice de resultados de órdenes por id
+
+    Se alimenta en el momento en que la librería guarda un resultado en
+    api.order_binary o api.listinfodata, así que consultar una orden es una
+    búsqueda en diccionario. lookup() devuelve None mientras el resultado
+    todavía no se conoce.
+
+    Además, register() entrega un Future por orden que se completa en cuanto
+    llega el resultado (desde el hilo del websocket).
+    """
+
+    def __init__(self, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self._results = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._results)
+
+    def record(self, order_id, win, win_amount=None, profit_percent=None, source=""):
+        """
+        Registrar el resultado de una orden
+
+        Args:
+            order_id: Id de la orden
+            win: Resultado según IQ Option ('win', 'loose' o 'equal')
+            win_amount: Monto devuelto, si se conoce
+            profit_percent: Porcentaje de ganancia, si se conoce
+            source: Origen del dato (para logging)
+        """
+        win = str(win or "").lower()
+        if win not in ("win", "loose", "equal"):
+            return
+
+        result = {
+            "win": win,
+            "win_amount": float(win_amount) if win_amount is not None else None,
+            "profit_percent": profit_percent,
+            "source": source,
+        }
+        with self._lock:
+            self._results[str(order_id)] = result
+            future = self._futures.pop(str(order_id), None)
+
+        # Completar fuera del lock: los callbacks se ejecutan en este hilo
+        if future is not None and not future.done():
+            future.set_result(result)
+
+    def register(self, order_id):
+        """
+        Registrar una orden para recibir su resultado en cuanto llegue
+
+        Returns:
+            Future: Se completa con el resultado normalizado de la orden
+        """
+        with self._lock:
+            result = self._results.get(str(order_id))
+            future = self._futures.get(str(order_id))
+            if future is None:
+                future = Future()
+                if result is None:
+                    self._futures[str(order_id)] = future
+
+        if result is not None and not future.done():
+            future.set_result(result)
+        return future
+
+    def lookup(self, order_id):
+        """
+        Consultar el resultado de una orden
+
+        Returns:
+            dict: Resultado normalizado o None si aún no se conoce
+        """
+        with self._lock:
+            return self._results.get(str(order_id))
+
+    def forget(self, order_id):
+        """Eliminar una orden ya procesada del índice"""
+        with self._lock:
+            self._results.pop(str(order_id), None)
+            future = self._futures.pop(str(order_id), None)
+        if future is not None:
+            future.cancel()
+
+    def install(self, api):
+        """
+        Enganchar los contenedores de resultados de la librería
+
+        Hay que llamarlo tras cada conexión, porque la librería crea un
+        objeto api nuevo al reconectar.
+
+        Returns:
+            bool: True si se enganchó al menos un contenedor de resultados
+        """
+        hooked = False
+
+        # Solo se sustituyen dict simples: un defaultdict perdería su fábrica
+        order_binary = getattr(api, "order_binary", None)
+        if type(order_binary) is dict:
+            for order_id, data in order_binary.items():
+                self._on_order_binary(order_id, data)
+            api.order_binary = _NotifyingDict(order_binary, self._on_order_binary)
+            hooked = True
+        elif isinstance(order_binary, _NotifyingDict):
+            hooked = True  # Ya enganchado en esta conexión
+        else:
+            self.logger.warning(
+                f"⚠️ api.order_binary no es un dict simple ({type(order_binary).__name__}): "
+                "sus resultados no llegarán por push"
+            )
+
+        listinfodata = getattr(api, "listinfodata", None)
+        if type(listinfodata) is dict:
+            for key, value in listinfodata.items():
+                self._on_listinfodata(key, value)
+            api.listinfodata = _NotifyingDict(listinfodata, self._on_listinfodata)
+            hooked = True
+        elif listinfodata is not None and hasattr(listinfodata, "set") \
+                and not getattr(listinfodata.set, "_settlement_hook", False):
+            # Objeto ListInfoData de la librería: set(win, game_state, id_number)
+            original_set = listinfodata.set
+
+            def hooked_set(win, game_state, id_number):
+                original_set(win, game_state, id_number)
+                self.record(id_number, win, source="listinfodata")
+
+            hooked_set._settlement_hook = True
+            listinfodata.set = hooked_set
+            hooked = True
+        elif getattr(getattr(listinfodata, "set", None), "_settlement_hook", False):
+            hooked = True
+
+        if not hooked:
+            self.logger.warning("⚠️ No se pudo enganchar ningún contenedor de resultados: se liquidará por consulta")
+        return hooked
+
+    def _on_order_binary(self, order_id, data):
+        if isinstance(data, dict) and "result" in data:
+            self.record(
+                order_id,
+                data["result"],
+                profit_percent=data.get("profit_percent"),
+                source="order_binary"
+            )
+
+    def _on_listinfodata(self, key, value):
+        items = value if isinstance(value, list) else [value]
+        for item in items:
+            if isinstance(item, dict) and "id" in item:
+                self.record(
+                    item["id"],
+                    item.get("win"),
+                    win_amount=item.get("win_amount"),
+                    source="listinfodata"
+                )
@@ -0,0 +1,76 @@
+# state_writer.py
+# Escritura del estado en un hilo dedicado, agrupando los avisos de cambio
+
+import time
+import threading
+import logging
+
+
+class StateWriter:
+    """
+    Hilo que guarda el estado cuando se le avisa de un cambio
+
+    notify() solo marca el estado como pendiente, así que el hilo de trading
+    nunca espera al disco. Los avisos que llegan en ráfaga se agrupan: como
+    mucho se escribe una vez cada `interval` segundos. flush() detiene el
+    hilo y hace la última escritura si queda algo pendiente.
+    """
+
+    def __init__(self, save, interval=5, logger=None):
+        """
+        Args:
+            save: Callable que escribe el estado completo
+            interval: Segundos mínimos entre dos escrituras
+        """
+        self._save = save
+        self.interval = interval
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._pending = threading.Event()
+        self._stopping = threading.Event()
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self.last_write = 0.0
+        self.write_count = 0
+        self.notify_count = 0
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="state-writer", daemon=True)
+        self._thread.start()
+
+    def notify(self):
+        """Avisar de que el estado cambió (no bloquea)"""
+        self.notify_count += 1
+        self._pending.set()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._pending.wait()
+            if self._stopping.is_set():
+                break
+            # Agrupar los avisos que lleguen hasta cumplir el intervalo
+            remaining = self.last_write + self.interval - time.time()
+            if remaining > 0 and self._stopping.wait(remaining):
+                break
+            self._write()
+
+    def _write(self):
+        with self._write_lock:
+            self._pending.clear()
+            try:
+                self._save()
+                self.write_count += 1
+            except Exception as e:
+                self.logger.error(f"❌ Error en el hilo de guardado de estado: {str(e)}")
+            self.last_write = time.time()
+
+    def flush(self):
+        """Detener el hilo y escribir lo pendiente (llamar al finalizar)"""
+        self._stopping.set()
+        self._pending.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+        self._write()
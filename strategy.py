@@ -10,17 +10,30 @@ threading.excepthook = lambda args: None
 import time
 import json
 import os
+import queue
+from functools import partial
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import defaultdict, deque
 import logging
 import pytz
 import traceback
-from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
 
 from iqoptionapi.stable_api import IQ_Option
+import iqoptionapi.constants as OP_code
 
 from config import *
-from utils import calculate_rsi, is_market_open, format_currency, calculate_win_rate, setup_logger
+from scheduling import EligibilityIndex, SettlementQueue
+from settlement import SettlementIndex
+from candle_requests import CandleRequests
+from balance import ShadowBalance
+from api_executor import ApiExecutor
+from journal import TradeJournal, fold_events
+from state_writer import StateWriter
+from trade_ledger import TradeLedger
+from asset_catalog import AssetCatalog, rank_variants, save_catalog_file, load_catalog_file
+from asset_schedule import TradingCalendar
+from utils import calculate_rsi, is_market_open, format_currency, calculate_win_rate, setup_logger, WilderRSI, CandleBuffer, wilder_averages_batch
 
 class MultiCurrencyRSIBinaryOptionsStrategy:
     def __init__(self, email, password, account_type="PRACTICE"):
@@ -29,11 +42,22 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
         Adaptada de QuantConnect para IQ Option
         """
         # Configurar logger
-        self.logger = setup_logger(__name__, LOG_FILE, getattr(logging, LOG_LEVEL))
+        self.logger = setup_logger(__name__, LOG_FILE, getattr(logging, LOG_LEVEL),
+                                   max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT, compress=LOG_COMPRESS)
         self.logger.info("🎯 INICIANDO ESTRATEGIA RSI MULTI-DIVISA (LÓGICA INVERTIDA)")
         self.logger.info(f"📊 Configuración: PUT <= {OVERSOLD_LEVEL}, CALL >= {OVERBOUGHT_LEVEL}")
         self.logger.info("⚡ LÓGICA INVERTIDA: PUT en sobreventa, CALL en sobrecompra")
         
+        # Índice de resultados de órdenes (se engancha al websocket al conectar)
+        self.settlement_index = SettlementIndex(self.logger)
+        
+        # Descargas de velas con respuesta por petición (pueden solaparse)
+        self.candle_requests = CandleRequests()
+        
+        # Resultados empujados por el websocket, pendientes de aplicar en el hilo principal
+        self.settlement_events = queue.Queue()
+        self.wake_event = threading.Event()
+        
         # Conexión a IQ Option
         self._connect_to_iq_option(email, password, account_type)
         
@@ -41,6 +65,13 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
         self.initial_capital = self.iqoption.get_balance()
         self.logger.info(f"💰 Capital inicial: {format_currency(self.initial_capital)}")
         
+        # Balance local: se actualiza con cada orden y se reconcilia periódicamente
+        self.balance_ledger = ShadowBalance(
+            self.initial_capital,
+            BALANCE_RECONCILE_INTERVAL,
+            BALANCE_DRIFT_THRESHOLD
+        )
+        
         # Umbrales de stop loss
         self.absolute_stop_loss_threshold = self.initial_capital * (1 - ABSOLUTE_STOP_LOSS_PERCENT)
         self.absolute_stop_loss_activated = False
@@ -81,23 +112,81 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
         self.last_date = None
         self.min_capital = self.initial_capital
         
-        # Control de sistema
-        self.executor = ThreadPoolExecutor(max_workers=3)
+        # Planificador: índice con el momento en que cada par puede dar señal
+        self.bar_close_scheduler = SIGNAL_SCHEDULER == "BAR_CLOSE"
+        self.eligibility = EligibilityIndex()
+        
+        # Cola de liquidación ordenada por expiración + margen
+        self.settlement_queue = SettlementQueue(SETTLEMENT_GRACE, SETTLEMENT_BACKOFF, SETTLEMENT_MAX_BACKOFF)
+        
+        # Latencia señal→ack de las últimas órdenes
+        self.order_latencies = deque(maxlen=500)
+        
+        # Control de sistema: un carril de hilos por endpoint de la API
+        self.executor = ApiExecutor(API_LANES, MAX_FREEZE_COUNT, API_RATE_LIMITS, API_REUSE_WINDOW)
+        
+        # Evaluación de pares en paralelo
+        self.pair_executor = ThreadPoolExecutor(max_workers=PAIR_WORKERS, thread_name_prefix="pair")
+        self.state_lock = threading.RLock()  # Protege órdenes activas, señales y estadísticas
+        self.placing = set()  # Pares con una compra en curso (no se vuelven a evaluar hasta que termine)
+        self.candles_lock = threading.Lock()  # Solo sin candle_requests: get_candles comparte api.candles.candles_data
         self.last_activity_time = time.time()
         self.start_time = time.time()
         
-        # Cache para optimización
-        self.opcode_cache = {}
-        self.opcode_cache_timestamp = 0
-        self.asset_open_status_cache = {}
-        self.asset_open_status_timestamp = 0
+        # Horarios de negociación: el estado de los activos se deduce del calendario
+        self.trading_calendar = TradingCalendar() if USE_SCHEDULE_CALENDAR else None
+        self.next_schedule_boundary = None
+        
+        # Catálogo de activos (opcodes y estado) renovado en segundo plano antes de vencer
+        self.asset_catalog = AssetCatalog(
+            self._fetch_opcodes,
+            partial(self.api_call_with_timeout, self._get_all_open_time, endpoint="open_time"),
+            opcode_ttl=OPCODE_CACHE_TTL,
+            status_ttl=SCHEDULE_REFRESH_INTERVAL if USE_SCHEDULE_CALENDAR else ASSET_STATUS_CACHE_TTL,
+            refresh_margin=ASSET_REFRESH_MARGIN,
+            logger=self.logger
+        )
+        
+        # Variantes abiertas de cada par, ordenadas por preferencia (se rehace con cada estado nuevo)
+        self.variant_index = {}
+        self.asset_catalog.status_listeners.append(self._rebuild_variant_index)
+        
+        # Motores RSI incrementales por activo (estado de suavizado de Wilder)
+        self.rsi_engines = {}
+        
+        # Buffers de velas por activo (se siembran una vez y luego se actualizan por delta)
+        self.candle_buffers = {}
+        
+        # Protege buffers y motores RSI: la sincronización de streams los
+        # reemplaza mientras los trabajadores de pares los leen
+        self.buffers_lock = threading.Lock()
+        
+        # Descargas de velas que superaron el plazo y siguen en curso (par -> Future)
+        self.stale_fetches = {}
+        
+        # Modo streaming: suscripciones de velas en tiempo real por activo
+        self.stream_mode = CANDLE_FEED_MODE == "STREAM"
+        self.candle_streams = set()
+        self.streams_lock = threading.Lock()
         
         # Mapeo de pares y activos
         self.pair_option_types = {}
         self.iqoption_pairs = {}
         self.valid_pairs = []
         
-        # Cargar estado previo si existe
+        # Recuperación en segundo plano de las órdenes restauradas del estado
+        self.recovery_in_progress = False
+        
+        # Diario de eventos: cada cambio se añade al final; save_state compacta
+        self.journal = TradeJournal(JOURNAL_FILE, JOURNAL_FSYNC)
+        
+        # Historial de operaciones en SQLite (escrito en lotes por su propio hilo)
+        self.trade_ledger = TradeLedger(TRADE_LEDGER_FILE, TRADE_LEDGER_BATCH_INTERVAL, self.logger)
+        
+        # Las instantáneas de estado se escriben en un hilo aparte, agrupando avisos
+        self.state_writer = StateWriter(self.save_state, STATE_WRITE_INTERVAL, self.logger)
+        
+        # Cargar estado previo si existe (instantánea + eventos del diario)
         self.load_state()
         
         # Verificar si es un nuevo día al iniciar
@@ -107,8 +196,15 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
             self.on_new_day()
             self.last_date = current_date
         
-        # Validar pares disponibles
-        self.check_valid_pairs()
+        self.state_writer.start()
+        
+        # Validar pares disponibles (o arrancar en caliente con el catálogo guardado)
+        if not self._warm_start_from_catalog():
+            self.check_valid_pairs()
+        self.asset_catalog.start()
+        
+        # Resolver en paralelo las órdenes que quedaron abiertas en la sesión anterior
+        self._start_order_recovery()
         
     def _connect_to_iq_option(self, email, password, account_type):
         """Conectar a IQ Option con manejo de errores"""
@@ -123,17 +219,34 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
             raise Exception(f"Error al conectar a IQ Option: {login_reason}")
         
         self.logger.info("✅ Conexión exitosa")
+        self.settlement_index.install(self.iqoption.api)
+        if not self.candle_requests.install(self.iqoption.api):
+            self.logger.warning("⚠️ No se pudo enganchar el websocket para velas: las descargas se harán de una en una")
         self.iqoption.change_balance(account_type)
         balance = self.iqoption.get_balance()
         self.logger.info(f"💰 Balance actual: {format_currency(balance)}")
     
-    def api_call_with_timeout(self, func, *args, timeout=API_TIMEOUT, **kwargs):
-        """Ejecutar llamada API con timeout"""
+    def _reconnect(self):
+        """Reconectar y descartar los hilos colgados en la conexión anterior"""
+        self.logger.warning("🔌 Reconectando...")
+        self._connect_to_iq_option(IQ_EMAIL, IQ_PASSWORD, ACCOUNT_TYPE)
+        self.executor.reset()
+        if self.stream_mode:
+            # Las suscripciones murieron con la conexión anterior
+            self._sync_candle_streams(force=True)
+    
+    def _connection_lost(self):
+        """Conexión caída o congelada (demasiados timeouts seguidos)"""
+        if self.executor.frozen():
+            self.logger.warning(f"🥶 {MAX_FREEZE_COUNT} timeouts seguidos: conexión congelada")
+            return True
+        return not self.iqoption.check_connect()
+    
+    def api_call_with_timeout(self, func, *args, timeout=API_TIMEOUT, endpoint=None, **kwargs):
+        """Ejecutar llamada API con timeout en el carril de su endpoint"""
         self.last_activity_time = time.time()
         try:
-            future = self.executor.submit(func, *args, **kwargs)
-            result = future.result(timeout=timeout)
-            return result
+            return self.executor.call(func, *args, timeout=timeout, endpoint=endpoint, **kwargs)
         except FutureTimeoutError:
             self.logger.error(f"⚠️ TIMEOUT: {func.__name__} tardó más de {timeout}s")
             return None
@@ -141,99 +254,188 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
             self.logger.error(f"❌ Error en {func.__name__}: {str(e)}")
             return None
     
+    def _fetch_opcodes(self):
+        """Actualizar y obtener los opcodes de los activos (para el catálogo)"""
+        self.api_call_with_timeout(self.iqoption.update_ACTIVES_OPCODE)
+        return self.api_call_with_timeout(self.iqoption.get_all_ACTIVES_OPCODE)
+    
+    def _get_all_open_time(self):
+        """
+        Estado de los activos (para el catálogo)
+        
+        Con el calendario activo se descargan los horarios (get_all_init_v2) y
+        el estado se calcula a partir de ellos; si no llegan, se usa
+        get_all_open_time. self.iqoption se resuelve en cada llamada porque
+        cambia al reconectar.
+        """
+        if self.trading_calendar is not None:
+            now = time.time()
+            if self.trading_calendar.load(self.iqoption.get_all_init_v2(), now):
+                self._update_schedule_boundary(now)
+                return self.trading_calendar.open_status(now)
+            self.logger.warning("⚠️ Horarios de activos no disponibles, usando get_all_open_time")
+        return self.iqoption.get_all_open_time()
+    
+    def _schedule_variant_names(self):
+        """Nombres de todas las variantes posibles de los pares configurados"""
+        names = set()
+        for pair in self.forex_pairs:
+            pair_upper = pair.upper()
+            for suffix in ["-OTC", "", "-op"] + list(ALLOWED_ASSET_SUFFIXES) + [PRIORITY_SUFFIX or ""]:
+                names.add(f"{pair_upper}{suffix}")
+        return names
+    
+    def _update_schedule_boundary(self, now):
+        self.next_schedule_boundary = self.trading_calendar.next_boundary(self._schedule_variant_names(), now)
+        if self.next_schedule_boundary is not None:
+            boundary = datetime.fromtimestamp(self.next_schedule_boundary).strftime('%Y-%m-%d %H:%M:%S')
+            self.logger.debug(f"🗓️ Próximo cambio de horario: {boundary}")
+    
+    def _check_schedule_boundary(self, now):
+        """
+        Al cruzar un cambio de horario, recalcular el estado de los activos y
+        revalidar los pares (cambio de variante o pausa) sin consultar la API
+        """
+        if self.next_schedule_boundary is None or now < self.next_schedule_boundary:
+            return
+        self.logger.info("🗓️ Cambio de horario de activos, revalidando pares...")
+        self.asset_catalog.publish_status(self.trading_calendar.open_status(now))
+        self._update_schedule_boundary(now)
+        self.check_valid_pairs()
+    
+    def _warm_start_from_catalog(self):
+        """
+        Restaurar opcodes y variantes de pares desde CATALOG_FILE si es reciente
+        
+        Evita update_ACTIVES_OPCODE, get_all_open_time y la búsqueda de
+        variantes al arrancar. La validación completa se repite en segundo plano.
+        
+        Returns:
+            bool: True si se usó el catálogo guardado
+        """
+        try:
+            catalog = load_catalog_file(CATALOG_FILE, CATALOG_MAX_AGE)
+        except Exception as e:
+            self.logger.warning(f"⚠️ Catálogo de activos ilegible: {str(e)}")
+            return False
+        if catalog is None:
+            return False
+        
+        # Solo los pares que siguen configurados
+        pairs = [pair for pair in self.forex_pairs if pair in catalog["iqoption_pairs"]]
+        if not pairs:
+            return False
+        
+        # La librería necesita los opcodes para operar (buy usa OP_code.ACTIVES)
+        OP_code.ACTIVES.update(catalog["opcodes"])
+        self.asset_catalog.seed_opcodes(catalog["opcodes"], catalog["timestamp"])
+        
+        self.valid_pairs = pairs
+        self.iqoption_pairs = {pair: catalog["iqoption_pairs"][pair] for pair in pairs}
+        self.pair_option_types = {pair: catalog["pair_option_types"].get(pair, "turbo") for pair in pairs}
+        
+        age = time.time() - catalog["timestamp"]
+        self.logger.info(f"⚡ Arranque en caliente: {len(pairs)} pares desde {CATALOG_FILE} (hace {age / 60:.0f} min)")
+        for pair in pairs:
+            self.logger.info(f"   - {pair} → {self.iqoption_pairs[pair]} ({self.pair_option_types[pair]})")
+        
+        self._sync_eligibility()
+        if self.stream_mode:
+            self._sync_candle_streams()
+        
+        threading.Thread(target=self._revalidate_catalog, name="catalog-revalidate", daemon=True).start()
+        return True
+    
+    def _revalidate_catalog(self):
+        """Repetir la validación completa de pares tras un arranque en caliente"""
+        try:
+            # Sin state_lock: check_valid_pairs solo lo toma para reemplazar los mapas
+            self.check_valid_pairs()
+        except Exception as e:
+            self.logger.error(f"❌ Error revalidando el catálogo de activos: {str(e)}")
+    
+    def _rank_all_variants(self, all_assets):
+        """Variantes abiertas de todos los pares configurados, por preferencia"""
+        return {
+            pair: rank_variants(pair, all_assets, ALLOWED_ASSET_SUFFIXES, PRIORITY_SUFFIX)
+            for pair in self.forex_pairs
+        }
+    
+    def _rebuild_variant_index(self, all_assets):
+        # Llamado por el catálogo en cada refresco; se reemplaza el índice entero
+        self.variant_index = self._rank_all_variants(all_assets)
+    
     def check_valid_pairs(self):
-        """Verificar qué pares están disponibles para operar"""
+        """
+        Verificar qué pares están disponibles para operar
+        
+        La búsqueda de variantes (y, en modo streaming, las suscripciones) se
+        hace fuera de state_lock; los mapas de pares se reemplazan juntos
+        bajo el lock, así el bucle de trading nunca ve un estado a medias.
+        """
         self.logger.info("🔍 Verificando pares disponibles...")
         
-        # Actualizar lista de activos
-        self.api_call_with_timeout(self.iqoption.update_ACTIVES_OPCODE)
-        opcodes = self.api_call_with_timeout(self.iqoption.get_all_ACTIVES_OPCODE)
+        # Opcodes y estado salen del catálogo (refrescado en segundo plano)
+        opcodes = self.asset_catalog.opcodes()
         
         if not opcodes:
             self.logger.error("❌ No se pudieron obtener los activos disponibles")
             return []
         
         # Obtener estado de activos
-        all_assets = self.api_call_with_timeout(self.iqoption.get_all_open_time)
+        all_assets = self.asset_catalog.open_status()
         if not all_assets:
             self.logger.error("❌ No se pudo obtener el estado de los activos")
             return []
         
-        self.valid_pairs = []
-        self.pair_option_types = {}
-        self.iqoption_pairs = {}
+        valid_pairs = []
+        pair_option_types = {}
+        iqoption_pairs = {}
         
-        # Importar configuración de sufijos
-        from config import ALLOWED_ASSET_SUFFIXES, PRIORITY_SUFFIX
+        variant_index = self._rank_all_variants(all_assets)
         
         # Verificar cada par
         for pair in self.forex_pairs:
-            pair_upper = pair.upper()
-            found = False
-            available_options = []
+            available_options = variant_index[pair]
+            for option in available_options:
+                self.logger.info(f"✅ {pair}: Encontrado como {option['iq_name']} ({option['option_type']})")
             
-            # Buscar en opciones turbo y binarias
-            for option_type in ["turbo", "binary"]:
-                if option_type not in all_assets:
-                    continue
-                    
-                # Lista de todas las variantes posibles del par
-                variants_to_check = []
-                
-                # Si NO hay prioridad, probar primero las OTC (más estables)
-                if PRIORITY_SUFFIX is None:
-                    # Orden recomendado: OTC primero (más estable), luego estándar, luego -op
-                    variants_to_check.append(f"{pair_upper}-OTC")
-                    variants_to_check.append(pair_upper)
-                    variants_to_check.append(f"{pair_upper}-op")
-                else:
-                    # Si hay prioridad, usar el orden configurado
-                    variants_to_check.append(pair_upper)
-                    if PRIORITY_SUFFIX:
-                        variants_to_check.append(f"{pair_upper}{PRIORITY_SUFFIX}")
-                    for suffix in ALLOWED_ASSET_SUFFIXES:
-                        variant = f"{pair_upper}{suffix}"
-                        if variant not in variants_to_check:
-                            variants_to_check.append(variant)
-                
-                # Buscar cada variante
-                for variant in variants_to_check:
-                    if variant in all_assets[option_type]:
-                        if all_assets[option_type][variant].get("open", False):
-                            available_options.append({
-                                'pair': pair,
-                                'option_type': option_type,
-                                'iq_name': variant,
-                                'is_otc': variant.endswith('-OTC')
-                            })
-                            self.logger.info(f"✅ {pair}: Encontrado como {variant} ({option_type})")
-            
-            # Seleccionar la mejor opción disponible
+            # Seleccionar la mejor opción disponible (ya vienen ordenadas por preferencia)
             if available_options:
-                # Si no hay prioridad, preferir OTC para estabilidad
-                if PRIORITY_SUFFIX is None:
-                    # Ordenar: OTC primero, luego binary sobre turbo
-                    available_options.sort(key=lambda x: (
-                        not x['is_otc'],  # OTC primero (False=0, True=1)
-                        x['option_type'] != 'binary'  # binary preferido sobre turbo
-                    ))
-                
                 best_option = available_options[0]
-                self.valid_pairs.append(best_option['pair'])
-                self.pair_option_types[best_option['pair']] = best_option['option_type']
-                self.iqoption_pairs[best_option['pair']] = best_option['iq_name']
+                valid_pairs.append(best_option['pair'])
+                pair_option_types[best_option['pair']] = best_option['option_type']
+                iqoption_pairs[best_option['pair']] = best_option['iq_name']
                 self.logger.info(f"✅ {best_option['pair']}: Seleccionado {best_option['iq_name']} ({best_option['option_type']})")
             else:
                 self.logger.warning(f"⚠️ {pair}: No disponible en ninguna variante")
         
         # Log resumen
-        self.logger.info(f"📊 Total pares disponibles: {len(self.valid_pairs)}")
-        if self.valid_pairs:
+        self.logger.info(f"📊 Total pares disponibles: {len(valid_pairs)}")
+        if valid_pairs:
             self.logger.info("📋 Pares activos:")
-            for pair in self.valid_pairs:
-                self.logger.info(f"   - {pair} → {self.iqoption_pairs[pair]} ({self.pair_option_types[pair]})")
+            for pair in valid_pairs:
+                self.logger.info(f"   - {pair} → {iqoption_pairs[pair]} ({pair_option_types[pair]})")
+        
+        with self.state_lock:
+            self.valid_pairs = valid_pairs
+            self.pair_option_types = pair_option_types
+            self.iqoption_pairs = iqoption_pairs
+            self.variant_index = variant_index
+            self._sync_eligibility()
+        
+        # Las variantes pueden haber cambiado (ej: -OTC → estándar)
+        if self.stream_mode:
+            self._sync_candle_streams()
+        
+        # Guardar el catálogo resuelto para el próximo arranque
+        if valid_pairs:
+            try:
+                save_catalog_file(CATALOG_FILE, opcodes, iqoption_pairs, pair_option_types)
+            except Exception as e:
+                self.logger.error(f"❌ Error guardando catálogo de activos: {str(e)}")
         
-        return self.valid_pairs
+        return valid_pairs
     
     def test_check_order_result(self, order_id):
         """
@@ -269,20 +471,8 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
                 timeout=5
             )
             
-            positions = []
+            positions = self._extract_positions(history)
             if history:
-                # Manejar formato tupla
-                if isinstance(history, tuple):
-                    for element in history:
-                        if isinstance(element, list) and element:
-                            if isinstance(element[0], dict) and 'id' in element[0]:
-                                positions = element
-                                break
-                elif isinstance(history, dict) and 'positions' in history:
-                    positions = history['positions']
-                elif isinstance(history, list):
-                    positions = history
-                
                 found = False
                 for position in positions[:50]:  # Buscar en las últimas 50
                     if str(position.get('id')) == str(order_id):
@@ -332,6 +522,28 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
         
         return result1, None
     
+    @staticmethod
+    def _extract_positions(history):
+        """Extraer la lista de posiciones de la respuesta de get_position_history(_v2)"""
+        if not history:
+            return []
+        
+        # Formato tupla (formato real): (ok, lista) o (ok, {'positions': lista})
+        if isinstance(history, tuple):
+            for element in history:
+                if isinstance(element, list) and element:
+                    if isinstance(element[0], dict) and 'id' in element[0]:
+                        return element
+                elif isinstance(element, dict) and 'positions' in element:
+                    return element['positions'] or []
+            return []
+        # Manejar otros formatos
+        if isinstance(history, dict) and 'positions' in history:
+            return history['positions'] or []
+        if isinstance(history, list):
+            return history
+        return []
+    
     def check_recent_orders_results(self, minutes=30):
         """
         Verificar resultados de órdenes recientes para debugging
@@ -339,7 +551,16 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
         """
         self.logger.info(f"🔍 Verificando órdenes recientes...")
         
-        # Intentar obtener historial de órdenes
+        # Órdenes registradas localmente (ledger) en los últimos `minutes` minutos
+        local_orders = self.trade_ledger.recent(time.time() - minutes * 60)
+        self.logger.info(f"🗃️ Ledger: {len(local_orders)} órdenes en los últimos {minutes} minutos")
+        for row in local_orders:
+            entry = datetime.fromtimestamp(row["entry_time"]).strftime('%Y-%m-%d %H:%M:%S')
+            result = row["result"] or "abierta"
+            profit = format_currency(row["profit"]) if row["profit"] is not None else "-"
+            self.logger.info(f"   {entry} | {row['order_id']} | {row['pair']} ({row['asset']}) {row['direction']} {format_currency(row['size'])} | {result} {profit}")
+        
+        # Historial del bróker para contrastar
         try:
             # Método principal: get_position_history con sintaxis correcta
             self.logger.info(f"📋 Obteniendo historial de posiciones...")
@@ -349,23 +570,10 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
                 timeout=5
             )
             
-            positions = []
+            positions = self._extract_positions(history)
             if history:
-                # Manejar formato tupla (formato real)
-                if isinstance(history, tuple):
-                    self.logger.info(f"✅ Historial obtenido (formato tupla)")
-                    for element in history:
-                        if isinstance(element, list) and element:
-                            if isinstance(element[0], dict) and 'id' in element[0]:
-                                positions = element
-                                break
-                # Manejar otros formatos
-                elif isinstance(history, dict) and 'positions' in history:
-                    positions = history['positions']
-                    self.logger.info(f"✅ Historial obtenido (formato dict)")
-                elif isinstance(history, list):
-                    positions = history
-                    self.logger.info(f"✅ Historial obtenido (formato lista)")
+                if isinstance(history, (tuple, dict, list)):
+                    self.logger.info(f"✅ Historial obtenido (formato {type(history).__name__})")
                 else:
                     self.logger.warning(f"⚠️ Formato desconocido: {type(history)}")
                 
@@ -441,7 +649,7 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
         self.logger.info("🔍 DEBUG: MOSTRANDO TODOS LOS ACTIVOS FOREX DISPONIBLES")
         self.logger.info("="*60)
         
-        # Obtener todos los activos
+        # Obtener todos los activos (incluye digital, que el catálogo no guarda)
         all_assets = self.api_call_with_timeout(self.iqoption.get_all_open_time)
         if not all_assets:
             self.logger.error("❌ No se pudieron obtener los activos")
@@ -528,15 +736,8 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
             if profit and profit > 0:
                 return True
             
-            # Si no hay profit, verificar de otra manera
-            all_assets = self.api_call_with_timeout(self.iqoption.get_all_open_time)
-            option_type = self.pair_option_types[pair]
-            
-            if all_assets and option_type in all_assets:
-                if asset_name in all_assets[option_type]:
-                    return all_assets[option_type][asset_name].get("open", False)
-            
-            return False
+            # Si no hay profit, verificar con el catálogo de activos
+            return self.asset_catalog.is_open(self.pair_option_types[pair], asset_name)
             
         except Exception as e:
             self.logger.debug(f"Error verificando {pair}: {str(e)}")
@@ -545,83 +746,455 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
     def handle_trading_error(self, pair, error_message):
         """
         Manejar errores de trading y cambiar a activo alternativo si es necesario
+        
+        La alternativa sale del índice de variantes (sin consultas a la API);
+        el catálogo se refresca en segundo plano para corregir el índice.
         """
         self.logger.warning(f"⚠️ Error con {self.iqoption_pairs[pair]}: {error_message}")
         
         # Si el activo no está disponible, intentar con una variante alternativa
         if "not available" in error_message or "suspended" in error_message:
             self.logger.info(f"🔄 Buscando alternativa para {pair}...")
+            self.asset_catalog.request_refresh()
             
-            # Obtener estado actual de activos
-            all_assets = self.api_call_with_timeout(self.iqoption.get_all_open_time)
-            if not all_assets:
-                return False
-            
-            pair_upper = pair.upper()
-            current_asset = self.iqoption_pairs[pair]
+            # El índice está vacío mientras el arranque en caliente se revalida;
+            # el estado se obtiene fuera del lock (puede consultar la API)
+            all_assets = None if self.variant_index.get(pair) else self.asset_catalog.open_status()
             
-            # Lista de alternativas a probar
-            alternatives = [
-                f"{pair_upper}-OTC",
-                pair_upper,
-                f"{pair_upper}-op"
-            ]
+            with self.state_lock:
+                current_asset = self.iqoption_pairs[pair]
+                candidates = self.variant_index.get(pair)
+                if not candidates:
+                    candidates = self._rank_all_variants(all_assets or {}).get(pair, [])
+                
+                # Descartar el activo que falló (buy no distingue binary/turbo)
+                # hasta el próximo refresco del índice
+                alternatives = [option for option in candidates if option['iq_name'] != current_asset]
+                self.variant_index[pair] = alternatives
+                
+                if alternatives:
+                    best_option = alternatives[0]
+                    self.logger.info(f"✅ Cambiando {pair} de {current_asset} a {best_option['iq_name']} ({best_option['option_type']})")
+                    self.iqoption_pairs[pair] = best_option['iq_name']
+                    self.pair_option_types[pair] = best_option['option_type']
+                else:
+                    # Si no hay alternativas, eliminar el par temporalmente
+                    self.logger.warning(f"❌ No hay alternativas disponibles para {pair}, eliminándolo temporalmente")
+                    if pair in self.valid_pairs:
+                        self.valid_pairs.remove(pair)
+                        self.eligibility.remove(pair)
+                    return False
             
-            # Quitar el activo actual de las alternativas
-            alternatives = [alt for alt in alternatives if alt != current_asset]
-            
-            # Buscar una alternativa funcional
-            for alt_asset in alternatives:
-                for option_type in ["binary", "turbo"]:
-                    if option_type in all_assets and alt_asset in all_assets[option_type]:
-                        if all_assets[option_type][alt_asset].get("open", False):
-                            # Actualizar a la alternativa
-                            self.logger.info(f"✅ Cambiando {pair} de {current_asset} a {alt_asset} ({option_type})")
-                            self.iqoption_pairs[pair] = alt_asset
-                            self.pair_option_types[pair] = option_type
-                            return True
-            
-            # Si no hay alternativas, eliminar el par temporalmente
-            self.logger.warning(f"❌ No hay alternativas disponibles para {pair}, eliminándolo temporalmente")
-            if pair in self.valid_pairs:
-                self.valid_pairs.remove(pair)
-            return False
+            if self.stream_mode:
+                self._sync_candle_streams()
+            return True
         
         return True
     
-    def calculate_position_size(self):
+    def current_balance(self, force_reconcile=False):
+        """
+        Balance actual servido desde el balance local
+        
+        Solo consulta a IQ Option cuando toca reconciliar, y nunca mientras
+        haya órdenes expiradas sin liquidar (el bróker ya incluiría su pago y
+        se contaría dos veces al liquidarlas).
+        """
+        ledger = self.balance_ledger
+        with self.state_lock:
+            reconcile = (force_reconcile or ledger.needs_reconcile()) and not self._has_unsettled_expired_orders()
+            version = ledger.version
+        if reconcile:
+            # Consulta fuera del lock: los demás pares no esperan al bróker
+            broker_balance = self.api_call_with_timeout(self.iqoption.get_balance)
+            with self.state_lock:
+                # Si entretanto se colocó o liquidó una orden, la respuesta ya no cuadra
+                if broker_balance is not None and ledger.version == version:
+                    drift = ledger.reconcile(broker_balance)
+                    if ledger.has_drift(drift):
+                        self.logger.warning(f"⚠️ Balance local corregido en {format_currency(drift)}")
+        return ledger.balance
+    
+    def _has_unsettled_expired_orders(self):
+        now = datetime.now()
+        return any(
+            order["expiry_time"] <= now
+            for orders in self.active_options.values()
+            for order in orders
+        )
+    
+    def calculate_position_size(self, current_capital=None):
         """Calcular tamaño de posición basado en el capital actual"""
-        current_capital = self.api_call_with_timeout(self.iqoption.get_balance)
         if current_capital is None:
-            current_capital = self.initial_capital
+            current_capital = self.current_balance()
         
         position_size = round(current_capital * self.position_size_percent, 2)
         return min(self.max_position_size, max(self.min_position_size, position_size))
     
     def get_rsi(self, pair):
         """Obtener RSI para un par específico usando velas de 5 minutos"""
+        return self.score_pairs([pair]).get(pair)
+    
+    def score_pairs(self, pairs, deadline=None):
+        """
+        Calcular el RSI de varios pares a la vez
+        
+        Primero se actualizan las velas de todos los pares (en paralelo, con
+        plazo común) y después se calculan los RSI: los motores sin estado se
+        siembran todos juntos en un solo paso vectorizado y el resto se
+        actualiza en O(1).
+        
+        Returns:
+            dict: RSI por par (solo pares con datos nuevos y RSI válido)
+        """
+        if deadline is None:
+            deadline = time.time() + PAIR_DEADLINE
+        
+        futures = {}
+        for pair in pairs:
+            if self._fetch_in_flight(pair):
+                continue
+            stale = threading.Event()
+            futures[self.pair_executor.submit(self._fetch_pair_candles, pair, deadline, stale)] = (pair, stale)
+        if not futures:
+            return {}
+        done, not_done = wait(futures, timeout=max(0.0, deadline - time.time()))
+        
+        # Antes de reprogramar los pares: lo que llegue tarde se descarta
+        for future in not_done:
+            pair, stale = futures[future]
+            self._abandon_candle_fetch(pair, future, stale)
+            self.logger.warning(f"⏱️ {pair}: velas no recibidas dentro del plazo")
+        
+        deltas = {}
+        for future in done:
+            pair, _ = futures[future]
+            try:
+                fetched = future.result()
+            except Exception as e:
+                self.logger.error(f"❌ Error obteniendo RSI para {pair}: {str(e)}")
+                continue
+            if fetched:
+                deltas[pair] = fetched
+        
+        return self.score_candle_deltas(deltas)
+    
+    def score_candle_deltas(self, deltas):
+        """
+        Calcular el RSI de los pares a partir de las velas recién recibidas
+        
+        Args:
+            deltas: (activo, velas nuevas) por par, con el activo capturado al
+                descargar (la última vela de cada lista en formación)
+        
+        Returns:
+            dict: RSI por par (solo pares con RSI válido)
+        """
+        # La revalidación puede haber cambiado la variante del par durante la
+        # descarga: esas velas son del activo anterior y se descartan
+        current = {}
+        for pair, (asset_name, candles) in deltas.items():
+            if self.iqoption_pairs.get(pair) != asset_name:
+                self.logger.debug(f"🔀 {pair}: el activo cambió durante la descarga, se omite en este ciclo")
+                continue
+            current[pair] = (asset_name, candles)
+        
+        with self.buffers_lock:
+            cold_assets = [
+                asset_name for asset_name, _ in current.values()
+                if not (asset_name in self.rsi_engines and self.rsi_engines[asset_name].ready)
+            ]
+        if cold_assets:
+            self._seed_rsi_engines(cold_assets)
+        
+        rsi_values = {}
+        for pair, (asset_name, candles) in current.items():
+            try:
+                rsi = self._update_rsi_engine(asset_name, candles)
+            except Exception as e:
+                self.logger.error(f"❌ Error obteniendo RSI para {pair}: {str(e)}")
+                continue
+            
+            if rsi is None:
+                self.logger.warning(f"⚠️ No se pudo calcular RSI para {pair}")
+                continue
+            
+            self.logger.debug(f"📊 {pair} - RSI(5min): {rsi:.2f}")
+            rsi_values[pair] = rsi
+        
+        return rsi_values
+    
+    def _seed_rsi_engines(self, asset_names):
+        """Sembrar los motores RSI de varios activos con una sola pasada vectorizada"""
+        with self.buffers_lock:
+            # Agrupar por número de velas para formar matrices rectangulares
+            groups = defaultdict(list)
+            for asset_name in asset_names:
+                buffer = self.candle_buffers.get(asset_name)
+                # Hacen falta period + 1 velas cerradas además de la vela en formación
+                if buffer is not None and len(buffer) >= self.rsi_period + 2:
+                    groups[len(buffer)].append(asset_name)
+            
+            for assets in groups.values():
+                # La última vela de cada buffer está en formación: no se confirma
+                rows = [self.candle_buffers[asset_name].closes()[:-1] for asset_name in assets]
+                avg_gains, avg_losses = wilder_averages_batch(rows, self.rsi_period)
+            
+                for i, asset_name in enumerate(assets):
+                    last_closed_from = int(self.candle_buffers[asset_name].timestamps()[-2])
+                    self.rsi_engines[asset_name] = WilderRSI.from_averages(
+                        self.rsi_period, avg_gains[i], avg_losses[i], rows[i][-1], last_closed_from
+                    )
+                self.logger.debug(f"📊 RSI sembrado en bloque para {len(assets)} activos")
+    
+    def _fetch_in_flight(self, pair):
+        """La descarga abandonada de un ciclo anterior sigue en curso (no solapar otra)"""
+        previous = self.stale_fetches.get(pair)
+        if previous is None:
+            return False
+        if previous.done():
+            self.stale_fetches.pop(pair, None)
+            return False
+        self.logger.debug(f"⏳ {pair}: la descarga anterior sigue en curso, se omite en este ciclo")
+        return True
+    
+    def _abandon_candle_fetch(self, pair, future, stale):
+        """Descarga fuera de plazo: cancelarla o, si ya corre, marcarla para descartar su resultado"""
+        if not future.cancel():
+            stale.set()
+            self.stale_fetches[pair] = future
+    
+    def _fetch_pair_candles(self, pair, deadline, stale=None):
+        """
+        Obtener las velas nuevas de un par (se ejecuta en el pool de pares)
+        
+        Returns:
+            tuple: (activo, velas) con el activo leído al empezar la descarga,
+            o None si no hay datos nuevos o el par ya no tiene activo
+        """
+        asset_name = self.iqoption_pairs.get(pair)
+        if asset_name is None:
+            return None  # Retirado por la revalidación
+        
+        if self.stream_mode:
+            # Sin datos nuevos: nada que evaluar
+            candles = self._consume_candle_stream(asset_name)
+        else:
+            candles = self._refresh_candles(asset_name, deadline, stale)
+            if not candles and not (stale is not None and stale.is_set()):
+                self.logger.warning(f"⚠️ No se pudo calcular RSI para {pair}")
+        if not candles:
+            return None
+        return asset_name, candles
+    
+    def _get_candles(self, asset_name, count, endtime, timeout):
+        """
+        Descargar velas de un activo esperando como máximo `timeout` segundos
+        
+        Con el websocket enganchado cada petición recibe su propia respuesta y
+        las descargas de distintos pares se solapan. Si no, la librería guarda
+        la respuesta en un único atributo compartido y hay que serializarlas.
+        """
+        active_id = OP_code.ACTIVES.get(asset_name)
+        if self.candle_requests.installed and active_id is not None:
+            return self.api_call_with_timeout(
+                self.candle_requests.fetch,
+                active_id,
+                self.candle_timeframe,
+                count,
+                endtime,
+                timeout,
+                timeout=timeout,
+                endpoint="candles"
+            )
+        
+        if not self.candles_lock.acquire(timeout=timeout):
+            self.logger.warning(f"⏱️ {asset_name}: sin turno para pedir velas dentro del plazo")
+            return None
         try:
-            # Asegurarnos de usar timeframe de 5 minutos (300 segundos)
-            candles = self.api_call_with_timeout(
+            return self.api_call_with_timeout(
                 self.iqoption.get_candles,
-                self.iqoption_pairs[pair],
-                300,  # 5 minutos
-                100,
-                time.time()
+                asset_name,
+                self.candle_timeframe,
+                count,
+                endtime,
+                timeout=timeout
             )
+        finally:
+            self.candles_lock.release()
+    
+    def _refresh_candles(self, asset_name, deadline=None, stale=None):
+        """
+        Actualizar el buffer de velas del activo pidiendo solo las velas nuevas
+        
+        La primera vez se siembra con CANDLE_BUFFER_SIZE velas. Después solo se
+        piden las velas desde el último 'from' guardado (incluida la vela en
+        formación, que se reemplaza).
+        
+        Returns:
+            list: Velas recibidas en esta llamada (la última en formación) o None
+        """
+        with self.buffers_lock:
+            buffer = self.candle_buffers.get(asset_name)
+            if buffer is None:
+                buffer = CandleBuffer(CANDLE_BUFFER_SIZE)
+                self.candle_buffers[asset_name] = buffer
+            last_timestamp = buffer.last_timestamp if len(buffer) > 0 else None
+        
+        now = time.time()
+        count = CANDLE_BUFFER_SIZE
+        if last_timestamp is not None:
+            missing = int((now - last_timestamp) // self.candle_timeframe) + 1
+            count = min(CANDLE_BUFFER_SIZE, max(1, missing))
+        
+        # Asegurarnos de usar timeframe de 5 minutos (300 segundos)
+        timeout = API_TIMEOUT if deadline is None else max(0.0, min(API_TIMEOUT, deadline - now))
+        candles = self._get_candles(asset_name, count, now, timeout)
+        if not candles:
+            return None
+        if stale is not None and stale.is_set():
+            # El par ya se reprogramó sin esta descarga: no tocar el buffer
+            return None
+        
+        with self.buffers_lock:
+            if self.candle_buffers.get(asset_name) is not buffer:
+                # La sincronización de streams reemplazó el buffer durante la descarga
+                return None
+            if count >= CANDLE_BUFFER_SIZE:
+                buffer.seed(candles)
+            else:
+                buffer.merge(candles)
+        return candles
+    
+    def _sync_candle_streams(self, force=False):
+        """
+        Ajustar las suscripciones de velas en tiempo real a los activos en uso
+        
+        Args:
+            force: Descartar las suscripciones conocidas (tras reconectar)
+        """
+        # Puede llamarse desde la revalidación en segundo plano y desde el bucle
+        with self.streams_lock:
+            if force:
+                self.candle_streams = set()
             
-            if candles and len(candles) >= self.rsi_period:
-                rsi = calculate_rsi(candles, self.rsi_period)
-                if rsi is not None:
-                    self.logger.debug(f"📊 {pair} - RSI(5min): {rsi:.2f}")
-                return rsi
+            desired = {self.iqoption_pairs[pair]: pair for pair in self.valid_pairs}
             
-            self.logger.warning(f"⚠️ No se pudo calcular RSI para {pair}")
-            return None
+            # Cancelar suscripciones de variantes que ya no se usan
+            for asset_name in list(self.candle_streams):
+                if asset_name not in desired:
+                    self.api_call_with_timeout(
+                        self.iqoption.stop_candles_stream,
+                        asset_name,
+                        self.candle_timeframe
+                    )
+                    self.candle_streams.discard(asset_name)
+                    self.logger.info(f"📴 Stream de velas detenido: {asset_name}")
             
+            # Suscribir las nuevas: buffer y RSI se siembran aparte y en paralelo
+            new_assets = [(asset_name, pair) for asset_name, pair in desired.items()
+                          if asset_name not in self.candle_streams]
+            if not new_assets:
+                return
+            with ThreadPoolExecutor(max_workers=min(len(new_assets), API_LANES.get("candles", 4))) as pool:
+                prepared = list(pool.map(self._prepare_candle_stream, [asset_name for asset_name, _ in new_assets]))
+            
+            # Reemplazo de una vez: los pares ven el buffer anterior o el nuevo, nunca uno a medias
+            with self.buffers_lock:
+                for asset_name, buffer, engine in prepared:
+                    self.candle_buffers[asset_name] = buffer
+                    if engine is not None:
+                        self.rsi_engines[asset_name] = engine
+                    else:
+                        self.rsi_engines.pop(asset_name, None)
+            
+            for asset_name, pair in new_assets:
+                self.candle_streams.add(asset_name)
+                self.logger.info(f"📡 Stream de velas iniciado: {pair} → {asset_name}")
+    
+    def _prepare_candle_stream(self, asset_name):
+        """
+        Sembrar un buffer y un motor RSI nuevos para el activo y suscribir su
+        stream, sin tocar los que están usando los pares
+        
+        Returns:
+            tuple: (activo, buffer, motor RSI o None si no llegaron velas)
+        """
+        buffer = CandleBuffer(CANDLE_BUFFER_SIZE)
+        engine = None
+        candles = self._get_candles(asset_name, CANDLE_BUFFER_SIZE, time.time(), API_TIMEOUT)
+        if candles:
+            buffer.seed(candles)
+            engine = WilderRSI(self.rsi_period)
+            # La última vela está en formación: no se confirma
+            for candle in candles[:-1]:
+                engine.update(candle['close'], candle['from'])
+        
+        self.api_call_with_timeout(
+            self.iqoption.start_candles_stream,
+            asset_name,
+            self.candle_timeframe,
+            STREAM_MAX_CANDLES
+        )
+        return asset_name, buffer, engine
+    
+    def _consume_candle_stream(self, asset_name):
+        """
+        Volcar las velas recibidas por el stream en el buffer del activo
+        
+        Returns:
+            list: Velas nuevas o modificadas (la última en formación) o None si
+            no hubo cambios desde la última lectura
+        """
+        with self.buffers_lock:
+            buffer = self.candle_buffers.get(asset_name)
+            last_timestamp = buffer.last_timestamp if buffer is not None else None
+        if asset_name not in self.candle_streams or buffer is None:
+            return None
+        
+        try:
+            realtime = dict(self.iqoption.get_realtime_candles(asset_name, self.candle_timeframe))
         except Exception as e:
-            self.logger.error(f"❌ Error obteniendo RSI para {pair}: {str(e)}")
+            self.logger.debug(f"Stream de {asset_name} no disponible: {str(e)}")
+            return None
+        
+        candles = sorted(
+            (candle for candle in realtime.values()
+             if last_timestamp is None or candle['from'] >= last_timestamp),
+            key=lambda candle: candle['from']
+        )
+        if not candles:
             return None
+        with self.buffers_lock:
+            # El buffer pudo reemplazarse (resincronización) mientras se leía el stream
+            if self.candle_buffers.get(asset_name) is not buffer or not buffer.merge(candles):
+                return None
+        return candles
+    
+    def _update_rsi_engine(self, asset_name, candles):
+        """
+        Confirmar en el motor RSI del activo las velas cerradas nuevas y
+        devolver el RSI provisional con la vela en formación (la última)
+        """
+        with self.buffers_lock:
+            engine = self.rsi_engines.get(asset_name)
+            if engine is None:
+                engine = WilderRSI(self.rsi_period)
+                self.rsi_engines[asset_name] = engine
+            
+            closed_candles = candles[:-1]
+            forming_candle = candles[-1]
+            
+            # Si faltan velas entre el estado guardado y los datos recibidos, re-sembrar
+            if engine.last_timestamp is not None and closed_candles:
+                if closed_candles[0]['from'] > engine.last_timestamp + self.candle_timeframe:
+                    self.logger.debug(f"🔄 {asset_name}: hueco en las velas, reiniciando RSI")
+                    engine.reset()
+            
+            for candle in closed_candles:
+                if engine.last_timestamp is None or candle['from'] > engine.last_timestamp:
+                    engine.update(candle['close'], candle['from'])
+            
+            return engine.peek(forming_candle['close'])
     
     def place_option(self, pair, direction, amount):
         """Colocar una opción binaria con reintentos automáticos"""
@@ -631,7 +1204,6 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
         while retry_count < max_retries:
             try:
                 asset_name = self.iqoption_pairs[pair]
-                option_type = self.pair_option_types[pair]
                 
                 self.logger.info(f"📈 Colocando {direction} en {pair} ({asset_name}), cantidad: {format_currency(amount)}")
                 
@@ -655,7 +1227,6 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
                         if self.handle_trading_error(pair, error_msg):
                             retry_count += 1
                             self.logger.info(f"🔄 Reintentando con activo alternativo... (intento {retry_count + 1}/{max_retries})")
-                            time.sleep(1)  # Pequeña pausa antes de reintentar
                             continue
                     
                     self.logger.error(f"❌ Error colocando orden: {error_msg}")
@@ -675,25 +1246,128 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
         
         return None
     
-    def process_currency_pair(self, pair):
-        """Procesar señales para un par de divisas"""
+    def can_signal(self, pair):
+        """Verificar si un par puede generar una nueva señal"""
         # ELIMINADO: Verificación de bloqueo diario
         # if self.daily_lockouts.get(pair, False):
-        #     return
+        #     return False
         
-        # Verificar si hay órdenes activas
-        if len(self.active_options.get(pair, [])) > 0:
-            return
+        # Verificar si hay órdenes activas o una compra en curso
+        if len(self.active_options.get(pair, [])) > 0 or pair in self.placing:
+            return False
         
         # Verificar tiempo desde última señal (ahora 1 hora)
         time_since_last = (datetime.now() - self.last_signal_time.get(pair, datetime.min)).total_seconds() / 60
-        if time_since_last < self.min_time_between_signals:
+        return time_since_last >= self.min_time_between_signals
+    
+    def _cooldown_end(self, pair):
+        """Momento (epoch) en que termina la espera entre señales del par"""
+        last_signal = self.last_signal_time.get(pair, datetime.min)
+        if last_signal == datetime.min:
+            return 0
+        return (last_signal + timedelta(minutes=self.min_time_between_signals)).timestamp()
+    
+    def _next_bar_close(self, pair, now):
+        """Momento (epoch) en que cierra la vela actual del par"""
+        with self.buffers_lock:
+            buffer = self.candle_buffers.get(self.iqoption_pairs.get(pair))
+            last_timestamp = buffer.last_timestamp if buffer is not None and len(buffer) > 0 else None
+        if last_timestamp is not None:
+            bar_close = last_timestamp + self.candle_timeframe
+            if bar_close > now:
+                return bar_close
+        return (int(now // self.candle_timeframe) + 1) * self.candle_timeframe
+    
+    def _sync_eligibility(self):
+        """Alinear el índice de elegibilidad con la lista de pares válidos"""
+        valid = set(self.valid_pairs)
+        for pair in self.eligibility.pairs():
+            if pair not in valid:
+                self.eligibility.remove(pair)
+        
+        for pair in self.valid_pairs:
+            if pair in self.eligibility:
+                continue
+            if self.active_options.get(pair):
+                self.eligibility.block(pair)
+            else:
+                self.eligibility.schedule(pair, self._cooldown_end(pair))
+    
+    def _release_pair(self, pair):
+        """El par ya no tiene órdenes activas: vuelve a ser elegible tras la espera"""
+        if pair in self.valid_pairs:
+            self.eligibility.schedule(pair, self._cooldown_end(pair))
+    
+    def _due_pairs(self, now):
+        """Pares cuyo momento de elegibilidad ya llegó"""
+        due_pairs = []
+        for pair in self.eligibility.pop_due(now):
+            if pair not in self.iqoption_pairs:
+                self.eligibility.remove(pair)
+            elif self.can_signal(pair):
+                due_pairs.append(pair)
+            else:
+                self._schedule_next_evaluation(pair, now)
+        return due_pairs
+    
+    def _schedule_next_evaluation(self, pair, now):
+        """Programar la siguiente evaluación del par tras su evaluación actual"""
+        if self.active_options.get(pair) or pair in self.placing:
+            self.eligibility.block(pair)  # Se libera al liquidar la orden
+            return
+        
+        if self.bar_close_scheduler:
+            # Justo tras el cierre de vela
+            next_time = self._next_bar_close(pair, now) + BAR_CLOSE_DELAY
+        else:
+            next_time = now  # Ciclo fijo: en el próximo ciclo
+        self.eligibility.schedule(pair, max(next_time, self._cooldown_end(pair)))
+    
+    def _finish_late_evaluation(self, pair, future):
+        """El procesamiento fuera de plazo terminó: reprogramar el par (seguía bloqueado)"""
+        with self.state_lock:
+            self._schedule_next_evaluation(pair, time.time())
+    
+    def _seconds_until_next_event(self, now):
+        """
+        Segundos hasta el próximo momento en que algo puede cambiar: cierre de
+        vela de un par, fin de espera entre señales, expiración de una orden
+        o cambio de horario de un activo
+        """
+        wake_time = now + MAX_IDLE_SLEEP
+        
+        next_due = self.eligibility.next_due_time()
+        if next_due is not None:
+            wake_time = min(wake_time, next_due)
+        
+        next_settlement = self.settlement_queue.next_due_time()
+        if next_settlement is not None:
+            wake_time = min(wake_time, next_settlement)
+        
+        if self.next_schedule_boundary is not None:
+            wake_time = min(wake_time, self.next_schedule_boundary)
+        
+        return max(0.0, wake_time - now)
+    
+    def process_currency_pair(self, pair, current_rsi=None, detected_at=None):
+        """
+        Procesar señales para un par de divisas
+        
+        Args:
+            detected_at: Momento (perf_counter) en que se calculó el RSI; la
+                latencia señal→ack se mide desde ahí
+        """
+        if not self.can_signal(pair):
             return
         
-        # Obtener RSI
-        current_rsi = self.get_rsi(pair)
+        # Obtener RSI (si no viene ya calculado en bloque desde run())
+        if current_rsi is None:
+            current_rsi = self.get_rsi(pair)
+            detected_at = None
         if current_rsi is None:
             return
+        if detected_at is None:
+            detected_at = time.perf_counter()
         
         # Generar señal - LÓGICA INVERTIDA
         signal = None
@@ -705,24 +1379,51 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
             self.logger.info(f"🟢 {pair} - Señal CALL (RSI: {current_rsi:.2f})")
         
         if signal:
-            self.create_binary_option(pair, signal, current_rsi)
-            self.last_signal_time[pair] = datetime.now()
-    
-    def create_binary_option(self, pair, direction, rsi_value):
-        """Crear una opción binaria"""
-        # Calcular tamaño de posición
-        bet_size = self.calculate_position_size()
-        
-        # Verificar capital disponible
-        current_balance = self.api_call_with_timeout(self.iqoption.get_balance)
-        if current_balance is None or current_balance < bet_size:
-            self.logger.warning(f"⚠️ Capital insuficiente para {pair}")
-            return
+            # Marcar la compra bajo el lock: buy puede tardar más que el plazo del
+            # ciclo y, sin orden activa todavía, el par volvería a dar señal
+            with self.state_lock:
+                if not self.can_signal(pair):
+                    return
+                self.placing.add(pair)
+            try:
+                self.create_binary_option(pair, signal, current_rsi, detected_at)
+            finally:
+                with self.state_lock:
+                    self.last_signal_time[pair] = datetime.now()
+                    self.placing.discard(pair)
+    
+    def create_binary_option(self, pair, direction, rsi_value, detected_at=None):
+        """Crear una opción binaria (la latencia se mide desde `detected_at`, el cruce del umbral)"""
+        signal_started = detected_at if detected_at is not None else time.perf_counter()
+        
+        # Tamaño desde el balance local, sin consultar al bróker: check_stop_loss
+        # ya reconcilia (si toca) al inicio de cada ciclo
+        with self.state_lock:
+            current_balance = self.balance_ledger.balance
+            bet_size = self.calculate_position_size(current_balance)
+            
+            if current_balance < bet_size:
+                self.logger.warning(f"⚠️ Capital insuficiente para {pair}")
+                return
+            
+            # Reservar la inversión antes de comprar para que otros pares no la usen
+            self.balance_ledger.stake(bet_size)
         
         # Colocar orden
         order_id = self.place_option(pair, direction, bet_size)
         
-        if order_id:
+        latency_ms = (time.perf_counter() - signal_started) * 1000
+        self.order_latencies.append(latency_ms)
+        self.logger.info(f"⚡ Latencia señal→ack: {latency_ms:.0f} ms")
+        
+        with self.state_lock:
+            if not order_id:
+                # Devolver la reserva; un timeout pudo dejar la orden colocada,
+                # así que reconciliar en la próxima consulta
+                self.balance_ledger.settle(bet_size)
+                self.balance_ledger.mark_dirty()
+                return
+            
             # Registrar orden activa
             order_info = {
                 "id": order_id,
@@ -732,40 +1433,214 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
                 "entry_time": datetime.now(),
                 "expiry_time": datetime.now() + timedelta(minutes=self.expiry_minutes),
                 "rsi": rsi_value,
-            "balance_before": current_balance  # NUEVO: Guardar balance antes,
-             # NUEVO: Guardar balance antes
+                "option_type": self.pair_option_types.get(pair, "binary"),
+                "balance_before": current_balance  # NUEVO: Guardar balance antes
             }
             self.active_options[pair].append(order_info)
-            self.logger.info(f"📝 Orden registrada para {pair}")
+            self._track_order(pair, order_info)
+            self._journal("order_placed", pair=pair, order=self._serialize_order(order_info))
+            self.trade_ledger.record_order(order_info, self.iqoption_pairs.get(pair))
+        self.logger.info(f"📝 Orden registrada para {pair}")
+    
+    def _track_order(self, pair, order):
+        """Seguir una orden activa: cola de liquidación y aviso push de su resultado"""
+        self.settlement_queue.push(pair, order)
+        self.eligibility.block(pair)
+        
+        future = self.settlement_index.register(order["id"])
+        future.add_done_callback(partial(self._on_settlement_pushed, pair, order))
+    
+    def _on_settlement_pushed(self, pair, order, future):
+        """
+        Callback del Future de resultado (se ejecuta en el hilo del websocket)
+        
+        No toca el estado: encola el resultado y despierta el bucle principal
+        para no bloquear el websocket.
+        """
+        if future.cancelled():
+            return
+        self.settlement_events.put((pair, order, future.result()))
+        self.wake_event.set()
+    
+    def process_pushed_settlements(self):
+        """Aplicar los resultados que el websocket ya entregó"""
+        while True:
+            try:
+                pair, order, record = self.settlement_events.get_nowait()
+            except queue.Empty:
+                return
+            
+            # Puede haberse liquidado ya por la cola de expiración
+            if order not in self.active_options.get(pair, []):
+                continue
+            
+            self.logger.info(f"📨 Resultado recibido para orden {order['id']} ({record['source']})")
+            self._apply_settlement_record(pair, order, record)
+            self._remove_active_order(pair, order)
+    
+    def _apply_settlement_record(self, pair, order, record):
+        """Registrar ganancia, pérdida o empate según un resultado indexado"""
+        win_amount = self._settlement_win_amount(order, record)
+        if record['win'] == 'win':
+            self.process_win(pair, order, win_amount)
+        elif record['win'] == 'equal':
+            self.process_tie(pair, order)
+        else:
+            self.process_loss(pair, order)
     
     def check_active_orders(self):
-        """Verificar el estado de las órdenes activas"""
-        current_time = datetime.now()
+        """
+        Liquidar las órdenes cuyo vencimiento (expiración + margen) ya llegó
         
-        for pair in list(self.active_options.keys()):
-            remaining_orders = []
+        Se llama sin state_lock: las órdenes vencidas se sacan de la cola bajo
+        el lock, las consultas al broker se hacen fuera y el lock se vuelve a
+        tomar solo para aplicar cada resultado.
+        """
+        now = time.time()
+        
+        with self.state_lock:
+            # La orden pudo liquidarse por otra vía mientras esperaba en la cola
+            due_orders = [
+                (pair, order, attempts)
+                for pair, order, attempts in self.settlement_queue.pop_due(now)
+                if order in self.active_options.get(pair, [])
+            ]
             
-            for order in self.active_options[pair]:
-                # Calcular tiempo desde expiración
-                time_since_expiry = (current_time - order["expiry_time"]).total_seconds()
-                
-                # Si la orden expiró hace más de 15 segundos, procesarla
-                if time_since_expiry > 15:
-                    self.process_expired_order(pair, order)
-                # Si expiró pero es muy reciente, esperar un poco más
-                elif order["expiry_time"] <= current_time:
-                    self.logger.debug(f"⏳ Orden {order['id']} expiró hace {time_since_expiry:.0f}s, esperando...")
-                    remaining_orders.append(order)
-                else:
-                    remaining_orders.append(order)
+            if self.recovery_in_progress:
+                # La recuperación en segundo plano todavía está resolviendo las órdenes restauradas
+                for pair, order, attempts in due_orders:
+                    if order.get("recovered"):
+                        self.settlement_queue.retry(pair, order, attempts, now)
+                due_orders = [due for due in due_orders if not due[1].get("recovered")]
+        if not due_orders:
+            return
+        
+        # Una sola consulta de historial para todas las órdenes sin resultado
+        unresolved = [order for _, order, _ in due_orders
+                      if self.settlement_index.lookup(order['id']) is None]
+        if unresolved and USE_POSITION_HISTORY:
+            self.reconcile_position_history(unresolved)
+        
+        for pair, order, attempts in due_orders:
+            if self.process_expired_order(pair, order):
+                continue
+            with self.state_lock:
+                if order in self.active_options.get(pair, []):
+                    self.logger.debug(f"⏳ Orden {order['id']} sin resultado, reintento #{attempts + 1}")
+                    self.settlement_queue.retry(pair, order, attempts, now)
+    
+    def reconcile_position_history(self, orders):
+        """
+        Buscar en bloque el resultado de varias órdenes en el historial
+        
+        Hace una consulta de historial por tipo de instrumento cubriendo la
+        ventana de todas las órdenes y vuelca los resultados encontrados en
+        el índice de resultados, de donde los toma process_expired_order.
+        
+        Returns:
+            int: Número de órdenes resueltas
+        """
+        pending_ids = {str(order['id']) for order in orders}
+        start = int(min(order['entry_time'] for order in orders).timestamp()) - 60
+        end = int(time.time())
+        limit = max(50, len(orders) * 4)
+        
+        instrument_types = {
+            "turbo-option" if order.get("option_type") == "turbo" else "binary-option"
+            for order in orders
+        }
+        
+        resolved = 0
+        for instrument_type in instrument_types:
+            history = self.api_call_with_timeout(
+                self.iqoption.get_position_history_v2,
+                instrument_type,
+                limit,
+                0,
+                start,
+                end,
+                timeout=POSITION_HISTORY_TIMEOUT
+            )
             
-            if remaining_orders:
-                self.active_options[pair] = remaining_orders
-            else:
-                del self.active_options[pair]
+            for position in self._extract_positions(history):
+                # 'external_id' es el id de la opción en el historial v2 ('id' es un hash)
+                for key in ('external_id', 'id'):
+                    position_id = str(position.get(key))
+                    if position_id in pending_ids:
+                        win, win_amount = self._position_result(position)
+                        self.settlement_index.record(
+                            position_id,
+                            win,
+                            win_amount=win_amount,
+                            source="position_history"
+                        )
+                        if self.settlement_index.lookup(position_id) is not None:
+                            pending_ids.discard(position_id)
+                            resolved += 1
+                        break
+        
+        if DEBUG_ORDER_RESULTS:
+            self.logger.info(f"📋 Historial: {resolved}/{len(orders)} órdenes resueltas en bloque")
+        return resolved
+    
+    @staticmethod
+    def _position_result(position):
+        """
+        Resultado y monto devuelto de una posición del historial
+        
+        En v2 el resultado va en 'close_reason' (win/loose/equal) y el monto
+        devuelto en 'close_profit' (inversión incluida); el evento original
+        de la opción viene en 'raw_event'. Se aceptan también los campos v1
+        ('win'/'win_amount').
+        
+        Returns:
+            tuple: (resultado, monto devuelto o None)
+        """
+        raw_event = position.get('raw_event') or {}
+        if position.get('status') not in (None, 'closed'):
+            return None, None  # Posición todavía abierta
+        
+        win = position.get('close_reason') or raw_event.get('result') or position.get('win')
+        win_amount = position.get('close_profit')
+        if win_amount is None:
+            win_amount = raw_event.get('profit_amount', position.get('win_amount'))
+        return win, win_amount
+    
+    def _remove_active_order(self, pair, order):
+        """Quitar una orden liquidada de las activas y liberar el par si queda libre"""
+        orders = self.active_options.get(pair, [])
+        if order in orders:
+            orders.remove(order)
+        self.settlement_queue.discard(order["id"])
+        self.settlement_index.forget(order["id"])
+        
+        if pair in self.active_options and not self.active_options[pair]:
+            del self.active_options[pair]
+            self._release_pair(pair)
+    
+    def _settle_expired(self, pair, order, apply, *args):
+        """
+        Aplicar bajo el lock el resultado de una orden vencida y retirarla
+        
+        Mientras se consultaba al broker un push pudo liquidar la orden: en
+        ese caso no se vuelve a registrar.
+        """
+        with self.state_lock:
+            if order not in self.active_options.get(pair, []):
+                return
+            apply(pair, order, *args)
+            self._remove_active_order(pair, order)
     
     def process_expired_order(self, pair, order):
-        """Procesar una orden expirada - VERSIÓN FINAL CON TODOS LOS MÉTODOS"""
+        """
+        Procesar una orden expirada - VERSIÓN FINAL CON TODOS LOS MÉTODOS
+        
+        Las consultas al broker se hacen sin state_lock; el resultado se
+        aplica con _settle_expired, que también retira la orden.
+        
+        Returns:
+            bool: True si la orden quedó liquidada, False si sigue pendiente
+        """
         try:
             self.logger.info(f"🔄 Verificando orden {order['id']}...")
             
@@ -775,59 +1650,27 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
             # Si es muy reciente, esperar
             if time_since_expiry < 10:
                 self.logger.info(f"⏳ Orden muy reciente ({time_since_expiry:.0f}s), esperando...")
-                return
+                return False
             
             # Variables para resultado
             result_found = False
             win_status = None
             win_amount = 0
             
-            # MÉTODO 1: Verificar en api.order_binary (MÁS CONFIABLE)
-            if hasattr(self.iqoption.api, 'order_binary') and order['id'] in self.iqoption.api.order_binary:
-                order_data = self.iqoption.api.order_binary[order['id']]
-                self.logger.info(f"📋 Orden encontrada en order_binary")
-                
-                # Leer el resultado directamente
-                if 'result' in order_data:
-                    result = order_data['result'].lower()
-                    if result == 'win':
-                        win_status = 'win'
-                        # Calcular ganancia
-                        profit_percent = order_data.get('profit_percent', 85)
-                        win_amount = order["size"] * (1 + profit_percent / 100)
-                        result_found = True
-                        self.logger.info(f"   Result: WIN (profit: {profit_percent}%)")
-                    elif result == 'loose':
-                        win_status = 'loose'
-                        win_amount = 0
-                        result_found = True
-                        self.logger.info(f"   Result: LOOSE")
-                    elif result == 'equal':
-                        win_status = 'equal'
-                        win_amount = order["size"]
-                        result_found = True
-                        self.logger.info(f"   Result: EQUAL")
-            
-            # MÉTODO 2: Verificar en api.listinfodata
-            if not result_found and hasattr(self.iqoption.api, 'listinfodata') and isinstance(self.iqoption.api.listinfodata, dict):
-                self.logger.debug("📋 Buscando en listinfodata...")
-                for key, value in self.iqoption.api.listinfodata.items():
-                    if isinstance(value, list):
-                        for item in value:
-                            if isinstance(item, dict) and str(item.get('id')) == str(order['id']):
-                                result_found = True
-                                win_status = str(item.get('win', '')).lower()
-                                win_amount = float(item.get('win_amount', 0))
-                                
-                                self.logger.info(f"📋 Orden encontrada en listinfodata:")
-                                self.logger.info(f"   Win: {win_status}")
-                                self.logger.info(f"   Win Amount: {win_amount}")
-                                break
-                    if result_found:
-                        break
+            # MÉTODO 1: Índice de resultados (order_binary/listinfodata vía websocket)
+            record = self.settlement_index.lookup(order['id'])
+            if record is not None:
+                win_status = record['win']
+                win_amount = self._settlement_win_amount(order, record)
+                result_found = True
+                self.logger.info(f"📋 Orden encontrada en {record['source']}")
+                self.logger.info(f"   Result: {win_status.upper()} (monto: {win_amount:.2f})")
+            else:
+                self.logger.debug(f"📋 Orden {order['id']} aún sin resultado en el índice")
             
-            # MÉTODO 3: Verificar por balance (para cuentas REAL)
-            if not result_found and 'balance_before' in order:
+            # MÉTODO 2: Verificar por balance (para cuentas REAL)
+            # No sirve para órdenes restauradas: el balance de antes es de otra sesión
+            if not result_found and 'balance_before' in order and not order.get("recovered"):
                 current_balance = self.api_call_with_timeout(self.iqoption.get_balance)
                 if current_balance is not None:
                     balance_diff = current_balance - order['balance_before']
@@ -848,7 +1691,7 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
                             win_amount = 0
                             result_found = True
             
-            # MÉTODO 4: Intentar get_async_order como último recurso
+            # MÉTODO 3: Intentar get_async_order como último recurso
             if not result_found and time_since_expiry > 20:
                 self.logger.info("📋 Intentando get_async_order...")
                 order_result = self.api_call_with_timeout(
@@ -857,45 +1700,168 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
                     timeout=3
                 )
                 
-                if order_result and isinstance(order_result, dict):
+                if order.get("recovered"):
+                    # Solo un resultado explícito: sin él, una orden restaurada no se da por perdida
+                    if self._record_async_order(order, order_result):
+                        self._settle_expired(pair, order, self._apply_settlement_record, self.settlement_index.lookup(order['id']))
+                        return True
+                elif order_result and isinstance(order_result, dict):
                     # Procesar con la lógica original
-                    self._process_order_result(pair, order, order_result)
-                    return
+                    self._settle_expired(pair, order, self._process_order_result, order_result)
+                    return True
             
             # Procesar resultado si se encontró
             if result_found and win_status:
-                bet_size = order["size"]
-                
-                if win_status == 'win':
-                    self.logger.info(f"✅ Victoria detectada")
-                    self.process_win(pair, order, win_amount)
-                elif win_status == 'equal':
-                    self.logger.info(f"🟡 Empate detectado")
-                    self.process_tie(pair, order)
-                elif win_status == 'loose':
-                    self.logger.info(f"❌ Pérdida detectada")
-                    self.process_loss(pair, order)
-                else:
-                    # Si no podemos determinar, verificar por monto
-                    if win_amount > bet_size:
-                        self.process_win(pair, order, win_amount)
-                    elif win_amount == bet_size:
-                        self.process_tie(pair, order)
-                    else:
-                        self.process_loss(pair, order)
-                return
+                self._settle_expired(pair, order, self._apply_expired_result, win_status, win_amount)
+                return True
+            
+            # Orden restaurada sin resultado: se abandona sin registrarla como pérdida
+            if order.get("recovered"):
+                if time_since_expiry > RECOVERY_GIVE_UP:
+                    self._settle_expired(pair, order, self._abandon_recovered_order)
+                    return True
+                return False
             
             # Si han pasado más de 2 minutos y no hay resultado, asumir pérdida
             if time_since_expiry > 120:
                 self.logger.error(f"❌ No se pudo verificar orden después de {time_since_expiry:.0f}s")
                 self.logger.error(f"❌ Asumiendo pérdida por timeout")
-                self.process_loss(pair, order)
+                self._settle_expired(pair, order, self.process_loss)
+                return True
+            
+            # Sin resultado todavía: se reintentará más tarde
+            return False
                 
         except Exception as e:
             self.logger.error(f"❌ Error procesando orden expirada: {str(e)}")
             self.logger.error(f"Detalles: {traceback.format_exc()}")
+            if order.get("recovered"):
+                return False  # Reintentar: una orden restaurada no se da por perdida
             # En caso de error, registrar como pérdida para ser conservadores
+            self._settle_expired(pair, order, self.process_loss)
+            return True
+    
+    def _apply_expired_result(self, pair, order, win_status, win_amount):
+        """Registrar el resultado obtenido por índice o por balance"""
+        bet_size = order["size"]
+        
+        if win_status == 'win':
+            self.logger.info(f"✅ Victoria detectada")
+            self.process_win(pair, order, win_amount)
+        elif win_status == 'equal':
+            self.logger.info(f"🟡 Empate detectado")
+            self.process_tie(pair, order)
+        elif win_status == 'loose':
+            self.logger.info(f"❌ Pérdida detectada")
             self.process_loss(pair, order)
+        else:
+            # Si no podemos determinar, verificar por monto
+            if win_amount > bet_size:
+                self.process_win(pair, order, win_amount)
+            elif win_amount == bet_size:
+                self.process_tie(pair, order)
+            else:
+                self.process_loss(pair, order)
+    
+    def _record_async_order(self, order, order_result):
+        """
+        Volcar al índice el resultado de get_async_order si es explícito
+        
+        Acepta el campo 'win'/'result' en la raíz o dentro de los mensajes
+        del websocket ('option-closed', etc.).
+        
+        Returns:
+            bool: True si la orden quedó con resultado en el índice
+        """
+        if not isinstance(order_result, dict):
+            return False
+        candidates = [order_result] + [
+            value.get("msg", value) for value in order_result.values() if isinstance(value, dict)
+        ]
+        for candidate in candidates:
+            if not isinstance(candidate, dict):
+                continue
+            self.settlement_index.record(
+                order["id"],
+                candidate.get("win") or candidate.get("result"),
+                win_amount=candidate.get("win_amount"),
+                profit_percent=candidate.get("profit_percent"),
+                source="async_order"
+            )
+            if self.settlement_index.lookup(order["id"]) is not None:
+                return True
+        return False
+    
+    def _start_order_recovery(self):
+        """Lanzar la recuperación de órdenes restauradas sin retrasar el primer ciclo"""
+        orders = [(pair, order) for pair, orders in self.active_options.items() for order in orders]
+        if not orders:
+            return
+        self.recovery_in_progress = True
+        self.logger.info(f"🩺 Recuperando {len(orders)} órdenes de la sesión anterior en segundo plano...")
+        threading.Thread(target=self._recover_orders, args=(orders,), name="order-recovery", daemon=True).start()
+    
+    def _recover_orders(self, orders):
+        """
+        Resolver en bloque las órdenes restauradas que ya expiraron
+        
+        Primero una consulta de historial para todas y luego get_async_order
+        en paralelo para las que falten. Los resultados van al índice, cuyos
+        Futures los entregan al bucle principal como cualquier push.
+        """
+        started = time.time()
+        try:
+            now = datetime.now()
+            expired = [(pair, order) for pair, order in orders if order["expiry_time"] <= now]
+            
+            pending = [order for _, order in expired if self.settlement_index.lookup(order["id"]) is None]
+            if pending:
+                self.reconcile_position_history(pending)
+            
+            pending = [order for order in pending if self.settlement_index.lookup(order["id"]) is None]
+            if pending:
+                def lookup_async(order):
+                    return order, self.api_call_with_timeout(self.iqoption.get_async_order, order["id"], timeout=5)
+                
+                with ThreadPoolExecutor(max_workers=min(len(pending), API_LANES.get("orders", 3))) as pool:
+                    for order, order_result in pool.map(lookup_async, pending):
+                        self._record_async_order(order, order_result)
+            
+            resolved = [(pair, order) for pair, order in expired if self.settlement_index.lookup(order["id"]) is not None]
+            unresolved = [(pair, order) for pair, order in expired if self.settlement_index.lookup(order["id"]) is None]
+            
+            self.logger.info(f"🩺 Recuperación: {len(resolved)}/{len(expired)} órdenes expiradas resueltas en {time.time() - started:.1f}s ({len(orders) - len(expired)} siguen abiertas)")
+            for pair, order in resolved:
+                self.logger.info(f"   ✅ {order['id']} {pair}: {self.settlement_index.lookup(order['id'])['win'].upper()}")
+            for pair, order in unresolved:
+                self.logger.warning(f"   ❓ {order['id']} {pair}: sin resultado, se seguirá consultando (no cuenta como pérdida)")
+                
+        except Exception as e:
+            self.logger.error(f"❌ Error recuperando órdenes: {str(e)}")
+        finally:
+            self.recovery_in_progress = False
+            self.wake_event.set()
+    
+    def _abandon_recovered_order(self, pair, order):
+        """Dejar de seguir una orden restaurada cuyo resultado nunca apareció"""
+        self.logger.warning(f"❓ Orden restaurada {order['id']} ({pair}) sin resultado tras {RECOVERY_GIVE_UP}s: se descarta sin registrar pérdida")
+        self._journal_settlement(pair, order, "unresolved")
+        self.trade_ledger.record_settlement(order["id"], "unresolved", None, None)
+        # El balance real sí refleja el resultado: reconciliar
+        self.balance_ledger.mark_dirty()
+    
+    def _settlement_win_amount(self, order, record):
+        """Monto devuelto por una orden según su resultado indexado"""
+        if record['win'] == 'win':
+            if record['win_amount'] is not None:
+                return record['win_amount']
+            # Calcular ganancia con el porcentaje de la orden
+            profit_percent = record['profit_percent'] if record['profit_percent'] is not None else 85
+            return order["size"] * (1 + profit_percent / 100)
+        if record['win'] == 'equal':
+            return order["size"]
+        return 0
+    
     def _process_order_result(self, pair, order, order_result):
         """Procesar resultado de orden desde get_async_order"""
         bet_size = order["size"]
@@ -955,9 +1921,12 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
         self.logger.info(f"✅ {pair} - {order['type']} GANADA! Beneficio: {format_currency(profit)}")
         
         self.wins[pair] += 1
+        self.balance_ledger.settle(win_amount)
         self.total_profit += profit
         self.daily_profit += profit
         self.consecutive_losses[pair] = 0
+        self._journal_settlement(pair, order, "win")
+        self.trade_ledger.record_settlement(order["id"], "win", win_amount, profit)
     
     def process_tie(self, pair, order):
         """Procesar una operación empatada (On The Money)"""
@@ -966,7 +1935,10 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
         # En un empate no se cuentan pérdidas consecutivas
         # pero tampoco se resetean
         self.ties[pair] += 1
+        self.balance_ledger.settle(order["size"])  # Se devuelve la inversión
         # No afecta el profit total ni las pérdidas consecutivas
+        self._journal_settlement(pair, order, "tie")
+        self.trade_ledger.record_settlement(order["id"], "tie", order["size"], 0.0)
     
     def process_loss(self, pair, order):
         """Procesar una operación perdedora"""
@@ -986,14 +1958,13 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
         #     self.daily_lockouts[pair] = True
         #     self.logger.warning(f"🚫 {pair} - Bloqueado por {MAX_CONSECUTIVE_LOSSES} pérdidas consecutivas")
         
-        # Guardar estado después de cada pérdida
-        self.save_state()
+        # Registrar la pérdida en el diario (antes se reescribía todo el estado)
+        self._journal_settlement(pair, order, "loss")
+        self.trade_ledger.record_settlement(order["id"], "loss", 0.0, -loss)
     
     def check_stop_loss(self):
         """Verificar condiciones de stop loss"""
-        current_capital = self.api_call_with_timeout(self.iqoption.get_balance)
-        if current_capital is None:
-            return True
+        current_capital = self.current_balance()
         
         # Actualizar capital mínimo
         if current_capital < self.min_capital:
@@ -1004,6 +1975,7 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
         # Stop loss absoluto
         if current_capital <= self.absolute_stop_loss_threshold and not self.absolute_stop_loss_activated:
             self.absolute_stop_loss_activated = True
+            self._journal_stop_loss()
             self.logger.critical("🚨 STOP LOSS ABSOLUTO ACTIVADO!")
             self.logger.critical(f"Capital: {format_currency(current_capital)} (75% de pérdida)")
             return False
@@ -1026,6 +1998,7 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
         if current_capital <= monthly_threshold and not self.monthly_stop_loss:
             self.monthly_stop_loss = True
             self.stop_loss_triggered_month = current_month
+            self._journal_stop_loss()
             self.logger.critical("🚨 STOP LOSS MENSUAL ACTIVADO!")
             self.logger.critical(f"Pérdida del mes: 40%")
             return False
@@ -1055,6 +2028,11 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
         
         self.daily_profit = 0
         self.last_date = datetime.now().date()
+        self._journal(
+            "day_rollover",
+            last_date=self.last_date.isoformat(),
+            monthly_profits=dict(self.monthly_profits)
+        )
         self.logger.info("✅ Variables diarias reseteadas")
     
     def on_new_month(self, new_month, current_capital):
@@ -1068,73 +2046,136 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
             self.monthly_stop_loss = False
             self.stop_loss_triggered_month = None
             self.logger.info("✅ Stop loss mensual reseteado")
+        
+        self._journal_stop_loss()
+    
+    @staticmethod
+    def _serialize_order(order):
+        return {
+            **order,
+            "entry_time": order["entry_time"].isoformat(),
+            "expiry_time": order["expiry_time"].isoformat()
+        }
+    
+    @staticmethod
+    def _deserialize_order(data):
+        order = dict(data)
+        order["entry_time"] = datetime.fromisoformat(order["entry_time"])
+        order["expiry_time"] = datetime.fromisoformat(order["expiry_time"])
+        return order
+    
+    def _journal(self, event, **data):
+        """Añadir un evento al diario (un fallo de disco no detiene el trading)"""
+        try:
+            self.journal.append(event, data)
+        except Exception as e:
+            self.logger.error(f"❌ Error escribiendo en el diario ({event}): {str(e)}")
+        # La instantánea se pide solo cada SAVE_STATE_INTERVAL ciclos y al finalizar
+    
+    def _journal_settlement(self, pair, order, result):
+        # Se guardan los valores resultantes (no incrementos): reaplicar es idempotente
+        self._journal(
+            "order_settled",
+            pair=pair,
+            order_id=order["id"],
+            result=result,
+            wins=self.wins[pair],
+            losses=self.losses[pair],
+            ties=self.ties[pair],
+            consecutive_losses=self.consecutive_losses[pair],
+            total_profit=self.total_profit,
+            daily_profit=self.daily_profit
+        )
+    
+    def _journal_stop_loss(self):
+        self._journal(
+            "stop_loss",
+            absolute_stop_loss_activated=self.absolute_stop_loss_activated,
+            monthly_stop_loss=self.monthly_stop_loss,
+            stop_loss_triggered_month=self.stop_loss_triggered_month,
+            current_month=self.current_month,
+            monthly_starting_capital=dict(self.monthly_starting_capital),
+            min_capital=self.min_capital
+        )
     
     def save_state(self):
-        """Guardar estado actual de la estrategia"""
+        """
+        Guardar una instantánea del estado y compactar el diario
+        
+        La instantánea incluye el número de secuencia del último evento que
+        refleja; los eventos anteriores se eliminan del diario.
+        """
         try:
-            state = {
-                "timestamp": datetime.now().isoformat(),
-                "strategy_mode": STRATEGY_MODE,
-                "active_options": {
-                    pair: [
-                        {
-                            **order,
-                            "entry_time": order["entry_time"].isoformat(),
-                            "expiry_time": order["expiry_time"].isoformat()
-                        }
-                        for order in orders
-                    ]
-                    for pair, orders in self.active_options.items()
-                },
-                "last_signal_time": {
-                    pair: time.isoformat() if time != datetime.min else "datetime.min"
-                    for pair, time in self.last_signal_time.items()
-                },
-                "consecutive_losses": dict(self.consecutive_losses),
-                "daily_lockouts": dict(self.daily_lockouts),
-                "wins": dict(self.wins),
-                "losses": dict(self.losses),
-                "ties": dict(self.ties),  # Guardar empates
-                "total_profit": self.total_profit,
-                "daily_profit": self.daily_profit,
-                "monthly_profits": dict(self.monthly_profits),
-                "monthly_starting_capital": self.monthly_starting_capital,
-                "monthly_stop_loss": self.monthly_stop_loss,
-                "stop_loss_triggered_month": self.stop_loss_triggered_month,
-                "absolute_stop_loss_activated": self.absolute_stop_loss_activated,
-                "min_capital": self.min_capital,
-                "last_date": self.last_date.isoformat() if self.last_date else None,
-                "current_month": self.current_month
-            }
+            with self.state_lock:
+                journal_seq = self.journal.seq
+                state = {
+                    "timestamp": datetime.now().isoformat(),
+                    "journal_seq": journal_seq,
+                    "strategy_mode": STRATEGY_MODE,
+                    "active_options": {
+                        pair: [self._serialize_order(order) for order in orders]
+                        for pair, orders in self.active_options.items()
+                    },
+                    "last_signal_time": {
+                        pair: time.isoformat() if time != datetime.min else "datetime.min"
+                        for pair, time in self.last_signal_time.items()
+                    },
+                    "consecutive_losses": dict(self.consecutive_losses),
+                    "daily_lockouts": dict(self.daily_lockouts),
+                    "wins": dict(self.wins),
+                    "losses": dict(self.losses),
+                    "ties": dict(self.ties),  # Guardar empates
+                    "total_profit": self.total_profit,
+                    "daily_profit": self.daily_profit,
+                    "monthly_profits": dict(self.monthly_profits),
+                    "monthly_starting_capital": dict(self.monthly_starting_capital),
+                    "monthly_stop_loss": self.monthly_stop_loss,
+                    "stop_loss_triggered_month": self.stop_loss_triggered_month,
+                    "absolute_stop_loss_activated": self.absolute_stop_loss_activated,
+                    "min_capital": self.min_capital,
+                    "last_date": self.last_date.isoformat() if self.last_date else None,
+                    "current_month": self.current_month
+                }
             
-            with open(STATE_FILE, "w") as f:
-                json.dump(state, f, indent=4)
+            # Escribir en un temporal y renombrar: un corte nunca deja el archivo a medias
+            tmp_file = f"{STATE_FILE}.tmp"
+            with open(tmp_file, "w") as f:
+                json.dump(state, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, STATE_FILE)
             
-            self.logger.debug("💾 Estado guardado correctamente")
+            self.journal.compact(journal_seq)
+            self.logger.debug(f"💾 Estado guardado correctamente (diario hasta #{journal_seq})")
             
         except Exception as e:
             self.logger.error(f"❌ Error guardando estado: {str(e)}")
     
     def load_state(self):
-        """Cargar estado previo si existe"""
+        """Cargar estado previo si existe (instantánea + eventos posteriores del diario)"""
         try:
-            if not os.path.exists(STATE_FILE):
+            if os.path.exists(STATE_FILE):
+                with open(STATE_FILE, "r") as f:
+                    state = json.load(f)
+            else:
+                state = None
+            
+            events = self.journal.resume(state.get("journal_seq", 0) if state else 0)
+            
+            if state is None and not events:
                 self.logger.info("📂 No hay archivo de estado previo")
                 self.last_date = datetime.now().date()
                 self.current_month = f"{datetime.now().year}-{datetime.now().month:02d}"
                 self.monthly_starting_capital[self.current_month] = self.initial_capital
                 return
-            
-            with open(STATE_FILE, "r") as f:
-                state = json.load(f)
+            # Reaplicar los eventos posteriores a la instantánea
+            state = fold_events(state or {}, events)
             
             # Cargar órdenes activas
             self.active_options = defaultdict(list)
             for pair, orders in state.get("active_options", {}).items():
                 for order in orders:
-                    order["entry_time"] = datetime.fromisoformat(order["entry_time"])
-                    order["expiry_time"] = datetime.fromisoformat(order["expiry_time"])
-                    self.active_options[pair].append(order)
+                    self.active_options[pair].append(self._deserialize_order(order))
             
             # Cargar tiempos de última señal
             self.last_signal_time = defaultdict(lambda: datetime.min)
@@ -1168,7 +2209,13 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
             
             self.current_month = state.get("current_month", f"{datetime.now().year}-{datetime.now().month:02d}")
             
-            self.logger.info(f"✅ Estado cargado desde {state.get('timestamp', 'N/A')}")
+            # Seguir las órdenes que siguen activas tras el diario (las resuelve la recuperación)
+            for pair, orders in self.active_options.items():
+                for order in orders:
+                    order["recovered"] = True
+                    self._track_order(pair, order)
+            
+            self.logger.info(f"✅ Estado cargado desde {state.get('timestamp', 'N/A')} (+{len(events)} eventos del diario)")
             
         except Exception as e:
             self.logger.error(f"❌ Error cargando estado: {str(e)}")
@@ -1178,9 +2225,7 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
     
     def print_summary(self):
         """Imprimir resumen de la estrategia"""
-        current_capital = self.api_call_with_timeout(self.iqoption.get_balance)
-        if current_capital is None:
-            current_capital = self.initial_capital
+        current_capital = self.current_balance(force_reconcile=True)
         
         self.logger.info("=" * 60)
         self.logger.info("📊 RESUMEN DE LA ESTRATEGIA RSI (LÓGICA INVERTIDA)")
@@ -1207,6 +2252,19 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
             self.logger.info(f"📊 Tasa de Éxito (sin empates): {win_rate:.2f}%")
         
         self.logger.info(f"💵 Beneficio Neto: {format_currency(self.total_profit)}")
+        
+        # Latencia señal→ack
+        latencies = sorted(self.order_latencies)
+        if latencies:
+            median = latencies[len(latencies) // 2]
+            self.logger.info(f"⚡ Latencia señal→ack: mediana {median:.0f} ms, máx {latencies[-1]:.0f} ms, {len(latencies)} órdenes")
+        
+        # Carriles de la API con timeouts (hilos colgados y pools reemplazados)
+        for lane, lane_stats in self.executor.stats().items():
+            if lane_stats["timeouts"]:
+                self.logger.info(f"⏱️ API {lane}: {lane_stats['timeouts']} timeouts, {lane_stats['stuck']} hilos colgados, {lane_stats['replacements']} pools reemplazados")
+        api_counters = self.executor.saved_calls()
+        self.logger.info(f"📡 Llamadas API: {api_counters['calls']} | ahorradas {api_counters['saved']} ({api_counters['coalesced']} fusionadas, {api_counters['reused']} reutilizadas) | {api_counters['throttled']} limitadas ({api_counters['throttle_wait']:.1f}s)")
         self.logger.info(f"📉 Capital Mínimo: {format_currency(self.min_capital)}")
         
         # Stop losses activados
@@ -1215,18 +2273,24 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
         if self.monthly_stop_loss:
             self.logger.info(f"🚨 Stop Loss Mensual: ACTIVADO en {self.stop_loss_triggered_month}")
         
-        # Estadísticas por par
+        # Estadísticas por par: los contadores del estado mandan (incluyen el
+        # historial anterior al ledger y las correcciones de fix_stats); el
+        # ledger solo aporta el beneficio registrado por par
         self.logger.info("\n📊 Estadísticas por Par:")
-        for pair in self.forex_pairs:
-            if pair in self.wins or pair in self.losses or pair in self.ties:
-                pair_wins = self.wins.get(pair, 0)
-                pair_losses = self.losses.get(pair, 0)
-                pair_ties = self.ties.get(pair, 0)
-                pair_total = pair_wins + pair_losses + pair_ties
-                if pair_total > 0:
-                    pair_wr = (pair_wins / (pair_wins + pair_losses) * 100) if (pair_wins + pair_losses) > 0 else 0
-                    cons_losses = self.consecutive_losses.get(pair, 0)
-                    self.logger.info(f"{pair}: {pair_total} trades | {pair_wins}W/{pair_losses}L/{pair_ties}T | {pair_wr:.1f}% éxito | Pérdidas consecutivas actuales: {cons_losses}")
+        self.trade_ledger.flush()
+        ledger_stats = {row["pair"]: row for row in self.trade_ledger.pair_stats()}
+        for pair in sorted(set(self.wins) | set(self.losses) | set(self.ties)):
+            row = ledger_stats.get(pair, {"wins": 0, "losses": 0, "ties": 0, "profit": 0.0})
+            pair_wins = self.wins.get(pair, 0)
+            pair_losses = self.losses.get(pair, 0)
+            pair_ties = self.ties.get(pair, 0)
+            pair_total = pair_wins + pair_losses + pair_ties
+            if pair_total > 0:
+                pair_wr = (pair_wins / (pair_wins + pair_losses) * 100) if (pair_wins + pair_losses) > 0 else 0
+                cons_losses = self.consecutive_losses.get(pair, 0)
+                legacy = pair_total - (row["wins"] + row["losses"] + row["ties"])
+                legacy_note = f" ({legacy} anteriores al ledger, sin beneficio registrado)" if legacy > 0 else ""
+                self.logger.info(f"{pair}: {pair_total} trades | {pair_wins}W/{pair_losses}L/{pair_ties}T | {pair_wr:.1f}% éxito | {format_currency(row['profit'])}{legacy_note} | Pérdidas consecutivas actuales: {cons_losses}")
         
         # Rendimiento mensual
         self.logger.info("\n📅 Rendimiento Mensual:")
@@ -1257,9 +2321,8 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
                     self.logger.info(f"🔄 Ciclo #{cycle_count} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
                 
                 # Verificar conexión
-                if not self.iqoption.check_connect():
-                    self.logger.warning("🔌 Reconectando...")
-                    self._connect_to_iq_option(IQ_EMAIL, IQ_PASSWORD, ACCOUNT_TYPE)
+                if self._connection_lost():
+                    self._reconnect()
                     time.sleep(5)
                     continue
                 
@@ -1269,34 +2332,73 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
                     time.sleep(300)  # Esperar 5 minutos
                     continue
                 
-                # Verificar órdenes activas
+                # Aplicar resultados recibidos por push
+                with self.state_lock:
+                    self.process_pushed_settlements()
+                
+                # Órdenes vencidas: las consultas al broker no retienen el lock
                 self.check_active_orders()
                 
-                # Verificar nuevo día
-                current_date = datetime.now().date()
-                if self.last_date != current_date:
-                    self.on_new_day()
+                with self.state_lock:
+                    # Verificar nuevo día
+                    current_date = datetime.now().date()
+                    if self.last_date != current_date:
+                        self.on_new_day()
                 
-                # Procesar cada par disponible
-                for pair in self.valid_pairs:
-                    try:
-                        self.process_currency_pair(pair)
-                    except Exception as e:
-                        self.logger.error(f"❌ Error procesando {pair}: {str(e)}")
+                # Cambio de horario fuera del lock: revalidar puede suscribir streams
+                now = time.time()
+                self._check_schedule_boundary(now)
+                with self.state_lock:
+                    candidate_pairs = self._due_pairs(now)
+                
+                # Obtener velas de los pares a evaluar (en paralelo) y calcular sus RSI en bloque
+                deadline = now + PAIR_DEADLINE
+                rsi_values = self.score_pairs(candidate_pairs, deadline) if candidate_pairs else {}
+                scored_at = time.perf_counter()  # Momento en que se conoce el cruce de umbral
+                
+                # Procesar en paralelo cada par con RSI disponible (colocar órdenes)
+                futures = {
+                    self.pair_executor.submit(self.process_currency_pair, pair, current_rsi, scored_at): pair
+                    for pair, current_rsi in rsi_values.items()
+                }
+                done, not_done = wait(futures, timeout=max(1.0, deadline - time.time()))
+                for future in done:
+                    if future.exception() is not None:
+                        self.logger.error(f"❌ Error procesando {futures[future]}: {str(future.exception())}")
+                late_pairs = set()
+                for future in not_done:
+                    pair = futures[future]
+                    late_pairs.add(pair)
+                    self.logger.warning(f"⏱️ {pair}: procesamiento fuera de plazo, continúa en segundo plano")
+                    # El par sigue bloqueado hasta que termine (la compra puede estar en vuelo)
+                    future.add_done_callback(partial(self._finish_late_evaluation, pair))
+                
+                # Reprogramar los pares evaluados (tras la posible señal)
+                with self.state_lock:
+                    for pair in candidate_pairs:
+                        if pair not in late_pairs:
+                            self._schedule_next_evaluation(pair, now)
                 
                 # Guardar estado periódicamente
                 if cycle_count % SAVE_STATE_INTERVAL == 0:
-                    self.save_state()
+                    self.state_writer.notify()
                 
-                # Re-verificar pares periódicamente
-                if cycle_count % 100 == 0:
+                # Re-verificar pares periódicamente (con calendario, lo hacen los cambios de horario)
+                if self.trading_calendar is None and cycle_count % 100 == 0:
                     self.logger.info("🔄 Re-verificando pares disponibles...")
                     self.check_valid_pairs()
                 
                 # Control de tiempo del ciclo
-                cycle_duration = time.time() - cycle_start
-                sleep_time = max(5.0, 15.0 - cycle_duration)  # Mínimo 5 segundos entre ciclos
-                time.sleep(sleep_time)
+                if self.bar_close_scheduler:
+                    # Dormir hasta el próximo cierre de vela, fin de espera o expiración
+                    sleep_time = max(1.0, self._seconds_until_next_event(time.time()))
+                else:
+                    cycle_duration = time.time() - cycle_start
+                    sleep_time = max(5.0, 15.0 - cycle_duration)  # Mínimo 5 segundos entre ciclos
+                
+                # Un resultado recibido por push despierta el bucle antes de tiempo
+                self.wake_event.wait(sleep_time)
+                self.wake_event.clear()
                 
         except KeyboardInterrupt:
             self.logger.info("⏹️ Estrategia detenida por el usuario")
@@ -1305,10 +2407,14 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
             self.logger.critical(traceback.format_exc())
         finally:
             self.logger.info("🏁 Finalizando estrategia...")
-            self.save_state()
+            self.state_writer.flush()
             self.print_summary()
+            self.trade_ledger.close()
             
-            # Cerrar executor
+            # Detener el refresco del catálogo y cerrar executors
+            self.asset_catalog.stop()
+            if hasattr(self, 'pair_executor'):
+                self.pair_executor.shutdown(wait=True)
             if hasattr(self, 'executor'):
                 self.executor.shutdown(wait=True)
             
@@ -1317,6 +2423,8 @@ class MultiCurrencyRSIBinaryOptionsStrategy:
     def __del__(self):
         """Limpieza al destruir el objeto"""
         try:
+            if hasattr(self, 'pair_executor'):
+                self.pair_executor.shutdown(wait=False)
             if hasattr(self, 'executor'):
                 self.executor.shutdown(wait=False)
         except:
@@ -0,0 +1,127 @@
+# conftest.py
+# Utilidades comunes de las pruebas (sin conexión a IQ Option)
+
+import sys
+import queue
+import types
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+import pytest
+
+# strategy.py importa iqoptionapi al cargarse; las pruebas nunca se conectan,
+# así que si la librería no está instalada basta con un módulo vacío
+try:
+    import iqoptionapi.stable_api  # noqa: F401
+except ImportError:
+    iqoptionapi = types.ModuleType("iqoptionapi")
+    constants = types.ModuleType("iqoptionapi.constants")
+    constants.ACTIVES = {}
+    stable_api = types.ModuleType("iqoptionapi.stable_api")
+    stable_api.IQ_Option = object
+    iqoptionapi.constants = constants
+    iqoptionapi.stable_api = stable_api
+    sys.modules.update({
+        "iqoptionapi": iqoptionapi,
+        "iqoptionapi.constants": constants,
+        "iqoptionapi.stable_api": stable_api,
+    })
+
+
+def make_candles(closes, start=0, timeframe=300):
+    """Velas con formato IQ Option a partir de una lista de cierres"""
+    return [
+        {"from": start + i * timeframe, "open": close, "close": close, "min": close, "max": close, "volume": 1}
+        for i, close in enumerate(closes)
+    ]
+
+
+class RecordingLedger:
+    """Sustituto del TradeLedger que guarda las escrituras en memoria"""
+
+    def __init__(self):
+        self.orders = []
+        self.settlements = []
+
+    def record_order(self, order, asset=None):
+        self.orders.append((order["id"], asset))
+
+    def record_settlement(self, order_id, result, payout, profit):
+        self.settlements.append((order_id, result, payout, profit))
+
+
+@pytest.fixture
+def make_strategy(tmp_path, monkeypatch):
+    """
+    Fábrica de estrategias sin conexión ni hilos, con el estado mínimo para
+    probar sus métodos
+
+    STATE_FILE y JOURNAL_FILE apuntan a un directorio temporal compartido por
+    todas las instancias de la prueba (simula un reinicio).
+    """
+    import strategy as strategy_module
+    from balance import ShadowBalance
+    from journal import TradeJournal
+    from scheduling import EligibilityIndex, SettlementQueue
+    from settlement import SettlementIndex
+
+    monkeypatch.setattr(strategy_module, "STATE_FILE", str(tmp_path / "state.json"))
+    monkeypatch.setattr(strategy_module, "JOURNAL_FILE", str(tmp_path / "journal.jsonl"))
+
+    created = []
+
+    def build():
+        cls = strategy_module.MultiCurrencyRSIBinaryOptionsStrategy
+        strategy = cls.__new__(cls)
+        strategy.logger = logging.getLogger("tests")
+        strategy.state_lock = threading.RLock()
+        strategy.placing = set()
+        strategy.buffers_lock = threading.Lock()
+        strategy.initial_capital = 1000.0
+        strategy.expiry_minutes = 5
+        strategy.forex_pairs = []
+        strategy.stream_mode = False
+        strategy.valid_pairs = []
+        strategy.iqoption_pairs = {}
+        strategy.pair_option_types = {}
+        strategy.variant_index = {}
+        strategy.eligibility = EligibilityIndex()
+        strategy.settlement_queue = SettlementQueue(15)
+        strategy.settlement_index = SettlementIndex(strategy.logger)
+        strategy.settlement_events = queue.Queue()
+        strategy.wake_event = threading.Event()
+        strategy.active_options = defaultdict(list)
+        strategy.last_signal_time = defaultdict(lambda: datetime.min)
+        strategy.consecutive_losses = defaultdict(int)
+        strategy.daily_lockouts = defaultdict(bool)
+        strategy.wins = defaultdict(int)
+        strategy.losses = defaultdict(int)
+        strategy.ties = defaultdict(int)
+        strategy.total_profit = 0.0
+        strategy.daily_profit = 0.0
+        strategy.monthly_profits = defaultdict(float)
+        strategy.monthly_starting_capital = {}
+        strategy.monthly_stop_loss = False
+        strategy.stop_loss_triggered_month = None
+        strategy.absolute_stop_loss_activated = False
+        strategy.current_month = None
+        strategy.last_date = None
+        strategy.min_capital = 1000.0
+        strategy.journal = TradeJournal(str(tmp_path / "journal.jsonl"))
+        strategy.balance_ledger = ShadowBalance(1000.0)
+        strategy.trade_ledger = RecordingLedger()
+        # Llamadas a la API directas, sin carriles ni timeouts
+        strategy.api_call_with_timeout = lambda func, *args, timeout=None, endpoint=None, **kwargs: func(*args, **kwargs)
+        created.append(strategy)
+        return strategy
+
+    yield build
+    for strategy in created:
+        strategy.journal.close()
+
+
+@pytest.fixture
+def bare_strategy(make_strategy):
+    return make_strategy()
@@ -0,0 +1,198 @@
+# test_api_executor.py
+# Carriles por endpoint, llamadas colgadas, fusión de llamadas y límite de tasa
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import pytest
+
+from api_executor import ApiExecutor, TokenBucket, endpoint_for
+
+
+class SlowBroker:
+    """Bróker simulado que cuenta las llamadas reales y tarda `delay` segundos"""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def _hit(self):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+
+    def get_balance(self):
+        self._hit()
+        return 1000.0
+
+    def get_candles(self, asset_name, interval, count, endtime):
+        self._hit()
+        return []
+
+    def buy(self, amount, asset_name, direction, expiry_minutes):
+        self._hit()
+        return True, self.calls
+
+
+@pytest.fixture
+def executor():
+    executor = ApiExecutor({"balance": 4, "buy": 4})
+    yield executor
+    executor.shutdown(wait=False)
+
+
+def test_endpoint_for_maps_library_methods():
+    broker = SlowBroker()
+    assert endpoint_for(broker.get_balance) == "balance"
+    assert endpoint_for(broker.buy) == "buy"
+    assert endpoint_for(lambda: None) == "default"
+
+
+def test_hung_call_times_out_and_is_counted_stuck():
+    executor = ApiExecutor({"candles": 1, "buy": 1}, max_freeze_count=2)
+    release = threading.Event()
+    try:
+        with pytest.raises(FutureTimeoutError):
+            executor.call(lambda: release.wait(5), timeout=0.05, endpoint="candles")
+        stats = executor.stats()["candles"]
+        assert stats["timeouts"] == 1
+        assert stats["stuck"] == 1
+        assert not executor.frozen()
+
+        # Una orden no espera detrás de la descarga colgada
+        broker = SlowBroker(delay=0)
+        assert executor.call(broker.buy, 10, "EURUSD-OTC", "put", 5, timeout=1)[0]
+        # Con todos los hilos colgados, el carril se renueva en la siguiente llamada
+        assert executor.call(broker.get_candles, "EURUSD-OTC", 300, 1, 0, timeout=1) == []
+        assert executor.stats()["candles"]["replacements"] == 1
+    finally:
+        release.set()
+        executor.shutdown(wait=False)
+
+
+def test_consecutive_timeouts_freeze_until_reset():
+    executor = ApiExecutor({"candles": 4}, max_freeze_count=2)
+    release = threading.Event()
+    try:
+        for _ in range(2):
+            with pytest.raises(FutureTimeoutError):
+                executor.call(lambda: release.wait(5), timeout=0.05, endpoint="candles")
+        assert executor.frozen()
+
+        executor.reset()
+        assert not executor.frozen()
+    finally:
+        release.set()
+        executor.shutdown(wait=False)
+
+
+def test_successful_call_clears_timeout_streak():
+    executor = ApiExecutor({"candles": 2}, max_freeze_count=2)
+    release = threading.Event()
+    try:
+        with pytest.raises(FutureTimeoutError):
+            executor.call(lambda: release.wait(5), timeout=0.05, endpoint="candles")
+        assert executor.call(lambda: "ok", timeout=1, endpoint="candles") == "ok"
+        assert executor.consecutive_timeouts == 0
+    finally:
+        release.set()
+        executor.shutdown(wait=False)
+
+
+def test_exceptions_reach_the_caller(executor):
+    def failing():
+        raise RuntimeError("websocket closed")
+
+    with pytest.raises(RuntimeError):
+        executor.call(failing, timeout=1, endpoint="balance")
+    assert executor.consecutive_timeouts == 0
+
+
+def call_concurrently(count, func):
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        return list(pool.map(lambda _: func(), range(count)))
+
+
+def test_identical_calls_in_flight_are_coalesced(executor):
+    broker = SlowBroker()
+    results = call_concurrently(4, lambda: executor.call(broker.get_balance, timeout=5))
+
+    assert results == [1000.0] * 4
+    assert broker.calls == 1
+    counters = executor.saved_calls()
+    assert counters["calls"] == 4
+    assert counters["coalesced"] == 3
+    assert counters["saved"] == 3
+
+
+def test_buy_is_never_coalesced(executor):
+    broker = SlowBroker()
+    results = call_concurrently(3, lambda: executor.call(broker.buy, 10, "EURUSD-OTC", "put", 5, timeout=5))
+
+    assert broker.calls == 3
+    assert all(status for status, _ in results)
+    assert executor.counters["coalesced"] == 0
+
+
+def test_coalesced_callers_share_the_exception(executor):
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.2)
+        raise RuntimeError("websocket closed")
+
+    failing.__name__ = "get_balance"
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(executor.call, failing, timeout=5)
+        started.wait(1)
+        follower = pool.submit(executor.call, failing, timeout=5)
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError):
+                future.result()
+    assert executor.counters["coalesced"] == 1
+
+
+def test_reuse_window():
+    executor = ApiExecutor({"balance": 1}, reuse_windows={"balance": 0.3})
+    broker = SlowBroker(delay=0)
+    try:
+        assert executor.call(broker.get_balance, timeout=1) == 1000.0
+        assert executor.call(broker.get_balance, timeout=1) == 1000.0
+        assert broker.calls == 1
+        assert executor.counters["reused"] == 1
+
+        time.sleep(0.35)
+        executor.call(broker.get_balance, timeout=1)
+        assert broker.calls == 2
+    finally:
+        executor.shutdown()
+
+
+def test_token_bucket_allows_burst_then_waits():
+    bucket = TokenBucket(rate=20, burst=2)
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    waited = bucket.acquire()
+    assert 0.02 <= waited < 0.5
+
+
+def test_token_bucket_times_out():
+    bucket = TokenBucket(rate=1, burst=1)
+    assert bucket.acquire(timeout=0.1) == 0.0
+    assert bucket.acquire(timeout=0.1) is None
+
+
+def test_throttled_call_times_out_and_is_counted():
+    executor = ApiExecutor({"balance": 1}, rate_limits={"balance": (1, 1)})
+    broker = SlowBroker(delay=0)
+    try:
+        executor.call(broker.get_balance, timeout=1)
+        with pytest.raises(FutureTimeoutError):
+            executor.call(broker.get_balance, timeout=0.1)
+        assert broker.calls == 1
+        assert executor.counters["throttled"] == 1
+    finally:
+        executor.shutdown()
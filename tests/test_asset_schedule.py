@@ -0,0 +1,83 @@
+# test_asset_schedule.py
+# Calendario de horarios de negociación (get_all_init_v2)
+
+from asset_schedule import TradingCalendar
+
+
+def init_data(schedules, enabled=True, suspended=False, option_type="turbo"):
+    """Respuesta mínima de get_all_init_v2 con un horario por activo"""
+    return {
+        option_type: {
+            "actives": {
+                str(i): {
+                    "name": f"front.{name}",
+                    "enabled": enabled,
+                    "is_suspended": suspended,
+                    "schedule": schedule,
+                }
+                for i, (name, schedule) in enumerate(schedules.items())
+            }
+        }
+    }
+
+
+def test_load_without_schedules_returns_false():
+    calendar = TradingCalendar()
+    assert not calendar.load({}, now=0)
+    assert not calendar.load(None, now=0)
+    assert calendar.loaded_at is None
+
+
+def test_open_inside_intervals_and_closed_at_end():
+    calendar = TradingCalendar()
+    assert calendar.load(init_data({"EURUSD": [[100, 200], [300, 400]]}), now=0)
+
+    assert not calendar.is_open("turbo", "EURUSD", 99)
+    assert calendar.is_open("turbo", "EURUSD", 100)
+    assert calendar.is_open("turbo", "EURUSD", 199.9)
+    # El fin del intervalo ya está cerrado
+    assert not calendar.is_open("turbo", "EURUSD", 200)
+    assert calendar.is_open("turbo", "EURUSD", 300)
+    assert not calendar.is_open("turbo", "EURUSD", 400)
+    assert not calendar.is_open("binary", "EURUSD", 150)
+
+
+def test_next_change_alternates_between_end_and_start():
+    calendar = TradingCalendar()
+    calendar.load(init_data({"EURUSD": [[300, 400], [100, 200]]}), now=0)
+
+    assert calendar.next_change("turbo", "EURUSD", 50) == 100
+    assert calendar.next_change("turbo", "EURUSD", 150) == 200
+    assert calendar.next_change("turbo", "EURUSD", 200) == 300
+    assert calendar.next_change("turbo", "EURUSD", 400) is None
+
+
+def test_disabled_or_suspended_assets_are_closed():
+    calendar = TradingCalendar()
+    calendar.load(init_data({"EURUSD": [[0, 1000]]}, suspended=True), now=0)
+    assert not calendar.is_open("turbo", "EURUSD", 500)
+    assert calendar.next_change("turbo", "EURUSD", 500) is None
+
+    calendar.load(init_data({"EURUSD": [[0, 1000]]}, enabled=False), now=0)
+    assert not calendar.is_open("turbo", "EURUSD", 500)
+
+
+def test_asset_without_schedule_is_open_while_enabled():
+    calendar = TradingCalendar()
+    calendar.load(init_data({"EURUSD-OTC": []}), now=0)
+    assert calendar.is_open("turbo", "EURUSD-OTC", 12345)
+    assert calendar.next_change("turbo", "EURUSD-OTC", 12345) is None
+
+
+def test_open_status_and_next_boundary():
+    calendar = TradingCalendar()
+    calendar.load(init_data({"EURUSD": [[100, 200]], "EURUSD-OTC": [[0, 150]], "GBPUSD": [[120, 130]]}), now=0)
+
+    assert calendar.open_status(110) == {
+        "binary": {},
+        "turbo": {"EURUSD": {"open": True}, "EURUSD-OTC": {"open": True}, "GBPUSD": {"open": False}},
+    }
+    # Solo cuentan los activos indicados
+    assert calendar.next_boundary({"EURUSD", "EURUSD-OTC"}, 110) == 150
+    assert calendar.next_boundary({"EURUSD", "EURUSD-OTC", "GBPUSD"}, 110) == 120
+    assert calendar.next_boundary({"USDJPY"}, 110) is None
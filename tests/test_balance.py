@@ -0,0 +1,79 @@
+# test_balance.py
+# Balance local (sombra) y su reconciliación con el bróker
+
+from datetime import datetime, timedelta
+
+from balance import ShadowBalance
+
+
+class FakeBroker:
+    """Bróker simulado: get_balance devuelve `balance` y ejecuta `during_call`"""
+
+    def __init__(self, balance, during_call=None):
+        self.balance = balance
+        self.during_call = during_call
+        self.calls = 0
+
+    def get_balance(self):
+        self.calls += 1
+        if self.during_call is not None:
+            self.during_call()
+        return self.balance
+
+
+def test_stake_and_settle_follow_the_broker():
+    ledger = ShadowBalance(1000.0)
+    ledger.stake(10)
+    assert ledger.balance == 990.0
+    ledger.settle(18.5)
+    assert ledger.balance == 1008.5
+    assert ledger.version == 2
+
+
+def test_needs_reconcile_after_interval_or_when_dirty():
+    ledger = ShadowBalance(1000.0, reconcile_interval=300)
+    assert not ledger.needs_reconcile()
+    assert ledger.needs_reconcile(now=ledger.last_reconcile + 300)
+
+    ledger.mark_dirty()
+    assert ledger.needs_reconcile()
+    drift = ledger.reconcile(1000.2)
+    assert round(drift, 2) == 0.2
+    assert not ledger.dirty
+    assert not ledger.has_drift(drift)
+    assert ledger.has_drift(-0.6)
+
+
+def test_current_balance_serves_local_balance_without_io(bare_strategy):
+    bare_strategy.iqoption = FakeBroker(2000.0)
+    assert bare_strategy.current_balance() == 1000.0
+    assert bare_strategy.iqoption.calls == 0
+
+
+def test_current_balance_reconciles_when_due(bare_strategy):
+    bare_strategy.iqoption = FakeBroker(1012.0)
+    bare_strategy.balance_ledger.mark_dirty()
+    assert bare_strategy.current_balance() == 1012.0
+    assert bare_strategy.iqoption.calls == 1
+    assert not bare_strategy.balance_ledger.dirty
+
+
+def test_current_balance_waits_for_unsettled_expired_orders(bare_strategy):
+    expired = datetime.now() - timedelta(seconds=1)
+    bare_strategy.active_options["EURUSD"].append({"id": 1, "expiry_time": expired})
+    bare_strategy.iqoption = FakeBroker(1018.5)
+
+    # El bróker ya incluiría el pago de la orden: no se reconcilia todavía
+    assert bare_strategy.current_balance(force_reconcile=True) == 1000.0
+    assert bare_strategy.iqoption.calls == 0
+
+
+def test_reconcile_is_discarded_if_an_order_changed_the_balance(bare_strategy):
+    ledger = bare_strategy.balance_ledger
+    # Se coloca una orden mientras get_balance está en vuelo
+    bare_strategy.iqoption = FakeBroker(1000.0, during_call=lambda: ledger.stake(10))
+    ledger.mark_dirty()
+
+    assert bare_strategy.current_balance() == 990.0
+    assert ledger.dirty
+    assert ledger.reconcile_count == 0
@@ -0,0 +1,60 @@
+# test_candle_buffer.py
+# Buffer circular de velas: fusión de velas nuevas y en formación
+
+from utils import CandleBuffer
+from conftest import make_candles
+
+
+def test_seed_and_order():
+    buffer = CandleBuffer(10)
+    assert buffer.seed(make_candles([1, 2, 3]))
+    assert len(buffer) == 3
+    assert list(buffer.closes()) == [1, 2, 3]
+    assert list(buffer.timestamps()) == [0, 300, 600]
+    assert buffer.last_timestamp == 600
+
+
+def test_merge_replaces_forming_candle_and_appends_new():
+    buffer = CandleBuffer(10)
+    buffer.seed(make_candles([1, 2, 3]))
+
+    update = make_candles([3.5, 4], start=600)
+    assert buffer.merge(update)
+    assert list(buffer.closes()) == [1, 2, 3.5, 4]
+    assert buffer.last_timestamp == 900
+
+
+def test_merge_ignores_older_candles():
+    buffer = CandleBuffer(10)
+    buffer.seed(make_candles([1, 2, 3]))
+    assert not buffer.merge(make_candles([9, 9], start=0))
+    assert list(buffer.closes()) == [1, 2, 3]
+
+
+def test_merge_without_changes_returns_false():
+    buffer = CandleBuffer(10)
+    candles = make_candles([1, 2, 3])
+    buffer.seed(candles)
+    assert not buffer.merge(candles[-1:])
+
+
+def test_wraps_at_capacity():
+    buffer = CandleBuffer(4)
+    buffer.seed(make_candles([1, 2, 3]))
+    buffer.merge(make_candles([4, 5, 6], start=900))
+    assert len(buffer) == 4
+    assert list(buffer.closes()) == [3, 4, 5, 6]
+    assert [candle['from'] for candle in buffer.to_candles()] == [600, 900, 1200, 1500]
+
+    # La vela en formación se reemplaza también tras dar la vuelta
+    buffer.merge(make_candles([6.5], start=1500))
+    assert list(buffer.closes()) == [3, 4, 5, 6.5]
+
+
+def test_clear():
+    buffer = CandleBuffer(4)
+    buffer.seed(make_candles([1, 2]))
+    buffer.clear()
+    assert len(buffer) == 0
+    assert buffer.last_timestamp is None
+    assert buffer.to_candles() == []
@@ -0,0 +1,97 @@
+# test_candle_streams.py
+# Sincronización de streams de velas: siembra en paralelo y reemplazo de buffers
+
+import time
+import threading
+
+import pytest
+
+from utils import CandleBuffer, calculate_rsi
+from conftest import make_candles
+
+
+class StreamBroker:
+    """Bróker simulado que solo registra las suscripciones"""
+
+    def __init__(self):
+        self.started = []
+        self.stopped = []
+
+    def start_candles_stream(self, asset_name, timeframe, max_candles):
+        self.started.append(asset_name)
+
+    def stop_candles_stream(self, asset_name, timeframe):
+        self.stopped.append(asset_name)
+
+
+@pytest.fixture
+def stream_strategy(make_strategy):
+    strategy = make_strategy()
+    strategy.iqoption = StreamBroker()
+    strategy.rsi_period = 14
+    strategy.candle_timeframe = 300
+    strategy.candle_buffers = {}
+    strategy.rsi_engines = {}
+    strategy.candle_streams = set()
+    strategy.streams_lock = threading.Lock()
+    return strategy
+
+
+def closes(seed, count=40):
+    return [1.1 + ((i * 7 + seed) % 11) * 0.001 for i in range(count)]
+
+
+def test_new_streams_are_seeded_in_parallel_and_swapped_in(stream_strategy):
+    strategy = stream_strategy
+    pairs = {"EURUSD": "EURUSD-OTC", "GBPUSD": "GBPUSD", "USDJPY": "USDJPY"}
+    strategy.valid_pairs = list(pairs)
+    strategy.iqoption_pairs = dict(pairs)
+    seeds = {asset_name: make_candles(closes(i)) for i, asset_name in enumerate(pairs.values())}
+
+    def slow_candles(asset_name, count, endtime, timeout):
+        time.sleep(0.2)
+        return seeds[asset_name]
+
+    strategy._get_candles = slow_candles
+    started = time.time()
+    strategy._sync_candle_streams()
+    elapsed = time.time() - started
+
+    assert elapsed < 0.5
+    assert strategy.candle_streams == set(pairs.values())
+    assert sorted(strategy.iqoption.started) == sorted(pairs.values())
+    for asset_name, candles in seeds.items():
+        assert len(strategy.candle_buffers[asset_name]) == len(candles)
+        assert strategy.rsi_engines[asset_name].peek(candles[-1]["close"]) == calculate_rsi(candles, 14)
+
+
+def test_refresh_does_not_merge_into_a_swapped_buffer(stream_strategy):
+    strategy = stream_strategy
+    old_buffer = CandleBuffer(100)
+    old_buffer.seed(make_candles(closes(0), start=0))
+    strategy.candle_buffers["EURUSD"] = old_buffer
+
+    entered = threading.Event()
+    release = threading.Event()
+
+    def blocking_candles(asset_name, count, endtime, timeout):
+        entered.set()
+        release.wait(5)
+        return make_candles([1.2, 1.3], start=old_buffer.last_timestamp)
+
+    strategy._get_candles = blocking_candles
+    results = []
+    worker = threading.Thread(target=lambda: results.append(strategy._refresh_candles("EURUSD")))
+    worker.start()
+    assert entered.wait(5)
+
+    # La resincronización instala un buffer nuevo mientras el par descarga
+    new_buffer = CandleBuffer(100)
+    new_buffer.seed(make_candles(closes(1), start=0))
+    with strategy.buffers_lock:
+        strategy.candle_buffers["EURUSD"] = new_buffer
+    release.set()
+    worker.join(5)
+
+    assert results == [None]
+    assert new_buffer.closes()[-1] == closes(1)[-1]
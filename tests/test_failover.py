@@ -0,0 +1,101 @@
+# test_failover.py
+# Cambio a una variante alternativa cuando el activo está suspendido
+
+import pytest
+
+from scheduling import EligibilityIndex
+
+
+class FakeBroker:
+    """Bróker simulado: rechaza las compras en los activos suspendidos"""
+
+    def __init__(self, suspended):
+        self.suspended = set(suspended)
+        self.bought = []
+
+    def buy(self, amount, asset_name, direction, expiry_minutes):
+        self.bought.append(asset_name)
+        if asset_name in self.suspended:
+            return False, "asset suspended"
+        return True, 123
+
+
+class FakeCatalog:
+    """Catálogo simulado con el estado de apertura de cada activo"""
+
+    def __init__(self, open_assets):
+        self.open_assets = open_assets
+        self.refreshes = 0
+        self.status_requests = 0
+
+    def request_refresh(self):
+        self.refreshes += 1
+
+    def open_status(self):
+        self.status_requests += 1
+        return self.open_assets
+
+
+def variant(iq_name, option_type):
+    return {"pair": "EURCAD", "option_type": option_type, "iq_name": iq_name, "is_otc": iq_name.endswith("-OTC")}
+
+
+OPEN_ASSETS = {
+    "binary": {"EURCAD-OTC": {"open": True}, "EURCAD": {"open": True}},
+    "turbo": {"EURCAD-OTC": {"open": True}, "EURCAD": {"open": True}},
+}
+
+
+@pytest.fixture
+def strategy(bare_strategy):
+    bare_strategy.forex_pairs = ["EURCAD"]
+    bare_strategy.valid_pairs = ["EURCAD"]
+    bare_strategy.eligibility = EligibilityIndex()
+    bare_strategy.eligibility.schedule("EURCAD", 0)
+    bare_strategy.iqoption_pairs = {"EURCAD": "EURCAD-OTC"}
+    bare_strategy.pair_option_types = {"EURCAD": "binary"}
+    bare_strategy.variant_index = {"EURCAD": [
+        variant("EURCAD-OTC", "binary"),
+        variant("EURCAD-OTC", "turbo"),
+        variant("EURCAD", "binary"),
+        variant("EURCAD", "turbo"),
+    ]}
+    bare_strategy.asset_catalog = FakeCatalog(OPEN_ASSETS)
+    bare_strategy.iqoption = FakeBroker(suspended={"EURCAD-OTC"})
+    return bare_strategy
+
+
+def test_suspended_asset_fails_over_to_other_variant(strategy):
+    assert strategy.place_option("EURCAD", "CALL", 5) == 123
+
+    # buy no distingue binary/turbo: el reintento va directo al activo estándar
+    assert strategy.iqoption.bought == ["EURCAD-OTC", "EURCAD"]
+    assert strategy.iqoption_pairs["EURCAD"] == "EURCAD"
+    assert strategy.pair_option_types["EURCAD"] == "binary"
+    assert [option["iq_name"] for option in strategy.variant_index["EURCAD"]] == ["EURCAD", "EURCAD"]
+    assert strategy.asset_catalog.refreshes == 1
+    assert strategy.asset_catalog.status_requests == 0
+
+
+def test_empty_index_falls_back_to_open_status(strategy):
+    strategy.variant_index = {}
+
+    assert strategy.place_option("EURCAD", "CALL", 5) == 123
+    assert strategy.iqoption.bought == ["EURCAD-OTC", "EURCAD"]
+    assert strategy.iqoption_pairs["EURCAD"] == "EURCAD"
+    assert strategy.asset_catalog.status_requests == 1
+
+
+def test_no_alternative_removes_pair(strategy):
+    strategy.variant_index = {"EURCAD": [variant("EURCAD-OTC", "binary"), variant("EURCAD-OTC", "turbo")]}
+
+    assert strategy.place_option("EURCAD", "CALL", 5) is None
+    assert strategy.iqoption.bought == ["EURCAD-OTC"]
+    assert "EURCAD" not in strategy.valid_pairs
+    assert "EURCAD" not in strategy.eligibility
+
+
+def test_other_errors_do_not_switch_asset(strategy):
+    assert strategy.handle_trading_error("EURCAD", "insufficient funds")
+    assert strategy.iqoption_pairs["EURCAD"] == "EURCAD-OTC"
+    assert strategy.asset_catalog.refreshes == 0
@@ -0,0 +1,171 @@
+# test_journal.py
+# Diario de eventos: lectura, reanudación, compactación y reconstrucción del estado
+
+import json
+from datetime import datetime, timedelta
+
+from journal import TradeJournal, read_state, write_state
+
+
+def test_append_assigns_increasing_seq(tmp_path):
+    journal = TradeJournal(str(tmp_path / "journal.jsonl"))
+    assert journal.append("order_placed", {"id": 1}) == 1
+    assert journal.append("order_settled", {"id": 1}) == 2
+    journal.close()
+
+    records = journal.read()
+    assert [record["seq"] for record in records] == [1, 2]
+    assert [record["event"] for record in records] == ["order_placed", "order_settled"]
+    assert records[0]["data"] == {"id": 1}
+    assert [record["seq"] for record in journal.read(after_seq=1)] == [2]
+
+
+def test_resume_continues_numbering(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = TradeJournal(path)
+    for i in range(3):
+        journal.append("event", {"i": i})
+    journal.close()
+
+    reopened = TradeJournal(path)
+    records = reopened.resume(after_seq=1)
+    assert [record["seq"] for record in records] == [2, 3]
+    assert reopened.seq == 3
+    assert reopened.append("event", {}) == 4
+    reopened.close()
+
+
+def test_resume_without_journal_keeps_snapshot_seq(tmp_path):
+    journal = TradeJournal(str(tmp_path / "missing.jsonl"))
+    assert journal.resume(after_seq=7) == []
+    assert journal.seq == 7
+
+
+def test_compact_drops_events_in_snapshot(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = TradeJournal(path)
+    for i in range(5):
+        journal.append("event", {"i": i})
+    journal.compact(3)
+
+    assert [record["seq"] for record in journal.read()] == [4, 5]
+    # Se sigue escribiendo tras compactar
+    assert journal.append("event", {}) == 6
+    journal.close()
+    assert [record["seq"] for record in journal.read()] == [4, 5, 6]
+
+
+def test_partial_line_is_skipped_and_repaired(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = TradeJournal(str(path))
+    journal.append("event", {"i": 1})
+    journal.close()
+    # Corte a mitad de escritura
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"seq":2,"event":"ev')
+
+    reopened = TradeJournal(str(path))
+    assert [record["seq"] for record in reopened.resume()] == [1]
+    assert reopened.append("event", {"i": 3}) == 2
+    reopened.close()
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert json.loads(lines[-1])["data"] == {"i": 3}
+    assert [record["seq"] for record in reopened.read()] == [1, 2]
+
+
+def make_order(order_id, entry_time):
+    return {
+        "id": order_id,
+        "pair": "EURUSD",
+        "direction": "PUT",
+        "amount": 10.0,
+        "entry_time": entry_time,
+        "expiry_time": entry_time + timedelta(minutes=5),
+        "rsi_value": 30.0,
+    }
+
+
+def test_state_is_rebuilt_from_snapshot_and_journal(make_strategy):
+    entry_time = datetime.now().replace(microsecond=0)
+    first = make_strategy()
+    first.load_state()
+    first.wins["EURUSD"] = 2
+    first.total_profit = 17.0
+    first.save_state()
+
+    # Eventos posteriores a la instantánea: dos órdenes y la liquidación de una
+    for order_id in (101, 102):
+        order = make_order(order_id, entry_time)
+        first.active_options["EURUSD"].append(order)
+        first._journal("order_placed", pair="EURUSD", order=first._serialize_order(order))
+    first.active_options["EURUSD"] = [o for o in first.active_options["EURUSD"] if o["id"] != 101]
+    first.wins["EURUSD"] = 3
+    first.total_profit = 25.5
+    first.daily_profit = 8.5
+    first._journal_settlement("EURUSD", {"id": 101}, "win")
+    first.journal.close()
+
+    restarted = make_strategy()
+    restarted.load_state()
+
+    assert [order["id"] for order in restarted.active_options["EURUSD"]] == [102]
+    assert restarted.active_options["EURUSD"][0]["entry_time"] == entry_time
+    assert restarted.active_options["EURUSD"][0]["recovered"]
+    assert restarted.wins["EURUSD"] == 3
+    assert restarted.total_profit == 25.5
+    assert restarted.daily_profit == 8.5
+    assert restarted.last_signal_time["EURUSD"] == entry_time
+    assert restarted.journal.seq == 3
+    # La orden restaurada vuelve a la cola de liquidación y bloquea el par
+    assert 102 in restarted.settlement_queue
+    assert restarted.eligibility.is_blocked("EURUSD")
+
+
+def test_replay_is_idempotent_after_compaction(make_strategy):
+    entry_time = datetime.now().replace(microsecond=0)
+    first = make_strategy()
+    first.load_state()
+    order = make_order(201, entry_time)
+    first.active_options["EURUSD"].append(order)
+    first._journal("order_placed", pair="EURUSD", order=first._serialize_order(order))
+    first.save_state()
+
+    # La instantánea ya incluye el evento: el diario queda vacío
+    assert first.journal.read() == []
+    first.journal.close()
+
+    restarted = make_strategy()
+    restarted.load_state()
+    assert [order["id"] for order in restarted.active_options["EURUSD"]] == [201]
+    assert restarted.journal.seq == 1
+
+
+def test_tool_correction_is_not_overwritten_by_journal(make_strategy, tmp_path):
+    state_file, journal_file = str(tmp_path / "state.json"), str(tmp_path / "journal.jsonl")
+    first = make_strategy()
+    first.load_state()
+    first.save_state()
+
+    # Pérdida registrada solo en el diario (sin instantánea posterior)
+    first.losses["EURUSD"] = 3
+    first.consecutive_losses["EURUSD"] = 3
+    first.total_profit = -30.0
+    first._journal_settlement("EURUSD", {"id": 301}, "loss")
+    first.journal.close()
+
+    # Herramienta de mantenimiento: ve el evento del diario y lo corrige
+    state = read_state(state_file, journal_file)
+    assert state["consecutive_losses"] == {"EURUSD": 3}
+    assert state["journal_seq"] == 1
+    state["consecutive_losses"] = {}
+    write_state(state_file, journal_file, state)
+    assert TradeJournal(journal_file).read() == []
+
+    restarted = make_strategy()
+    restarted.load_state()
+    assert restarted.consecutive_losses["EURUSD"] == 0
+    assert restarted.losses["EURUSD"] == 3
+    assert restarted.total_profit == -30.0
+    # La numeración sigue tras la corrección
+    assert restarted.journal.seq == 1
@@ -0,0 +1,101 @@
+# test_order_placement.py
+# Un par con una compra en curso no vuelve a dar señal ni se reprograma
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+
+@pytest.fixture
+def placing_strategy(make_strategy):
+    strategy = make_strategy()
+    strategy.min_time_between_signals = 60
+    strategy.oversold_level = 30
+    strategy.overbought_level = 70
+    strategy.bar_close_scheduler = False
+    strategy.valid_pairs = ["EURUSD"]
+    strategy.iqoption_pairs = {"EURUSD": "EURUSD"}
+
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_buy(pair, direction, rsi_value, detected_at=None):
+        calls.append((pair, direction))
+        started.set()
+        release.wait(5)
+
+    strategy.create_binary_option = slow_buy
+    return strategy, started, release, calls
+
+
+def test_pair_in_flight_is_not_signalled_twice(placing_strategy):
+    strategy, started, release, calls = placing_strategy
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(strategy.process_currency_pair, "EURUSD", 20.0)
+        assert started.wait(5)
+
+        # Un ciclo posterior con el buy todavía en vuelo
+        assert not strategy.can_signal("EURUSD")
+        executor.submit(strategy.process_currency_pair, "EURUSD", 20.0).result(5)
+        strategy._schedule_next_evaluation("EURUSD", 0)
+        assert strategy.eligibility.is_blocked("EURUSD")
+
+        release.set()
+        first.result(5)
+
+    assert calls == [("EURUSD", "PUT")]
+    assert "EURUSD" not in strategy.placing
+    # La espera entre señales corre desde que terminó la compra
+    assert not strategy.can_signal("EURUSD")
+
+
+def test_late_evaluation_reschedules_pair_when_done(placing_strategy):
+    strategy, started, release, calls = placing_strategy
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(strategy.process_currency_pair, "EURUSD", 80.0)
+        assert started.wait(5)
+        strategy._schedule_next_evaluation("EURUSD", 0)
+        finished = threading.Event()
+        future.add_done_callback(lambda f: (strategy._finish_late_evaluation("EURUSD", f), finished.set()))
+        release.set()
+        assert finished.wait(5)
+
+    assert not strategy.eligibility.is_blocked("EURUSD")
+    assert "EURUSD" in strategy.eligibility
+
+
+class BuyOnlyBroker:
+    """Bróker simulado: la compra no debe esperar a ninguna otra consulta"""
+
+    def __init__(self):
+        self.buys = []
+
+    def get_balance(self):
+        raise AssertionError("get_balance en el camino de la orden")
+
+    def buy(self, amount, asset_name, direction, expiry_minutes):
+        self.buys.append((amount, asset_name, direction, expiry_minutes))
+        return True, 501
+
+
+def test_order_is_sized_from_local_balance_without_io(make_strategy):
+    from collections import deque
+
+    strategy = make_strategy()
+    strategy.iqoption = BuyOnlyBroker()
+    strategy.iqoption_pairs = {"EURUSD": "EURUSD-OTC"}
+    strategy.position_size_percent = 0.02
+    strategy.min_position_size = 1
+    strategy.max_position_size = 100
+    strategy.order_latencies = deque(maxlen=10)
+    # Reconciliación vencida: la hace check_stop_loss, no la orden
+    strategy.balance_ledger.mark_dirty()
+
+    strategy.create_binary_option("EURUSD", "PUT", 25.0)
+
+    assert strategy.iqoption.buys == [(20, "EURUSD-OTC", "put", 5)]
+    assert [order["id"] for order in strategy.active_options["EURUSD"]] == [501]
+    assert strategy.balance_ledger.balance == 980.0
+    assert len(strategy.order_latencies) == 1
@@ -0,0 +1,98 @@
+# test_recovery.py
+# Recuperación en segundo plano de las órdenes restauradas del estado
+
+import time
+import threading
+from datetime import datetime, timedelta
+
+
+class RecoveryBroker:
+    """Bróker simulado: historial vacío y get_async_order con resultados conocidos"""
+
+    def __init__(self, results, delay=0.0):
+        self.results = results
+        self.delay = delay
+        self.async_calls = []
+        self.history_calls = 0
+        self.lock = threading.Lock()
+
+    def get_position_history_v2(self, instrument_type, limit, offset, start, end):
+        self.history_calls += 1
+        return True, {"positions": []}
+
+    def get_async_order(self, order_id):
+        with self.lock:
+            self.async_calls.append(order_id)
+        time.sleep(self.delay)
+        result = self.results.get(order_id)
+        if result is None:
+            return {}
+        return {"option-closed": {"name": "option-closed", "msg": {"option_id": order_id, "result": result}}}
+
+
+def restored_order(order_id, expired_ago):
+    expiry_time = datetime.now() - timedelta(seconds=expired_ago)
+    return {"id": order_id, "type": "PUT", "pair": "EURUSD", "size": 10.0, "recovered": True,
+            "entry_time": expiry_time - timedelta(minutes=5), "expiry_time": expiry_time}
+
+
+def restore(strategy, orders):
+    for pair, order in orders:
+        strategy.active_options[pair].append(order)
+        strategy._track_order(pair, order)
+
+
+def test_expired_orders_are_resolved_in_parallel(bare_strategy):
+    strategy = bare_strategy
+    strategy.iqoption = RecoveryBroker({101: "win", 102: "loose", 103: "equal"}, delay=0.2)
+    orders = [("EURUSD", restored_order(101, 60)), ("GBPUSD", restored_order(102, 60)),
+              ("USDJPY", restored_order(103, 60)), ("AUDUSD", restored_order(104, -120))]
+    restore(strategy, orders)
+    strategy.recovery_in_progress = True
+
+    started = time.time()
+    strategy._recover_orders(orders)
+    elapsed = time.time() - started
+
+    # Una consulta de historial para todas y get_async_order en paralelo para el resto
+    assert strategy.iqoption.history_calls == 1
+    assert sorted(strategy.iqoption.async_calls) == [101, 102, 103]
+    assert elapsed < 0.5
+    # La orden que sigue abierta no se consulta
+    assert strategy.settlement_index.lookup(104) is None
+    assert not strategy.recovery_in_progress
+    assert strategy.wake_event.is_set()
+
+    # Los resultados llegan al bucle principal como cualquier push
+    strategy.process_pushed_settlements()
+    assert (strategy.wins["EURUSD"], strategy.losses["GBPUSD"], strategy.ties["USDJPY"]) == (1, 1, 1)
+    assert list(strategy.active_options) == ["AUDUSD"]
+
+
+def test_unresolved_orders_are_not_counted_as_losses(bare_strategy):
+    strategy = bare_strategy
+    strategy.iqoption = RecoveryBroker({})
+    orders = [("EURUSD", restored_order(101, 60))]
+    restore(strategy, orders)
+
+    strategy._recover_orders(orders)
+    strategy.process_pushed_settlements()
+
+    assert strategy.losses["EURUSD"] == 0
+    assert strategy.active_options["EURUSD"][0]["id"] == 101
+    assert not strategy.recovery_in_progress
+
+
+def test_due_restored_orders_wait_while_recovery_runs(bare_strategy):
+    strategy = bare_strategy
+    strategy.iqoption = RecoveryBroker({})
+    order = restored_order(101, 60)
+    restore(strategy, [("EURUSD", order)])
+    strategy.recovery_in_progress = True
+
+    strategy.check_active_orders()
+
+    # Reprogramada sin consultar al bróker
+    assert strategy.iqoption.async_calls == []
+    assert 101 in strategy.settlement_queue
+    assert strategy.active_options["EURUSD"] == [order]
@@ -0,0 +1,123 @@
+# test_rsi.py
+# RSI incremental (WilderRSI) y cálculo por lotes frente a calculate_rsi
+
+import random
+
+import numpy as np
+import pytest
+
+from utils import calculate_rsi, wilder_averages_batch, WilderRSI
+from conftest import make_candles
+
+
+def random_closes(seed, count=60):
+    rng = random.Random(seed)
+    closes = [1.1000]
+    for _ in range(count - 1):
+        closes.append(round(closes[-1] + rng.uniform(-0.002, 0.002), 5))
+    return closes
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_matches_full_recalculation(seed):
+    closes = random_closes(seed)
+    engine = WilderRSI(14)
+    for i, close in enumerate(closes):
+        value = engine.update(close, timestamp=i * 300)
+        assert value == calculate_rsi(make_candles(closes[:i + 1]), 14)
+    assert engine.last_timestamp == (len(closes) - 1) * 300
+
+
+def test_not_ready_until_period_plus_one_closes():
+    engine = WilderRSI(14)
+    for close in random_closes(0, 14):
+        assert engine.update(close) is None
+    assert not engine.ready
+    assert engine.value is None
+    assert engine.update(1.2) is not None
+    assert engine.ready
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_peek_includes_forming_candle_without_changing_state(seed):
+    closes = random_closes(seed)
+    engine = WilderRSI(14)
+    for close in closes[:-1]:
+        engine.update(close)
+    confirmed = engine.value
+
+    assert engine.peek(closes[-1]) == calculate_rsi(make_candles(closes), 14)
+    assert engine.value == confirmed
+
+
+def test_peek_at_seed_boundary():
+    closes = random_closes(1, 15)
+    engine = WilderRSI(14)
+    for close in closes[:-1]:
+        engine.update(close)
+    assert not engine.ready
+    assert engine.peek(closes[-1]) == calculate_rsi(make_candles(closes), 14)
+
+
+def test_only_gains_gives_100():
+    engine = WilderRSI(14)
+    for close in range(1, 17):
+        engine.update(close)
+    assert engine.value == 100
+
+
+def test_reset_discards_state():
+    engine = WilderRSI(14)
+    for close in random_closes(2, 20):
+        engine.update(close)
+    engine.reset()
+    assert not engine.ready
+    assert engine.last_close is None
+
+
+def test_batch_matches_scalar_per_row():
+    rows = [random_closes(seed, 40) for seed in range(8)]
+    averages = wilder_averages_batch(np.array(rows), 14)
+    assert averages is not None
+    avg_gain, avg_loss = averages
+
+    for i, closes in enumerate(rows):
+        engine = WilderRSI.from_averages(14, avg_gain[i], avg_loss[i], closes[-1])
+        assert engine.value == calculate_rsi(make_candles(closes), 14)
+        # El motor sembrado por lotes sigue igual que el recálculo completo
+        assert engine.update(closes[-1] + 0.001) == calculate_rsi(make_candles(closes + [closes[-1] + 0.001]), 14)
+
+
+def test_batch_needs_period_plus_one_columns():
+    assert wilder_averages_batch(np.ones((3, 14)), 14) is None
+    assert wilder_averages_batch(np.ones(20), 14) is None
+
+
+def test_score_skips_pairs_whose_asset_changed_during_fetch(make_strategy):
+    from utils import CandleBuffer
+
+    strategy = make_strategy()
+    strategy.rsi_period = 14
+    strategy.candle_timeframe = 300
+    strategy.candle_buffers = {}
+    strategy.rsi_engines = {}
+    strategy.iqoption_pairs = {"EURUSD": "EURUSD-OTC", "GBPUSD": "GBPUSD"}
+
+    deltas = {}
+    for pair, asset_name, seed in [("EURUSD", "EURUSD", 0), ("GBPUSD", "GBPUSD", 1), ("USDJPY", "USDJPY", 2)]:
+        candles = make_candles(random_closes(seed, 30))
+        buffer = CandleBuffer(100)
+        buffer.seed(candles)
+        strategy.candle_buffers[asset_name] = buffer
+        deltas[pair] = (asset_name, candles)
+
+    # EURUSD pasó a la variante OTC y USDJPY se retiró mientras se descargaban
+    rsi_values = strategy.score_candle_deltas(deltas)
+
+    assert list(rsi_values) == ["GBPUSD"]
+    assert rsi_values["GBPUSD"] == calculate_rsi(deltas["GBPUSD"][1], 14)
+    assert set(strategy.rsi_engines) == {"GBPUSD"}
+
+
+def test_fetch_skips_pair_without_asset(bare_strategy):
+    assert bare_strategy._fetch_pair_candles("EURUSD", deadline=0) is None
@@ -0,0 +1,99 @@
+# test_scheduling.py
+# Heaps de elegibilidad de pares y de liquidación de órdenes
+
+from datetime import datetime
+
+from scheduling import EligibilityIndex, SettlementQueue
+
+
+def make_order(order_id, expiry):
+    return {"id": order_id, "expiry_time": datetime.fromtimestamp(expiry)}
+
+
+class TestEligibilityIndex:
+
+    def test_pop_due_in_order_and_blocks(self):
+        index = EligibilityIndex()
+        index.schedule("GBPUSD", 20)
+        index.schedule("EURUSD", 10)
+        index.schedule("USDJPY", 30)
+
+        assert index.pop_due(25) == ["EURUSD", "GBPUSD"]
+        assert index.is_blocked("EURUSD")
+        assert index.is_blocked("GBPUSD")
+        assert index.pop_due(25) == []
+        assert index.next_due_time() == 30
+
+    def test_reschedule_leaves_stale_entries_ignored(self):
+        index = EligibilityIndex()
+        index.schedule("EURUSD", 10)
+        index.schedule("EURUSD", 50)
+
+        assert index.next_due_time() == 50
+        assert index.pop_due(20) == []
+        assert index.due_time("EURUSD") == 50
+        assert index.pop_due(50) == ["EURUSD"]
+
+    def test_blocked_and_removed_pairs_are_not_due(self):
+        index = EligibilityIndex()
+        index.schedule("EURUSD", 10)
+        index.schedule("GBPUSD", 10)
+        index.block("EURUSD")
+        index.remove("GBPUSD")
+
+        assert index.pop_due(100) == []
+        assert index.next_due_time() is None
+        assert "EURUSD" in index
+        assert "GBPUSD" not in index
+        assert index.due_time("EURUSD") is None
+        assert index.pairs() == ["EURUSD"]
+
+    def test_compaction_keeps_live_entries(self):
+        index = EligibilityIndex()
+        for when in range(200):
+            index.schedule("EURUSD", when)
+        index.schedule("GBPUSD", 5)
+
+        assert len(index) == 2
+        assert index.pop_due(1000) == ["GBPUSD", "EURUSD"]
+
+
+class TestSettlementQueue:
+
+    def test_push_uses_expiry_plus_grace(self):
+        queue = SettlementQueue(grace=15)
+        order = make_order(1, 1000)
+        queue.push("EURUSD", order)
+
+        assert 1 in queue
+        assert queue.next_due_time() == 1015
+        assert queue.pop_due(1014) == []
+        assert queue.pop_due(1015) == [("EURUSD", order, 0)]
+        assert len(queue) == 0
+
+    def test_pop_due_in_expiry_order(self):
+        queue = SettlementQueue(grace=0)
+        late = make_order(1, 2000)
+        early = make_order(2, 1000)
+        queue.push("EURUSD", late)
+        queue.push("GBPUSD", early)
+
+        assert queue.pop_due(3000) == [("GBPUSD", early, 0), ("EURUSD", late, 0)]
+
+    def test_retry_backoff_is_exponential_and_capped(self):
+        queue = SettlementQueue(grace=0, backoff=5, max_backoff=30)
+        order = make_order(1, 0)
+
+        for attempts, delay in [(0, 5), (1, 10), (2, 20), (3, 30), (4, 30)]:
+            queue.retry("EURUSD", order, attempts, now=100)
+            assert queue.next_due_time() == 100 + delay
+            assert queue.pop_due(100 + delay) == [("EURUSD", order, attempts + 1)]
+
+    def test_discard_drops_the_order(self):
+        queue = SettlementQueue(grace=0)
+        queue.push("EURUSD", make_order(1, 1000))
+        queue.discard(1)
+
+        assert 1 not in queue
+        assert queue.next_due_time() is None
+        assert queue.pop_due(5000) == []
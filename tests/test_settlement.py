@@ -0,0 +1,234 @@
+# test_settlement.py
+# Índice de resultados de órdenes alimentado por el websocket
+
+import json
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+from settlement import SettlementIndex
+
+
+class FakeListInfoData:
+    """Como ListInfoData de la librería: set(win, game_state, id_number)"""
+
+    def __init__(self):
+        self.data = {}
+
+    def set(self, win, game_state, id_number):
+        self.data[id_number] = {"win": win, "game_state": game_state}
+
+
+def test_record_normalizes_and_ignores_unknown_results():
+    index = SettlementIndex()
+    index.record(101, "WIN", win_amount="18.5", profit_percent=85, source="test")
+    index.record(102, None)
+    index.record(103, "pending")
+
+    assert index.lookup("101") == {"win": "win", "win_amount": 18.5, "profit_percent": 85, "source": "test"}
+    assert index.lookup(101) == index.lookup("101")
+    assert index.lookup(102) is None
+    assert index.lookup(103) is None
+    assert len(index) == 1
+
+    index.forget(101)
+    assert index.lookup(101) is None
+
+
+def test_install_indexes_existing_and_new_order_binary_results():
+    api = SimpleNamespace(order_binary={101: {"result": "loose"}}, listinfodata={})
+    index = SettlementIndex()
+    assert index.install(api)
+
+    assert index.lookup(101)["win"] == "loose"
+    api.order_binary[102] = {"result": "win", "profit_percent": 85}
+    assert index.lookup(102) == {"win": "win", "win_amount": None, "profit_percent": 85, "source": "order_binary"}
+    # La librería sigue viendo un dict normal
+    assert api.order_binary[102]["result"] == "win"
+
+
+def test_install_indexes_listinfodata_dict_entries():
+    api = SimpleNamespace(order_binary={}, listinfodata={})
+    index = SettlementIndex()
+    index.install(api)
+
+    api.listinfodata["option-closed"] = [{"id": 201, "win": "equal", "win_amount": 10}]
+    assert index.lookup(201) == {"win": "equal", "win_amount": 10.0, "profit_percent": None, "source": "listinfodata"}
+
+
+def test_install_hooks_listinfodata_object_once():
+    listinfodata = FakeListInfoData()
+    api = SimpleNamespace(order_binary={}, listinfodata=listinfodata)
+    index = SettlementIndex()
+    assert index.install(api)
+    hooked_set = listinfodata.set
+    # Reinstalar en la misma conexión no vuelve a envolver nada
+    assert index.install(api)
+    assert listinfodata.set is hooked_set
+
+    listinfodata.set("win", True, 301)
+    assert listinfodata.data[301]["win"] == "win"
+    assert index.lookup(301)["source"] == "listinfodata"
+
+
+def test_install_warns_when_nothing_can_be_hooked(caplog):
+    api = SimpleNamespace(order_binary=defaultdict(dict), listinfodata=None)
+    index = SettlementIndex(logging.getLogger("tests.settlement"))
+    with caplog.at_level(logging.WARNING, logger="tests.settlement"):
+        assert not index.install(api)
+    assert "order_binary no es un dict simple" in caplog.text
+    assert "No se pudo enganchar" in caplog.text
+    # No se sustituye un defaultdict: perdería su fábrica
+    assert type(api.order_binary) is defaultdict
+
+
+def test_register_before_result_completes_on_record():
+    index = SettlementIndex()
+    future = index.register(101)
+    assert not future.done()
+
+    index.record(101, "win", win_amount=18.5)
+    assert future.result(timeout=0)["win_amount"] == 18.5
+    # Registrar dos veces devuelve el mismo resultado
+    assert index.register(101).result(timeout=0)["win"] == "win"
+
+
+def test_register_after_result_is_already_done():
+    index = SettlementIndex()
+    index.record(101, "loose")
+    assert index.register(101).result(timeout=0)["win"] == "loose"
+
+
+def test_forget_cancels_pending_future():
+    index = SettlementIndex()
+    future = index.register(101)
+    index.forget(101)
+    assert future.cancelled()
+
+
+def make_order(order_id, pair="EURUSD", size=10.0):
+    entry_time = datetime.now() - timedelta(minutes=6)
+    return {"id": order_id, "type": "PUT", "pair": pair, "size": size,
+            "entry_time": entry_time, "expiry_time": entry_time + timedelta(minutes=5)}
+
+
+def test_pushed_result_is_applied_on_the_main_thread(bare_strategy):
+    strategy = bare_strategy
+    order = make_order(101)
+    strategy.valid_pairs = ["EURUSD"]
+    strategy.balance_ledger.stake(order["size"])
+    strategy.active_options["EURUSD"].append(order)
+    strategy._track_order("EURUSD", order)
+
+    # El websocket entrega el resultado: solo se encola y se despierta el bucle
+    strategy.settlement_index.record(101, "win", win_amount=18.5, source="order_binary")
+    assert strategy.wake_event.is_set()
+    assert strategy.wins["EURUSD"] == 0
+
+    strategy.process_pushed_settlements()
+    assert strategy.wins["EURUSD"] == 1
+    assert strategy.total_profit == 8.5
+    assert strategy.balance_ledger.balance == 1008.5
+    assert "EURUSD" not in strategy.active_options
+    assert 101 not in strategy.settlement_queue
+    assert not strategy.eligibility.is_blocked("EURUSD")
+    assert strategy.trade_ledger.settlements == [(101, "win", 18.5, 8.5)]
+
+
+def test_pushed_result_for_settled_order_is_ignored(bare_strategy):
+    strategy = bare_strategy
+    order = make_order(101)
+    strategy.active_options["EURUSD"].append(order)
+    strategy._track_order("EURUSD", order)
+    strategy._remove_active_order("EURUSD", order)
+
+    # forget() canceló el Future: un resultado tardío ya no se encola
+    strategy.settlement_index.record(101, "loose")
+    strategy.process_pushed_settlements()
+    assert strategy.losses["EURUSD"] == 0
+
+
+class SlowBalanceBroker:
+    """Bróker simulado cuyo get_balance espera a que la prueba lo libere"""
+
+    def __init__(self, balance):
+        self.balance = balance
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def get_position_history_v2(self, instrument_type, limit, offset, start, end):
+        return True, {"positions": []}
+
+    def get_balance(self):
+        self.entered.set()
+        self.release.wait(5)
+        return self.balance
+
+
+def test_expired_order_lookup_runs_without_state_lock(bare_strategy):
+    strategy = bare_strategy
+    strategy.recovery_in_progress = False
+    strategy.iqoption = SlowBalanceBroker(1008.5)
+    order = make_order(101)
+    order["balance_before"] = 1000.0
+    strategy.balance_ledger.stake(order["size"])
+    strategy.active_options["EURUSD"].append(order)
+    strategy._track_order("EURUSD", order)
+
+    checker = threading.Thread(target=strategy.check_active_orders)
+    checker.start()
+    assert strategy.iqoption.entered.wait(5)
+
+    # Mientras se consulta el balance el lock está libre y llega el push
+    assert strategy.state_lock.acquire(timeout=1)
+    try:
+        strategy.settlement_index.record(101, "loose", source="order_binary")
+        strategy.process_pushed_settlements()
+    finally:
+        strategy.state_lock.release()
+
+    strategy.iqoption.release.set()
+    checker.join(5)
+
+    # El resultado por balance llega tarde y no se registra dos veces
+    assert strategy.losses["EURUSD"] == 1
+    assert strategy.wins["EURUSD"] == 0
+    assert strategy.trade_ledger.settlements == [(101, "loss", 0.0, -10.0)]
+    assert 101 not in strategy.settlement_queue
+
+
+class RecordedHistoryBroker:
+    """Bróker simulado que devuelve un historial v2 grabado de la cuenta real"""
+
+    def __init__(self):
+        path = Path(__file__).parent / "data" / "position_history_v2.json"
+        self.payload = json.loads(path.read_text(encoding="utf-8"))
+        self.calls = []
+
+    def get_position_history_v2(self, instrument_type, limit, offset, start, end):
+        self.calls.append(instrument_type)
+        return True, self.payload
+
+
+def test_reconcile_reads_recorded_v2_positions(bare_strategy):
+    strategy = bare_strategy
+    strategy.iqoption = RecordedHistoryBroker()
+    orders = [make_order(order_id, size=size) for order_id, size in
+              ((12702954958, 20000), (12703165576, 20000), (12710013843, 10000), (99, 10))]
+    for order in orders:
+        order["option_type"] = "turbo"
+
+    assert strategy.reconcile_position_history(orders) == 3
+    assert strategy.iqoption.calls == ["turbo-option"]
+
+    index = strategy.settlement_index
+    assert index.lookup(12702954958)["win"] == "loose"
+    assert index.lookup(12703165576)["win"] == "win"
+    assert index.lookup(12703165576)["win_amount"] == 37000
+    assert index.lookup(12710013843)["win"] == "equal"
+    assert index.lookup(99) is None
+    # El monto devuelto incluye la inversión: beneficio 17000
+    assert strategy._settlement_win_amount(orders[1], index.lookup(12703165576)) - orders[1]["size"] == 17000
@@ -0,0 +1,77 @@
+# test_state_writer.py
+# Escritura del estado en segundo plano agrupando avisos
+
+import time
+import threading
+
+from state_writer import StateWriter
+
+
+class CountingSave:
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+        self.written = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.written.set()
+        if self.fail:
+            raise IOError("disco lleno")
+
+
+def test_notify_does_not_write_without_thread():
+    save = CountingSave()
+    writer = StateWriter(save, interval=0)
+    writer.notify()
+    assert save.calls == 0
+    assert writer.notify_count == 1
+
+
+def test_burst_of_notifications_is_coalesced():
+    save = CountingSave()
+    writer = StateWriter(save, interval=0.3)
+    writer.start()
+    try:
+        writer.notify()
+        assert save.written.wait(1)
+        save.written.clear()
+
+        # Dentro del intervalo: una sola escritura para toda la ráfaga
+        for _ in range(20):
+            writer.notify()
+        assert save.written.wait(1)
+        time.sleep(0.1)
+        assert save.calls == 2
+        assert writer.notify_count == 21
+    finally:
+        writer.flush()
+
+
+def test_flush_writes_pending_state_and_stops():
+    save = CountingSave()
+    writer = StateWriter(save, interval=60)
+    writer.start()
+    writer.notify()
+    assert save.written.wait(1)
+
+    writer.notify()  # Pendiente: el intervalo no se ha cumplido
+    writer.flush()
+    assert save.calls == 2
+    assert not writer._thread.is_alive()
+
+
+def test_save_errors_are_logged_and_the_thread_survives(caplog):
+    save = CountingSave(fail=True)
+    writer = StateWriter(save, interval=0)
+    writer.start()
+    try:
+        writer.notify()
+        assert save.written.wait(1)
+        save.written.clear()
+        writer.notify()
+        assert save.written.wait(1)
+    finally:
+        writer.flush()
+    assert writer.write_count == 0
+    assert "disco lleno" in caplog.text
@@ -0,0 +1,108 @@
+# test_trade_ledger.py
+# Historial de operaciones en SQLite
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from trade_ledger import TradeLedger, open_ledger_readonly, correct_settlement
+
+
+def make_order(order_id, pair, entry_time, direction="PUT", size=10.0):
+    return {
+        "id": order_id,
+        "pair": pair,
+        "type": direction,
+        "size": size,
+        "rsi": 30.0,
+        "option_type": "turbo",
+        "entry_time": entry_time,
+        "expiry_time": entry_time + timedelta(minutes=5),
+    }
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = TradeLedger(str(tmp_path / "trades.db"), batch_interval=0.05)
+    yield ledger
+    ledger.close()
+
+
+def test_orders_and_settlements_are_queryable(ledger):
+    now = datetime.now()
+    ledger.record_order(make_order(101, "EURUSD", now - timedelta(minutes=20)), "EURUSD-OTC")
+    ledger.record_order(make_order(102, "EURUSD", now - timedelta(minutes=10)), "EURUSD-OTC")
+    ledger.record_order(make_order(103, "GBPUSD", now), "GBPUSD")
+    ledger.record_settlement(101, "win", 18.5, 8.5)
+    ledger.record_settlement(102, "loss", 0.0, -10.0)
+    ledger.flush()
+
+    assert ledger.find(101)["result"] == "win"
+    assert ledger.find("103")["asset"] == "GBPUSD"
+    assert ledger.find(103)["result"] is None
+    assert ledger.find(999) is None
+
+    assert ledger.pair_stats() == [{"pair": "EURUSD", "wins": 1, "losses": 1, "ties": 0, "profit": -1.5}]
+    recent = ledger.recent((now - timedelta(minutes=15)).timestamp())
+    assert [row["order_id"] for row in recent] == ["103", "102"]
+    assert [row["order_id"] for row in ledger.recent(0, pair="GBPUSD")] == ["103"]
+
+
+def test_duplicate_order_is_ignored(ledger):
+    order = make_order(101, "EURUSD", datetime.now())
+    ledger.record_order(order, "EURUSD-OTC")
+    ledger.record_order(order, "EURUSD")
+    ledger.flush()
+    assert len(ledger.recent(0)) == 1
+    assert ledger.find(101)["asset"] == "EURUSD-OTC"
+
+
+def test_pair_stats_since(ledger):
+    old = datetime.now() - timedelta(days=2)
+    ledger.record_order(make_order(101, "EURUSD", old), "EURUSD")
+    ledger.record_order(make_order(102, "EURUSD", datetime.now()), "EURUSD")
+    ledger.record_settlement(101, "loss", 0.0, -10.0)
+    ledger.record_settlement(102, "tie", 10.0, 0.0)
+    ledger.flush()
+
+    since = (datetime.now() - timedelta(days=1)).timestamp()
+    assert ledger.pair_stats(since) == [{"pair": "EURUSD", "wins": 0, "losses": 0, "ties": 1, "profit": 0.0}]
+
+
+def test_writes_are_batched_in_one_transaction(tmp_path):
+    ledger = TradeLedger(str(tmp_path / "trades.db"), batch_interval=0.5)
+    try:
+        now = datetime.now()
+        for order_id in range(50):
+            ledger.record_order(make_order(order_id, "EURUSD", now), "EURUSD")
+        # Todavía en la cola: nada escrito hasta cerrar el lote
+        assert ledger.recent(0) == []
+        ledger.flush()
+        assert len(ledger.recent(0)) == 50
+    finally:
+        ledger.close()
+
+
+def test_close_drains_the_queue(tmp_path):
+    path = str(tmp_path / "trades.db")
+    ledger = TradeLedger(path, batch_interval=5)
+    ledger.record_order(make_order(101, "EURUSD", datetime.now()), "EURUSD")
+    ledger.close()
+
+    conn = open_ledger_readonly(path)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0] == 1
+    finally:
+        conn.close()
+    assert open_ledger_readonly(str(tmp_path / "missing.db")) is None
+
+
+def test_correct_settlement_updates_row_by_order_id(ledger):
+    ledger.record_order(make_order(101, "EURUSD", datetime.now()), "EURUSD")
+    ledger.record_settlement(101, "loss", 0.0, -10.0)
+    ledger.flush()
+
+    # Corrección de fix_stats: la pérdida era un empate
+    assert correct_settlement(ledger.path, 101, "tie", 10.0, 0.0)
+    assert not correct_settlement(ledger.path, 999, "tie", 10.0, 0.0)
+    assert ledger.pair_stats() == [{"pair": "EURUSD", "wins": 0, "losses": 0, "ties": 1, "profit": 0.0}]
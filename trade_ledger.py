@@ -0,0 +1,194 @@
+# trade_ledger.py
+# Registro de operaciones en SQLite (historial consultable por par y fecha)
+
+import os
+import time
+import queue
+import sqlite3
+import threading
+import logging
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    order_id TEXT NOT NULL,
+    pair TEXT NOT NULL,
+    asset TEXT,
+    option_type TEXT,
+    direction TEXT,
+    size REAL,
+    rsi REAL,
+    entry_time REAL NOT NULL,
+    expiry_time REAL,
+    result TEXT,
+    payout REAL,
+    profit REAL,
+    settled_time REAL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_trades_order_id ON trades(order_id);
+CREATE INDEX IF NOT EXISTS idx_trades_pair ON trades(pair);
+CREATE INDEX IF NOT EXISTS idx_trades_entry_time ON trades(entry_time);
+"""
+
+
+class TradeLedger:
+    """
+    Historial de operaciones en una base SQLite local
+
+    Las escrituras se encolan y un hilo dedicado las aplica en lotes, una
+    transacción por lote, así que registrar una operación no toca el disco
+    en el hilo de trading. Las consultas abren su propia conexión (modo
+    WAL: se puede leer mientras se escribe).
+
+    Resultados: 'win', 'loss' o 'tie'; NULL mientras la orden está abierta.
+    """
+
+    def __init__(self, path, batch_interval=1.0, logger=None):
+        self.path = path
+        self.batch_interval = batch_interval
+        self.logger = logger or logging.getLogger(__name__)
+        self._queue = queue.Queue()
+        self._stopping = threading.Event()
+
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+        self._thread = threading.Thread(target=self._run, name="trade-ledger", daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    # --- Escritura ---
+
+    def record_order(self, order, asset=None):
+        """Registrar una orden colocada"""
+        self._queue.put((
+            "INSERT OR IGNORE INTO trades "
+            "(order_id, pair, asset, option_type, direction, size, rsi, entry_time, expiry_time) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                str(order["id"]),
+                order["pair"],
+                asset,
+                order.get("option_type"),
+                order["type"],
+                order["size"],
+                order.get("rsi"),
+                order["entry_time"].timestamp(),
+                order["expiry_time"].timestamp(),
+            )
+        ))
+
+    def record_settlement(self, order_id, result, payout, profit):
+        """Registrar el resultado de una orden ('win', 'loss' o 'tie')"""
+        self._queue.put((
+            "UPDATE trades SET result = ?, payout = ?, profit = ?, settled_time = ? WHERE order_id = ?",
+            (result, payout, profit, time.time(), str(order_id))
+        ))
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            while not (self._stopping.is_set() and self._queue.empty()):
+                try:
+                    batch = [self._queue.get(timeout=self.batch_interval)]
+                except queue.Empty:
+                    continue
+                # Agrupar en la misma transacción lo que llegue durante batch_interval
+                deadline = time.time() + self.batch_interval
+                while not self._stopping.is_set():
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+                try:
+                    with conn:
+                        for sql, params in batch:
+                            conn.execute(sql, params)
+                except Exception as e:
+                    self.logger.error(f"❌ Error escribiendo {len(batch)} operaciones en el ledger: {str(e)}")
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+        finally:
+            conn.close()
+
+    def flush(self):
+        """Esperar a que se escriba todo lo encolado"""
+        if self._thread.is_alive():
+            self._queue.join()
+
+    def close(self):
+        self._stopping.set()
+        self._thread.join(timeout=10)
+
+    # --- Consultas ---
+
+    def query(self, sql, params=()):
+        conn = self._connect()
+        try:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+    def pair_stats(self, since=None):
+        """Victorias, derrotas, empates y beneficio por par (órdenes liquidadas)"""
+        return self.query(
+            "SELECT pair, "
+            "SUM(result = 'win') AS wins, SUM(result = 'loss') AS losses, SUM(result = 'tie') AS ties, "
+            "COALESCE(SUM(profit), 0) AS profit "
+            "FROM trades WHERE result IS NOT NULL AND entry_time >= ? "
+            "GROUP BY pair ORDER BY pair",
+            (since or 0,)
+        )
+
+    def recent(self, since, pair=None):
+        """Órdenes colocadas desde `since` (epoch), las más nuevas primero"""
+        if pair is None:
+            return self.query("SELECT * FROM trades WHERE entry_time >= ? ORDER BY entry_time DESC", (since,))
+        return self.query(
+            "SELECT * FROM trades WHERE pair = ? AND entry_time >= ? ORDER BY entry_time DESC",
+            (pair, since)
+        )
+
+    def find(self, order_id):
+        rows = self.query("SELECT * FROM trades WHERE order_id = ?", (str(order_id),))
+        return rows[0] if rows else None
+
+
+def open_ledger_readonly(path):
+    """Conexión de solo lectura para herramientas externas (None si no existe)"""
+    if not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def correct_settlement(path, order_id, result, payout, profit):
+    """
+    Corregir el resultado de una orden registrada (herramientas externas,
+    con la estrategia detenida)
+
+    Returns:
+        bool: True si la orden estaba en el ledger
+    """
+    conn = sqlite3.connect(path, timeout=10)
+    try:
+        with conn:
+            cursor = conn.execute(
+                "UPDATE trades SET result = ?, payout = ?, profit = ? WHERE order_id = ?",
+                (result, payout, profit, str(order_id))
+            )
+        return cursor.rowcount > 0
+    finally:
+        conn.close()
@@ -4,31 +4,114 @@
 import numpy as np
 from datetime import datetime
 import pytz
+import os
+import gzip
+import queue
+import shutil
+import atexit
 import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+class _InProcessQueueHandler(QueueHandler):
+    """
+    QueueHandler que no formatea en el hilo que registra
+
+    El QueueHandler estándar formatea el mensaje antes de encolarlo (pensado
+    para colas entre procesos). Aquí la cola es del mismo proceso, así que
+    el registro se encola tal cual y el formato lo hace el QueueListener.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def _gzip_namer(name):
+    return f"{name}.gz"
+
+
+def _gzip_rotator(source, dest):
+    """Comprimir el archivo rotado (se ejecuta en el hilo del QueueListener)"""
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+_log_handler = None
+_log_listener = None
+_log_loggers = set()  # Loggers de la aplicación enganchados a la cola
+_log_lock = threading.Lock()
+
+
+def _start_log_pipeline(log_file, max_bytes, backup_count, compress):
+    """Crear (una sola vez) la cola de logging y el hilo que escribe los handlers"""
+    global _log_handler, _log_listener
 
-def setup_logger(name, log_file, level=logging.INFO):
-    """Configurar logger con formato personalizado"""
     formatter = logging.Formatter(
         '%(asctime)s | %(levelname)s | %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
-    
-    # Handler para archivo
-    file_handler = logging.FileHandler(log_file)
+
+    # Handler para archivo, con rotación por tamaño
+    file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
     file_handler.setFormatter(formatter)
-    
+    if compress:
+        file_handler.namer = _gzip_namer
+        file_handler.rotator = _gzip_rotator
+
     # Handler para consola
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
-    
-    # Configurar logger
+
+    log_queue = queue.SimpleQueue()
+    _log_listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    _log_listener.start()
+
+    # Un único QueueHandler compartido por los loggers de la aplicación (no
+    # el raíz: los registros de iqoptionapi, websocket o uvicorn no entran)
+    _log_handler = _InProcessQueueHandler(log_queue)
+    atexit.register(shutdown_logging)
+
+
+def setup_logger(name, log_file, level=logging.INFO, max_bytes=10 * 1024 * 1024, backup_count=5, compress=False):
+    """
+    Configurar logger con formato personalizado
+
+    El formato y la escritura a archivo/consola ocurren en el hilo de un
+    QueueListener: registrar una línea solo la encola. La primera llamada
+    crea la canalización (con `log_file`); cada logger recibe el handler
+    compartido una sola vez y no propaga, así ninguna línea se escribe dos
+    veces.
+    """
     logger = logging.getLogger(name)
+    with _log_lock:
+        if _log_listener is None:
+            _start_log_pipeline(log_file, max_bytes, backup_count, compress)
+        if _log_handler not in logger.handlers:
+            logger.addHandler(_log_handler)
+        logger.propagate = False
+        _log_loggers.add(logger)
+
     logger.setLevel(level)
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
     return logger
 
+
+def shutdown_logging():
+    """Vaciar la cola de logging y cerrar los handlers (llamar al finalizar)"""
+    global _log_handler, _log_listener
+    with _log_lock:
+        if _log_listener is None:
+            return
+        for logger in _log_loggers:
+            logger.removeHandler(_log_handler)
+            logger.propagate = True
+        _log_loggers.clear()
+        _log_listener.stop()  # Procesa lo pendiente antes de detenerse
+        for handler in _log_listener.handlers:
+            handler.close()
+        _log_listener = None
+        _log_handler = None
+
 def calculate_rsi(candles, period=14):
     """
     Calcular RSI a partir de velas
@@ -78,6 +161,263 @@ def calculate_rsi(candles, period=14):
         logging.error(f"Error calculando RSI: {str(e)}")
         return None
 
+def wilder_averages_batch(closes, period=14):
+    """
+    Calcular avg_gain/avg_loss de Wilder para muchos pares en un solo paso
+
+    El suavizado es recursivo en el tiempo, así que se itera por columnas
+    (velas) y se vectoriza por filas (pares). Las operaciones siguen el mismo
+    orden que calculate_rsi para obtener exactamente los mismos valores.
+
+    Args:
+        closes: Matriz 2D (pares x velas) de precios de cierre
+        period: Período para el cálculo del RSI
+
+    Returns:
+        tuple: (avg_gain, avg_loss) como arrays de una dimensión, o None si
+        no hay suficientes velas
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    if closes.ndim != 2 or closes.shape[1] < period + 1:
+        return None
+
+    changes = np.diff(closes, axis=1)
+    gains = np.where(changes > 0, changes, 0.0)
+    losses = np.where(changes < 0, -changes, 0.0)
+
+    # Suma secuencial (no np.sum, que suma por pares y cambia el redondeo)
+    avg_gain = np.zeros(closes.shape[0])
+    avg_loss = np.zeros(closes.shape[0])
+    for i in range(period):
+        avg_gain = avg_gain + gains[:, i]
+        avg_loss = avg_loss + losses[:, i]
+    avg_gain = avg_gain / period
+    avg_loss = avg_loss / period
+
+    for i in range(period, gains.shape[1]):
+        avg_gain = (avg_gain * (period - 1) + gains[:, i]) / period
+        avg_loss = (avg_loss * (period - 1) + losses[:, i]) / period
+
+    return avg_gain, avg_loss
+
+class WilderRSI:
+    """
+    RSI incremental con suavizado de Wilder
+
+    Mantiene avg_gain/avg_loss y el último cierre confirmado para actualizar
+    en O(1) cada vez que cierra una vela. Alimentado con la misma secuencia
+    de cierres produce exactamente el mismo valor que calculate_rsi.
+    """
+
+    def __init__(self, period=14):
+        self.period = period
+        self.avg_gain = None
+        self.avg_loss = None
+        self.last_close = None
+        self.last_timestamp = None  # 'from' de la última vela confirmada
+        self._seed_closes = []
+
+    @classmethod
+    def from_averages(cls, period, avg_gain, avg_loss, last_close, last_timestamp=None):
+        """Crear un motor ya sembrado (ej: con wilder_averages_batch)"""
+        engine = cls(period)
+        engine.avg_gain = float(avg_gain)
+        engine.avg_loss = float(avg_loss)
+        engine.last_close = float(last_close)
+        engine.last_timestamp = last_timestamp
+        return engine
+
+    @property
+    def ready(self):
+        """True cuando ya hay suficientes cierres para calcular el RSI"""
+        return self.avg_gain is not None
+
+    def reset(self):
+        """Descartar todo el estado acumulado"""
+        self.avg_gain = None
+        self.avg_loss = None
+        self.last_close = None
+        self.last_timestamp = None
+        self._seed_closes = []
+
+    def update(self, close, timestamp=None):
+        """
+        Confirmar una vela cerrada
+
+        Args:
+            close: Precio de cierre de la vela
+            timestamp: Marca 'from' de la vela (opcional)
+
+        Returns:
+            float: RSI confirmado o None si aún no hay suficientes datos
+        """
+        close = float(close)
+        if timestamp is not None:
+            self.last_timestamp = timestamp
+
+        if not self.ready:
+            # Fase de siembra: acumular period + 1 cierres
+            self._seed_closes.append(close)
+            self.last_close = close
+            if len(self._seed_closes) < self.period + 1:
+                return None
+
+            closes = self._seed_closes
+            changes = [closes[i] - closes[i-1] for i in range(1, len(closes))]
+            gains = [change if change > 0 else 0 for change in changes]
+            losses = [-change if change < 0 else 0 for change in changes]
+            self.avg_gain = sum(gains) / self.period
+            self.avg_loss = sum(losses) / self.period
+            self._seed_closes = []
+            return self.value
+
+        self.avg_gain, self.avg_loss = self._smooth(close)
+        self.last_close = close
+        return self.value
+
+    def peek(self, close):
+        """
+        RSI provisional con la vela en formación, sin modificar el estado
+
+        Args:
+            close: Precio actual de la vela en formación
+
+        Returns:
+            float: RSI provisional o None si aún no hay suficientes datos
+        """
+        if not self.ready:
+            if len(self._seed_closes) + 1 < self.period + 1:
+                return None
+            # Justo en el límite de la siembra: calcular sobre copia
+            return calculate_rsi(
+                [{'close': c} for c in self._seed_closes + [float(close)]],
+                self.period
+            )
+
+        avg_gain, avg_loss = self._smooth(float(close))
+        return self._to_rsi(avg_gain, avg_loss)
+
+    @property
+    def value(self):
+        """RSI de la última vela confirmada"""
+        if not self.ready:
+            return None
+        return self._to_rsi(self.avg_gain, self.avg_loss)
+
+    def _smooth(self, close):
+        change = close - self.last_close
+        gain = change if change > 0 else 0
+        loss = -change if change < 0 else 0
+        avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+        avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        return avg_gain, avg_loss
+
+    @staticmethod
+    def _to_rsi(avg_gain, avg_loss):
+        if avg_loss == 0:
+            return 100
+        rs = avg_gain / avg_loss
+        return round(100 - (100 / (1 + rs)), 2)
+
+class CandleBuffer:
+    """
+    Buffer circular de velas de tamaño fijo respaldado por arrays
+
+    Guarda las últimas `capacity` velas de un activo. La última vela puede
+    estar aún en formación y se reemplaza cuando llega una actualización
+    con el mismo 'from'.
+    """
+
+    FIELDS = ('open', 'close', 'min', 'max', 'volume')
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.from_times = np.zeros(capacity, dtype=np.int64)
+        self.data = {field: np.zeros(capacity, dtype=np.float64) for field in self.FIELDS}
+        self.size = 0
+        self.head = 0  # Posición donde se escribirá la siguiente vela
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def last_timestamp(self):
+        """'from' de la vela más reciente o None si el buffer está vacío"""
+        if self.size == 0:
+            return None
+        return int(self.from_times[(self.head - 1) % self.capacity])
+
+    def clear(self):
+        """Vaciar el buffer"""
+        self.size = 0
+        self.head = 0
+
+    def seed(self, candles):
+        """Cargar el buffer desde cero con una lista de velas"""
+        self.clear()
+        return self.merge(candles)
+
+    def merge(self, candles):
+        """
+        Incorporar velas nuevas al buffer
+
+        Args:
+            candles: Lista de velas con formato IQ Option (ordenadas por 'from')
+
+        Returns:
+            bool: True si el contenido del buffer cambió
+        """
+        changed = False
+        for candle in candles:
+            timestamp = int(candle['from'])
+            last = self.last_timestamp
+
+            if last is not None and timestamp < last:
+                continue  # Vela antigua ya conocida
+
+            if last is not None and timestamp == last:
+                index = (self.head - 1) % self.capacity  # Reemplazar vela en formación
+            else:
+                index = self.head
+                self.head = (self.head + 1) % self.capacity
+                self.size = min(self.size + 1, self.capacity)
+
+            if self._write(index, timestamp, candle):
+                changed = True
+        return changed
+
+    def _write(self, index, timestamp, candle):
+        values = [float(candle.get(field, 0) or 0) for field in self.FIELDS]
+        if (self.from_times[index] == timestamp and
+                all(self.data[field][index] == value for field, value in zip(self.FIELDS, values))):
+            return False
+        self.from_times[index] = timestamp
+        for field, value in zip(self.FIELDS, values):
+            self.data[field][index] = value
+        return True
+
+    def _ordered(self, array):
+        if self.size < self.capacity:
+            return array[:self.size].copy()
+        return np.concatenate((array[self.head:], array[:self.head]))
+
+    def closes(self):
+        """Precios de cierre en orden cronológico"""
+        return self._ordered(self.data['close'])
+
+    def timestamps(self):
+        """Marcas 'from' en orden cronológico"""
+        return self._ordered(self.from_times)
+
+    def to_candles(self):
+        """Reconstruir la lista de velas (formato IQ Option) en orden cronológico"""
+        timestamps = self.timestamps()
+        columns = {field: self._ordered(self.data[field]) for field in self.FIELDS}
+        return [
+            {'from': int(timestamps[i]), **{field: float(columns[field][i]) for field in self.FIELDS}}
+            for i in range(self.size)
+        ]
+
 def is_market_open():
     """
     Verificar si el mercado Forex está abierto